@@ -85,6 +85,27 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# The results of the solver are cached in the database, such that every process can use them.
+# A result expires TIMEOUT seconds after it was last used. Beyond MAX_ENTRIES, the database cache culls a third of its entries.
+# Create the table with: python manage.py createcachetable
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'planning': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'planning_cache',
+        'TIMEOUT': 60 * 60 * 24 * 7,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -131,3 +152,42 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGIN_URL = 'login'
+
+# Planning
+# Maximum number of processes that solve the objectives of one planning concurrently. With 1 they are solved one after another.
+PLANNING_PROCESSES = int(os.environ.get('PLANNING_PROCESSES', 4))
+# Plannings are created by a worker process (python manage.py planningworker). Set to 0 to create them within the request.
+PLANNING_ASYNC = bool(int(os.environ.get('PLANNING_ASYNC', 1)))
+# Solver backend: cbc or glpk (binaries called by Pyomo) or highs (scipy.optimize.milp, within the process)
+PLANNING_SOLVER = os.environ.get('PLANNING_SOLVER', 'cbc')
+# Options per backend: time limit in seconds (the best planning found so far is used when it is hit), relative MIP gap and number of threads.
+# None is the default of the solver. The environment variables set the options of every backend.
+PLANNING_SOLVER_OPTIONS = {
+    backend: {
+        'time_limit': float(os.environ['PLANNING_TIME_LIMIT']) if os.environ.get('PLANNING_TIME_LIMIT') else None,
+        'mip_gap': float(os.environ['PLANNING_MIP_GAP']) if os.environ.get('PLANNING_MIP_GAP') else None,
+        'threads': int(os.environ['PLANNING_THREADS']) if os.environ.get('PLANNING_THREADS') else None,
+    }
+    for backend in ('cbc', 'glpk', 'highs')
+}
+# Time limit in seconds of every solve of a Pareto front, which takes up to planner.PARETO_MAX_SOLVES solves
+PLANNING_PARETO_TIME_LIMIT = float(os.environ.get('PLANNING_PARETO_TIME_LIMIT', 10))
+# Group workers with the same skills, preferences and availability into classes, which the solver plans as a number of workers
+PLANNING_AGGREGATE = bool(int(os.environ.get('PLANNING_AGGREGATE', 0)))
+
+# The phases of every planning and every solve are logged at INFO to the console, set PLANNING_LOG_LEVEL=INFO to show them
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'planning': {
+            'handlers': ['console'],
+            'level': os.environ.get('PLANNING_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
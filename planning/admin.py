@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Skills,Tasks,Projects,Workers,Shifts,Availability,WorkerSkills
+from .models import Skills,Tasks,Projects,Workers,Shifts,Availability,WorkerSkills,PlanningJob,ProductivitySnapshot
 from datetime import date
 
 class TaskInline(admin.ModelAdmin):
@@ -23,10 +23,20 @@ class AvailabilityInline(admin.ModelAdmin):
 	list_display = ('worker', 'date')
 	list_filter = ['worker__name', 'date']
 
+class PlanningJobInline(admin.ModelAdmin):
+	list_display = ('date', 'status', 'worker', 'created', 'finished')
+	list_filter = ['status']
+
+class ProductivitySnapshotInline(admin.ModelAdmin):
+	list_display = ('worker', 'skill', 'productivity', 'valid_from', 'valid_to')
+	list_filter = ['worker__name', 'skill__name']
+
 admin.site.register(Shifts,ShiftsInline)
 admin.site.register(Workers)
 admin.site.register(Availability,AvailabilityInline)
 admin.site.register(Skills)
 admin.site.register(WorkerSkills,WorkerSkillsInline)
 admin.site.register(Tasks, TaskInline)
-admin.site.register(Projects,ProjectInline)
\ No newline at end of file
+admin.site.register(Projects,ProjectInline)
+admin.site.register(PlanningJob,PlanningJobInline)
+admin.site.register(ProductivitySnapshot,ProductivitySnapshotInline)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class PlanningConfig(AppConfig):
     name = 'planning'
+
+    def ready(self):
+        # Keeps the productivity snapshot and the cached planning dates up to date
+        from . import cache, snapshot
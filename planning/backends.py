@@ -0,0 +1,259 @@
+import contextlib
+import time
+import numpy as np
+from pyomo.environ import Objective, Constraint, Param, maximize
+from pyomo.opt import SolverFactory, TerminationCondition
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+import scipy.sparse as sp
+from scipy.optimize import milp, LinearConstraint, Bounds
+from .matrix import OBJECTIVES
+
+# The backends that can be chosen with settings.PLANNING_SOLVER. cbc and glpk are external binaries that Pyomo calls,
+# highs is scipy.optimize.milp, which solves within the process without writing a model file.
+BACKENDS = ['cbc', 'glpk', 'highs']
+
+class SolverError(Exception):
+	"""Raised when the solver did not find any planning, e.g. because the minimum outputs cannot be met"""
+
+def solverBackend(solver='cbc', options=None):
+	"""Description of the function
+
+	Parameters:
+	solver (str): 'highs' or the name of a solver in Pyomo's SolverFactory, e.g. 'cbc' or 'glpk'
+	options (dict): time_limit (seconds), mip_gap (relative) and threads, None is the default of the solver
+
+	Returns:
+	HighsBackend or PyomoBackend
+
+	"""
+
+	options = {key: value for key, value in (options or {}).items() if value is not None}
+	if solver == 'highs':
+		return HighsBackend(**options)
+	return PyomoBackend(solver, **options)
+
+def check(matrices):
+	"""Raises a SolverError when a row of the matrices cannot be met, before the model is built"""
+	if len(matrices.infeasibleRows()):
+		raise SolverError('No planning found, the minimum output of a skill cannot be met or is above its maximum')
+
+def gap(lower, upper):
+	"""Returns the relative gap between the bounds of a maximization, None when a bound is unknown"""
+	try:
+		lower, upper = float(lower), float(upper)
+	except (TypeError, ValueError):
+		return None
+	if not np.isfinite(lower) or not np.isfinite(upper):
+		return None
+	# cbc reports the bound of a stopped solve with the sign of its minimization, the measures are never negative
+	return abs(abs(upper) - abs(lower)) / max(abs(lower), 1e-9)
+
+class PyomoBackend:
+	"""Description of the class
+
+	Solves PlanningMatrices with a solver of Pyomo's SolverFactory. The Pyomo model is built on the first solve and kept,
+	such that only the active objective is swapped between the solves. When the solver is a persistent solver (e.g. gurobi_persistent),
+	the model is loaded into it once and only the objective is sent again.
+	After every solve, stats holds the wall time per phase (model, write, solve, load), the size of the model, the solver status and the MIP gap.
+	When logfile is set, the log of the solver is appended to it while it solves.
+
+	Parameters:
+	solver (str): name of the solver in Pyomo's SolverFactory
+	time_limit (float): seconds after which the best planning found so far is returned
+	mip_gap (float): relative gap between the planning and the bound at which the solve stops
+	threads (int): number of threads of the solver
+
+	"""
+
+	# Names of the options on the command line of every solver, options that a solver does not have are left out
+	OPTIONS = {
+		'cbc': {'time_limit': 'sec', 'mip_gap': 'ratioGap', 'threads': 'threads'},
+		'glpk': {'time_limit': 'tmlim', 'mip_gap': 'mipgap'},
+		'gurobi': {'time_limit': 'TimeLimit', 'mip_gap': 'MIPGap', 'threads': 'Threads'},
+		'gurobi_persistent': {'time_limit': 'TimeLimit', 'mip_gap': 'MIPGap', 'threads': 'Threads'},
+	}
+
+	def __init__(self, solver='cbc', time_limit=None, mip_gap=None, threads=None):
+		self.opt = SolverFactory(solver)
+		self.persistent = isinstance(self.opt, PersistentSolver)
+		names = self.OPTIONS.get(solver, {})
+		values = {'time_limit': int(np.ceil(time_limit)) if solver == 'glpk' and time_limit is not None else time_limit, 'mip_gap': mip_gap, 'threads': threads}
+		self.options = {names[key]: value for key, value in values.items() if key in names and value is not None}
+		if solver == 'cbc' and time_limit is not None:
+			self.options['timeMode'] = 'elapsed' # cbc measures the time limit in CPU time by default
+		self.matrices = None
+		self.logfile = None
+
+	def solve(self, matrices, objective, start=None, floors=None, pinned=None):
+		"""Description of the function
+
+		Parameters:
+		matrices (LinearMatrices): the instance
+		objective (str or array): the measure to maximize, or the objective coefficient of every decision variable
+		start (array): value of every decision variable to start from (MIP start), None for no start
+		floors (dict): the minimum value per measure (epsilon constraints), None for no minimum
+		pinned (array): the value of every decision variable that must keep its value and NaN for the others, None for none
+
+		Returns:
+		array: the 0/1 value of every decision variable
+
+		"""
+
+		self.stats = {'phases': {}, 'variables': matrices.size, 'constraints': matrices.A.shape[0]}
+		if matrices is not self.matrices:
+			check(matrices)
+			start_time = time.perf_counter()
+			self.matrices = matrices
+			self.model = matrices.model()
+			self.stats['phases']['model'] = time.perf_counter() - start_time
+			self.works = list(self.model.works.values())
+			self.coefficients = None
+			self.pinned = np.zeros(matrices.size, dtype=bool)
+			self.loaded = False
+		model = self.model
+		model.obj.deactivate()
+		if isinstance(objective, str):
+			active = model.obj[objective]
+		else:
+			# An objective of coefficients is only built again when other coefficients are given
+			if objective is not self.coefficients:
+				if self.coefficients is not None:
+					model.del_component(model.custom)
+				model.custom = Objective(expr=matrices.expression(self.works, objective), sense=maximize)
+				self.coefficients = objective
+				self.loaded = False
+			active = model.custom
+		if self.coefficients is not None:
+			model.custom.deactivate()
+		active.activate()
+		self.setFloors(floors or {})
+		self.setPinned(pinned)
+
+		warmstart = start is not None and self.opt.warm_start_capable()
+		if warmstart:
+			for var, value in zip(self.works, np.asarray(start).tolist()):
+				if not var.fixed:
+					var.value = value
+		start_time = time.perf_counter()
+		if self.persistent:
+			if not self.loaded:
+				self.opt.set_instance(model)
+				self.loaded = True
+			else:
+				self.opt.set_objective(active)
+			results = self.opt.solve(warmstart=warmstart, options=self.options, load_solutions=False)
+			self.stats['phases']['solve'] = time.perf_counter() - start_time
+			self.check(results)
+			start_time = time.perf_counter()
+			self.opt.load_vars()
+		else:
+			with self.log() as tee:
+				results = self.opt.solve(model, warmstart=warmstart, options=self.options, load_solutions=False, tee=tee)
+			# The solver binary itself took results.solver.time, the rest is writing the model file and reading the solution file
+			elapsed = time.perf_counter() - start_time
+			solving = results.solver.time if isinstance(results.solver.time, float) else elapsed
+			self.stats['phases'].update({'write': max(elapsed - solving, 0), 'solve': solving})
+			self.check(results)
+			start_time = time.perf_counter()
+			model.solutions.load_from(results)
+		x = np.round([var.value or 0 for var in self.works])
+		self.stats['phases']['load'] = time.perf_counter() - start_time
+		return x
+
+	@contextlib.contextmanager
+	def log(self):
+		"""Sends the log of the solver to logfile while it solves, such that its progress can be followed (see progress.py)"""
+		if not self.logfile:
+			yield False
+			return
+		with open(self.logfile, 'a', buffering=1) as log, contextlib.redirect_stdout(log):
+			yield True
+
+	def setFloors(self, floors):
+		"""Activates a constraint 'measure >= minimum' per measure of the floors, of which only the minimum changes between the solves"""
+		model = self.model
+		if not floors and not hasattr(model, 'floors'):
+			return
+		if not hasattr(model, 'floors'):
+			model.floor = Param(OBJECTIVES, mutable=True, initialize=0)
+			model.floors = Constraint(OBJECTIVES, rule=lambda m, name: self.matrices.expression(self.works, self.matrices.objective(name)) >= m.floor[name])
+		for name in OBJECTIVES:
+			if name in floors:
+				model.floor[name] = floors[name]
+				model.floors[name].activate()
+			else:
+				model.floors[name].deactivate()
+		# A persistent solver does not see the changed constraints, hence the model is loaded again
+		self.loaded = False
+
+	def setPinned(self, pinned):
+		"""Fixes the variables of which pinned holds a value, the variables that were pinned by the previous solve are free again"""
+		mask = np.zeros(self.matrices.size, dtype=bool) if pinned is None else ~np.isnan(pinned)
+		if not mask.any() and not self.pinned.any():
+			return
+		for i in np.flatnonzero(self.pinned & ~mask & (self.matrices.upper > 0)).tolist():
+			self.works[i].unfix()
+		for i, value in zip(np.flatnonzero(mask).tolist(), pinned[mask].tolist()):
+			self.works[i].fix(value)
+		self.pinned = mask
+		# A persistent solver does not see the fixed variables, hence the model is loaded again
+		self.loaded = False
+
+	def check(self, results):
+		"""Raises a SolverError when the solve ended without a planning, a time limit with a planning is fine"""
+		termination = results.solver.termination_condition
+		self.stats['status'] = str(termination)
+		self.stats['gap'] = gap(results.problem.lower_bound, results.problem.upper_bound)
+		if termination in (TerminationCondition.infeasible, TerminationCondition.infeasibleOrUnbounded) or len(results.solution) == 0:
+			raise SolverError('No planning found, the solver stopped with: %s' % termination)
+
+class HighsBackend:
+	"""Description of the class
+
+	Solves PlanningMatrices with HiGHS through scipy.optimize.milp, which passes the matrices on within the process.
+	scipy does not take a MIP start nor a number of threads, hence both are ignored.
+	After every solve, stats holds the solve time, the size of the model, the solver status and the MIP gap.
+
+	Parameters:
+	time_limit (float): seconds after which the best planning found so far is returned
+	mip_gap (float): relative gap between the planning and the bound at which the solve stops
+	threads (int): ignored
+
+	"""
+
+	# The status of scipy.optimize.milp as the termination condition of Pyomo
+	STATUS = {0: 'optimal', 1: 'maxTimeLimit', 2: 'infeasible', 3: 'unbounded'}
+
+	def __init__(self, time_limit=None, mip_gap=None, threads=None):
+		self.options = {'disp': False}
+		self.logfile = None # HiGHS writes its log from C, which cannot be sent to a file, hence it is ignored
+		if time_limit is not None:
+			self.options['time_limit'] = time_limit
+		if mip_gap is not None:
+			self.options['mip_rel_gap'] = mip_gap
+
+	def solve(self, matrices, objective, start=None, floors=None, pinned=None):
+		"""The same as PyomoBackend.solve"""
+		self.stats = {'phases': {}, 'variables': matrices.size, 'constraints': matrices.A.shape[0]}
+		check(matrices)
+		start_time = time.perf_counter()
+		floors = floors or {}
+		lower, upper = np.zeros(matrices.size), np.array(matrices.upper, dtype=float)
+		if pinned is not None:
+			mask = ~np.isnan(pinned)
+			lower[mask] = upper[mask] = pinned[mask]
+		A = sp.vstack([matrices.A] + [sp.csr_matrix(matrices.objective(name)) for name in floors], format='csr')
+		result = milp(
+			-(matrices.objective(objective) if isinstance(objective, str) else objective),
+			integrality=np.ones(matrices.size),
+			bounds=Bounds(lower, upper),
+			constraints=LinearConstraint(A, np.concatenate([matrices.row_lower, list(floors.values())]), np.concatenate([matrices.row_upper, np.full(len(floors), np.inf)])),
+			options=self.options
+		)
+		self.stats['phases']['solve'] = time.perf_counter() - start_time
+		self.stats['status'] = self.STATUS.get(result.status, result.message)
+		self.stats['gap'] = getattr(result, 'mip_gap', None)
+		# On a time limit x is the best planning found so far, it is None when there is none
+		if result.x is None:
+			raise SolverError('No planning found, the solver stopped with: %s' % result.message)
+		return np.round(result.x)
@@ -0,0 +1 @@
+# Benchmarks of the solver. Run them with: python manage.py benchmark <suite>
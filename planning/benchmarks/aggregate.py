@@ -0,0 +1,40 @@
+import time
+from ..backends import solverBackend
+from ..matrix import PlanningMatrices, OBJECTIVES
+
+def run(instances, solver='cbc', options=None, stdout=None):
+	"""Description of the function
+
+	Measures the model size and the solve time per objective with a binary per worker and with the workers aggregated into classes.
+	The optimum must be the same.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+	solver (str): the solver backend, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+
+	Returns:
+	list: one dict per instance and objective with the size, the solve time in seconds and the value per mode
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		modes = {}
+		for mode, aggregate in (('workers', False), ('classes', True)):
+			matrices = PlanningMatrices(aggregate=aggregate, **instance)
+			backend = solverBackend(solver, options)
+			modes[mode] = matrices, backend
+		for objective in OBJECTIVES:
+			row = {'instance': name, 'objective': objective}
+			for mode, (matrices, backend) in modes.items():
+				start = time.perf_counter()
+				row[mode + '_value'] = matrices.results(backend.solve(matrices, objective))[1][objective]
+				row[mode + '_time'] = time.perf_counter() - start
+				row[mode + '_variables'] = matrices.size
+			row['classes'] = len(modes['classes'][0].members)
+			row['speedup'] = row['workers_time'] / row['classes_time']
+			rows.append(row)
+			if stdout:
+				stdout.write('%(instance)-14s %(classes)7d %(objective)-18s %(workers_variables)9d %(workers_time)9.3f %(workers_value)10.2f %(classes_variables)9d %(classes_time)9.3f %(classes_value)10.2f %(speedup)8.1fx' % row)
+	return rows
@@ -0,0 +1,85 @@
+import itertools
+import os
+import tempfile
+import time
+from pyomo.environ import ConcreteModel, Var, Binary, Objective, ConstraintList, Constraint, Set, maximize
+from ..matrix import PlanningMatrices
+
+def expressionModel(shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+	"""Builds the model with Python loops over a ConstraintList, as maxOutput used to do. Only used as a reference."""
+	model = ConcreteModel()
+	model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts),
+		within=Binary, initialize=0)
+
+	def obj_function(m):
+		total = 0
+		for skill in skills:
+			for shift in shifts:
+				total += sum(m.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
+		return total
+
+	model.obj = Objective(rule=obj_function, sense=maximize)
+	model.constraints = ConstraintList()
+	for shift in shifts:
+		for worker in workers:
+			model.constraints.add(1 >= sum(model.works[skill, worker, shift] for skill in skills))
+	for worker, timeslot in availability.items():
+		for key in timeslot:
+			if timeslot[key] == 0:
+				model.constraints.add(0 == sum(model.works[skill, worker, key] for skill in skills))
+	for shift in shifts:
+		for skill in skills:
+			model.constraints.add(max_workplaces[skill] >= sum(model.works[skill, worker, shift] for worker in workers))
+
+	def output(model, skill):
+		return sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
+	model.outputSet = Set(initialize=skills)
+	model.sr = Constraint(model.outputSet, rule=lambda model, skill: output(model, skill) <= max_values[skill])
+	model.outputMinSet = Set(initialize=skills)
+	model.smr = Constraint(model.outputMinSet, rule=lambda model, skill: output(model, skill) >= min_values[skill])
+	return model
+
+def matrixModel(**instance):
+	model = PlanningMatrices(**instance).model()
+	model.obj['output'].activate()
+	return model
+
+def run(generate, workers, skills, shifts, repeat=1, stdout=None):
+	"""Description of the function
+
+	Measures the model build time of both builders for every combination of the sizes.
+	Pyomo only compiles the expressions when the LP file is written, hence that is measured as well.
+
+	Parameters:
+	generate (function): returns the instance for (workers, skills, shifts)
+	workers (list), skills (list), shifts (list): the sizes to combine
+	repeat (int): the number of builds per size, the fastest one is reported
+
+	Returns:
+	list: one dict per size with the number of variables and the build and write time per builder in seconds
+
+	"""
+
+	rows = []
+	handle, filename = tempfile.mkstemp(suffix='.lp')
+	os.close(handle)
+	try:
+		for w, s, t in itertools.product(workers, skills, shifts):
+			instance = generate(w, s, t)
+			row = {'workers': w, 'skills': s, 'shifts': t, 'variables': w * s * t}
+			for name, builder in (('expression', expressionModel), ('matrix', matrixModel)):
+				timings = []
+				for i in range(repeat):
+					start = time.perf_counter()
+					model = builder(**instance)
+					built = time.perf_counter()
+					model.write(filename)
+					timings.append((built - start, time.perf_counter() - built))
+				row[name + '_build'], row[name + '_write'] = min(timings, key=sum)
+			row['speedup'] = (row['expression_build'] + row['expression_write']) / (row['matrix_build'] + row['matrix_write'])
+			rows.append(row)
+			if stdout:
+				stdout.write('%(workers)7d %(skills)6d %(shifts)6d %(variables)9d %(expression_build)9.3f %(expression_write)9.3f %(matrix_build)9.3f %(matrix_write)9.3f %(speedup)8.1fx' % row)
+	finally:
+		os.remove(filename)
+	return rows
@@ -0,0 +1,51 @@
+import time
+import numpy as np
+from ..heuristic import Heuristic
+from ..backends import SolverError
+from ..matrix import PlanningMatrices, OBJECTIVES
+from ..solver import PlanningSession
+
+def feasible(matrices, x):
+	"""Returns whether the assignment satisfies every row of the constraint matrix"""
+	rows = matrices.A @ x
+	return bool(np.all(rows >= matrices.row_lower - 1e-6) and np.all(rows <= matrices.row_upper + 1e-6) and np.all(x <= matrices.upper))
+
+def run(instances, stdout=None):
+	"""Description of the function
+
+	Measures the optimality gap and the solve time of the Heuristic methods against CBC on the same instances.
+	The gap is (optimum - heuristic value) / optimum in percent.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+
+	Returns:
+	list: one dict per instance and objective with the value, the time and the gap per method
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		matrices = PlanningMatrices(**instance)
+		session = PlanningSession(**instance)
+		for objective in OBJECTIVES:
+			start = time.perf_counter()
+			optimum = session.solve(objective)[1][objective]
+			row = {'instance': name, 'objective': objective, 'optimum': optimum, 'cbc': time.perf_counter() - start}
+			for method in ('greedy', 'lp'):
+				start = time.perf_counter()
+				try:
+					x = Heuristic(method).assignment(matrices, objective)
+				except SolverError:
+					x = None
+				row[method + '_time'] = time.perf_counter() - start
+				if x is None:
+					row.update({method + '_gap': float('nan'), method + '_feasible': False})
+					continue
+				value = float(matrices.objective(objective) @ x)
+				row[method + '_gap'] = 100 * (optimum - value) / optimum if optimum else 0
+				row[method + '_feasible'] = feasible(matrices, x)
+			rows.append(row)
+			if stdout:
+				stdout.write('%(instance)-14s %(objective)-18s %(optimum)10.2f %(cbc)9.3f %(greedy_time)9.4f %(greedy_gap)7.2f%% %(lp_time)9.4f %(lp_gap)7.2f%% %(greedy_feasible)9s %(lp_feasible)9s' % row)
+	return rows
@@ -0,0 +1,59 @@
+import numpy as np
+
+def generateInstance(workers=50, skills=10, shifts=8, density=0.5, availability=0.8, seed=0, classes=None, tightness=0.5, minimum=0.0):
+	"""Description of the function
+
+	Generates a seeded synthetic planning instance with the same structure as the inputs of Optimize.
+
+	Parameters:
+	workers (int): number of workers
+	skills (int): number of skills
+	shifts (int): number of shifts
+	density (float): share of the (worker, skill) pairs with a productivity
+	availability (float): share of the (worker, shift) pairs in which the worker is available
+	seed (int): seed of the random generator
+	classes (int): number of distinct workers, every worker is a copy of one of them (e.g. new hires at the same starting productivity), None for all distinct
+	tightness (float): share of the output that the workers could do on a skill, which is above the maximum output of the skill
+	minimum (float): the minimum output of every skill as a share of its maximum output
+
+	Returns:
+	dict: keyword arguments for the Optimize methods
+
+	"""
+
+	rng = np.random.RandomState(seed)
+	shift_names = ['shift %d' % i for i in range(shifts)]
+	worker_names = ['worker %d' % i for i in range(workers)]
+	skill_names = ['skill %d' % i for i in range(skills)]
+
+	distinct = classes or workers
+	productivity = np.where(rng.rand(distinct, skills) < density, rng.uniform(0.5, 5, (distinct, skills)).round(2), 0)
+	available = rng.rand(distinct, shifts) < availability
+	progression = np.where(productivity > 0, rng.uniform(0, 1, (distinct, skills)).round(2), 0)
+	preferred = rng.randint(skills, size=distinct)
+	preferences = np.where(productivity > 0, 1, 0)
+	preferences[np.arange(distinct), preferred] *= 2
+	if classes:
+		copies = np.sort(rng.randint(classes, size=workers))
+		productivity, available, progression, preferences = productivity[copies], available[copies], progression[copies], preferences[copies]
+	lengths = rng.choice([1.0, 4.0, 8.0], size=shifts)
+	workplaces = rng.randint(1, max(2, workers // 4), size=skills)
+
+	# The maximum output is a share of what the workers could do when all of them would work on the skill (half by default)
+	capacity = (productivity * available.sum(axis=1)[:, None] * lengths.mean()).sum(axis=0)
+	maximum = (capacity * (1 - tightness)).round(2)
+
+	return {
+		'shifts': shift_names,
+		'workers': worker_names,
+		'skills': skill_names,
+		'min_values': {skill: round(float(maximum[s]) * minimum, 2) for s, skill in enumerate(skill_names)},
+		'max_values': {skill: float(maximum[s]) for s, skill in enumerate(skill_names)},
+		'workerskills': {worker: {skill: productivity[w, s] for s, skill in enumerate(skill_names)} for w, worker in enumerate(worker_names)},
+		'availability': {worker: {shift: int(available[w, t]) for t, shift in enumerate(shift_names)} for w, worker in enumerate(worker_names)},
+		'shift_lengths': {shift: lengths[t] for t, shift in enumerate(shift_names)},
+		'max_workplaces': {skill: int(workplaces[s]) for s, skill in enumerate(skill_names)},
+		'gross_profit': {skill: round(rng.uniform(1, 3), 1) for skill in skill_names},
+		'preferences': {worker: {skill: int(preferences[w, s]) for s, skill in enumerate(skill_names)} for w, worker in enumerate(worker_names)},
+		'progression': {worker: {skill: progression[w, s] for s, skill in enumerate(skill_names)} for w, worker in enumerate(worker_names)},
+	}
@@ -0,0 +1,47 @@
+import time
+from ..backends import solverBackend, SolverError
+from ..lagrangian import Lagrangian
+from ..matrix import PlanningMatrices, OBJECTIVES
+
+def run(instances, solver='highs', options=None, iterations=100, processes=1, stdout=None):
+	"""Description of the function
+
+	Compares the Lagrangian decomposition by shift with the MIP of a solver backend: the time, the planning found (primal bound),
+	the dual bound and the gap of the decomposition against the time and the value of the MIP.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+	solver (str): the solver backend of the MIP, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+	iterations (int): the maximum number of subgradient iterations
+	processes (int): the number of processes that solve the subproblems
+
+	Returns:
+	list: one dict per instance and objective with the times in seconds, the bounds and the values
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		matrices = PlanningMatrices(**instance)
+		for objective in OBJECTIVES:
+			row = {'instance': name, 'objective': objective, 'variables': matrices.size}
+			decomposition = Lagrangian(iterations=iterations, processes=processes)
+			start = time.perf_counter()
+			try:
+				decomposition.assignment(matrices, objective)
+			except SolverError:
+				pass
+			row['lagrangian'] = time.perf_counter() - start
+			last = decomposition.history[-1]
+			row.update({'iterations': len(decomposition.history), 'primal': last['primal'], 'dual': last['dual'], 'gap': last['gap']})
+			start = time.perf_counter()
+			try:
+				row['value'] = float(matrices.objective(objective) @ solverBackend(solver, options).solve(matrices, objective))
+			except SolverError:
+				row['value'] = None
+			row['solve'] = time.perf_counter() - start
+			rows.append(row)
+			if stdout:
+				stdout.write('%-14s %-18s %9d %9.3f %10d %10.2f %10.2f %8.4f %9.3f %10s' % (name, objective, row['variables'], row['lagrangian'], row['iterations'], row['primal'], row['dual'], row['gap'], row['solve'], '-' if row['value'] is None else '%.2f' % row['value']))
+	return rows
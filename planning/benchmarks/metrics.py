@@ -0,0 +1,119 @@
+import time
+import numpy as np
+from pyomo.environ import ConcreteModel, Var, Binary
+from ..backends import solverBackend
+from ..matrix import PlanningMatrices
+
+def loopResults(model, shifts, workers, skills, workerskills, availability, shift_lengths, gross_profit, preferences, progression):
+	"""Computes the results with a pass over the Pyomo variables per measure, as maxOutput used to do. Only used as a reference."""
+	def timetable(works):
+		table = {shift: {skill: [] for skill in skills} for shift in shifts}
+		for worker in workers:
+			for skill in skills:
+				for shift in shifts:
+					if works[skill, worker, shift].value == 1:
+						table[shift][skill].append(worker)
+		return table
+
+	def participation(works):
+		total = 0
+		for worker in availability:
+			for shift in shifts:
+				if availability[worker][shift] == 1:
+					total += 1
+
+		deployed = 0
+		for worker in workers:
+			for skill in skills:
+				for shift in shifts:
+					if works[skill, worker, shift].value == 1:
+						deployed += 1
+		return (deployed/total)
+
+	def output(works):
+		var = 0
+		for skill in skills:
+			for shift in shifts:
+				var += sum(works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
+		return round(var,2)
+
+	def preference(works):
+		var = 0
+		for worker in workers:
+			for shift in shifts:
+				var += sum(works[skill, worker, shift].value*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
+		return round(var,2)
+
+	def grossprofit(works):
+		var = 0
+		for skill in skills:
+			for shift in shifts:
+				var += sum(works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
+		return round(var,2)
+
+	def skillprogression(works):
+		var = 0
+		for worker in workers:
+			for shift in shifts:
+				var += sum(works[skill, worker, shift].value*progression[worker][skill] for skill in skills) * shift_lengths[shift]
+		return round(var,2)
+
+	warnings = []
+	for skill in skills:
+		total = 0
+		for shift in shifts:
+			for worker in workers:
+				total += model.works[skill, worker, shift].value * workerskills[worker][skill] * shift_lengths[shift]
+		warnings.append(total)
+
+	return [timetable(model.works), {'output': output(model.works), 'preference': preference(model.works), 'gross_profit': grossprofit(model.works), 'skill_progression': skillprogression(model.works)}, participation(model.works)]
+
+def run(instances, repeat=3, stdout=None):
+	"""Description of the function
+
+	Measures the time to obtain the timetable, the measures and the participation of a solution: with a pass over the Pyomo variables
+	per measure (loopResults) and with PlanningMatrices.results, which reads the variables once into a (skills, workers, shifts) array.
+	Both start from a model of which the variables hold the optimum of the output. The best of repeat runs is taken.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+	repeat (int): number of runs per path
+
+	Returns:
+	list: one dict per instance with the times in seconds and whether both paths give the same results
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		matrices = PlanningMatrices(**instance)
+		x = solverBackend('highs').solve(matrices, 'output')
+		works = matrices.tensor(x)
+		skills, workers, shifts = instance['skills'], instance['workers'], instance['shifts']
+
+		# The variables of the solved model, indexed by (skill, worker, shift) as maxOutput did
+		model = ConcreteModel()
+		model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts), within=Binary)
+		for s, skill in enumerate(skills):
+			for w, worker in enumerate(workers):
+				for t, shift in enumerate(shifts):
+					model.works[skill, worker, shift].value = works[s, w, t]
+		variables = [model.works[key] for key in matrices.keys()]
+		availability = {worker: {shift: instance['availability'].get(worker, {}).get(shift, 1) for shift in shifts} for worker in workers}
+
+		times = {'loops': [], 'tensor': []}
+		for _ in range(repeat):
+			start = time.perf_counter()
+			loops = loopResults(model, shifts, workers, skills, instance['workerskills'], availability, instance['shift_lengths'], instance['gross_profit'], instance['preferences'], instance['progression'])
+			times['loops'].append(time.perf_counter() - start)
+			start = time.perf_counter()
+			tensor = matrices.results(np.array([var.value for var in variables]))
+			times['tensor'].append(time.perf_counter() - start)
+
+		same = loops[0] == tensor[0] and all(abs(loops[1][key] - tensor[1][key]) < 0.01 for key in loops[1]) and abs(loops[2] - tensor[2]) < 1e-9
+		row = {'instance': name, 'variables': len(skills) * len(workers) * len(shifts), 'loops': min(times['loops']), 'tensor': min(times['tensor']), 'same': same}
+		row['speedup'] = row['loops'] / row['tensor']
+		rows.append(row)
+		if stdout:
+			stdout.write('%(instance)-14s %(variables)9d %(loops)9.4f %(tensor)9.4f %(speedup)8.1fx %(same)7s' % row)
+	return rows
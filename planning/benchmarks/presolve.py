@@ -0,0 +1,36 @@
+import time
+from ..backends import solverBackend
+from ..matrix import PlanningMatrices, OBJECTIVES
+
+def run(instances, solver='cbc', options=None, stdout=None):
+	"""Description of the function
+
+	Measures the model size, the build time and the solve time per objective without and with the presolve of PlanningMatrices.
+	The build time includes building the Pyomo model, the solve time includes writing the model file.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+	solver (str): the solver backend, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+
+	Returns:
+	list: one dict per instance, presolve and objective with the size, the times in seconds and the objective value
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		for presolve in (False, True):
+			start = time.perf_counter()
+			matrices = PlanningMatrices(presolve=presolve, **instance)
+			matrices.model()
+			built = time.perf_counter() - start
+			backend = solverBackend(solver, options)
+			for objective in OBJECTIVES:
+				start = time.perf_counter()
+				value = matrices.results(backend.solve(matrices, objective))[1][objective]
+				row = {'instance': name, 'presolve': presolve, 'variables': matrices.size, 'rows': matrices.A.shape[0], 'nonzeros': matrices.A.nnz, 'build': built, 'objective': objective, 'solve': time.perf_counter() - start, 'value': value}
+				rows.append(row)
+				if stdout:
+					stdout.write('%(instance)-14s %(presolve)8s %(variables)9d %(rows)6d %(nonzeros)9d %(build)8.3f %(objective)-18s %(solve)9.3f %(value)10.2f' % row)
+	return rows
@@ -0,0 +1,72 @@
+import time
+import warnings
+import numpy as np
+from ..solver import ProgressFit, progressionFit
+
+def generateObservations(workers=50, skills=10, observations=6, seed=0):
+	"""Returns random productivity observations: 1 to observations per worker and skill, on distinct days, of which the productivity grows with ln(days)"""
+	rng = np.random.default_rng(seed)
+	counts = rng.integers(1, observations + 1, size=workers * skills)
+	group = np.repeat(np.arange(workers * skills), counts)
+	days = np.concatenate([np.sort(rng.choice(365, size=count, replace=False)) for count in counts])
+	dates = np.datetime64('2020-01-01') + days
+	elapsed = days - np.repeat(days[np.cumsum(counts) - counts], counts)
+	productivity = rng.uniform(0.5, 1.5, size=len(group)) + rng.uniform(0, 0.3, size=len(group)) * np.log1p(elapsed)
+	return group, dates, productivity
+
+def loopProgression(group, dates, productivity, groups, asof=None):
+	"""Computes the progression with a curve_fit per worker and skill, as planning_inputs used to do. Only used as a reference."""
+	progression = np.zeros(groups)
+	for g in range(groups):
+		mask = group == g
+		if asof is not None:
+			mask &= dates <= np.datetime64(asof)
+		observed, values = dates[mask], productivity[mask]
+		if len(observed) == 0:
+			continue
+		if len(observed) == 1:
+			progression[g] = 0.5
+			continue
+		x = [0] + [np.log(float((date - observed[0]).astype(int))) for date in observed[1:]]
+		slope = ProgressFit().curveFit(x, values)[0]
+		progression[g] = (slope / max(x)) if max(x) != 0 else 0.5
+	return progression
+
+def run(workers, skills, observations=6, repeat=3, seed=0, stdout=None):
+	"""Description of the function
+
+	Measures the time to compute the progression of every worker and skill with a curve_fit per worker and skill (loopProgression)
+	and with progressionFit, which fits all of them at once. Both use the observations up to the middle of the year. The best of repeat runs is taken.
+
+	Parameters:
+	workers (list): numbers of workers
+	skills (list): numbers of skills
+	observations (int): maximum number of observations per worker and skill
+	repeat (int): number of runs per path
+
+	Returns:
+	list: one dict per size with the times in seconds and the largest difference between both paths
+
+	"""
+
+	rows = []
+	asof = np.datetime64('2020-07-01')
+	for W in workers:
+		for S in skills:
+			group, dates, productivity = generateObservations(W, S, observations, seed)
+			times = {'loops': [], 'batched': []}
+			for _ in range(repeat):
+				start = time.perf_counter()
+				with warnings.catch_warnings():
+					warnings.simplefilter('ignore') # curve_fit warns when it cannot estimate the covariance of two observations
+					loops = loopProgression(group, dates, productivity, W * S, asof)
+				times['loops'].append(time.perf_counter() - start)
+				start = time.perf_counter()
+				batched = progressionFit(group, dates, productivity, W * S, asof)
+				times['batched'].append(time.perf_counter() - start)
+			row = {'instance': '%dx%d' % (W, S), 'observations': len(group), 'loops': min(times['loops']), 'batched': min(times['batched']), 'difference': float(np.abs(loops - batched).max())}
+			row['speedup'] = row['loops'] / row['batched']
+			rows.append(row)
+			if stdout:
+				stdout.write('%(instance)-14s %(observations)12d %(loops)9.4f %(batched)9.4f %(speedup)8.1fx %(difference)11.2e' % row)
+	return rows
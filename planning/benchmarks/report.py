@@ -0,0 +1,120 @@
+import csv
+import json
+import platform
+import datetime
+
+# The times and the optima of a row that are compared between two runs: the fields of these names, or of which the name ends with _name,
+# e.g. matrix_build and greedy_time. A row of which the solver hit the time limit has no optimum to compare.
+TIMES = ['build', 'write', 'solve', 'time', 'cbc', 'lagrangian', 'loops', 'tensor', 'batched', 'cold', 'chained', 'resolve']
+VALUES = ['value', 'optimum']
+# The fields that identify a row, the other text and boolean fields are outcomes (e.g. same_optimum, greedy_feasible) that are compared
+KEYS = ['instance', 'objective', 'backend', 'presolve', 'workers', 'skills', 'shifts']
+TIME_LIMIT = 'maxTimeLimit'
+
+def write(rows, filename, suite, parameters=None):
+	"""Description of the function
+
+	Writes the rows of a suite to a report: CSV (one line per row) when the filename ends with .csv, JSON otherwise.
+	The JSON report also holds the suite, its parameters and the machine, such that two runs can be compared.
+
+	Parameters:
+	rows (list): the dicts returned by the run function of the suite
+	filename (str): path of the report
+	suite (str): name of the suite
+	parameters (dict): the options of the run, e.g. the sizes and the seed
+
+	"""
+
+	if filename.endswith('.csv'):
+		fields = list(dict.fromkeys(key for row in rows for key in row))
+		with open(filename, 'w', newline='') as file:
+			writer = csv.DictWriter(file, fields)
+			writer.writeheader()
+			writer.writerows(rows)
+	else:
+		document = {'suite': suite, 'parameters': parameters or {}, 'machine': platform.node(), 'python': platform.python_version(), 'created': datetime.datetime.now().isoformat(timespec='seconds'), 'rows': rows}
+		with open(filename, 'w') as file:
+			json.dump(document, file, indent=1, default=float)
+
+def read(filename):
+	"""Returns the rows of a report of write, the numbers of a CSV report are converted back"""
+	if not filename.endswith('.csv'):
+		with open(filename) as file:
+			return json.load(file)['rows']
+
+	def value(text):
+		if text == '':
+			return None
+		for convert in (int, float):
+			try:
+				return convert(text)
+			except ValueError:
+				pass
+		return {'True': True, 'False': False}.get(text, text)
+	with open(filename, newline='') as file:
+		return [{key: value(text) for key, text in row.items()} for row in csv.DictReader(file)]
+
+def key(row):
+	"""Returns the fields that identify a row, e.g. (instance, backend, objective), see KEYS. An empty cell of a CSV report is no field"""
+	return tuple((field, row[field]) for field in KEYS if row.get(field) is not None)
+
+def fields(row, names):
+	"""Returns the number fields of the row of one of the names, or of which the name ends with _ and one of the names"""
+	return [field for field, value in row.items() if (field in names or field.rsplit('_', 1)[-1] in names) and (value is None or isinstance(value, (int, float)) and not isinstance(value, bool))]
+
+def compare(baseline, candidate, threshold=0.2, noise=0.05, stdout=None, tolerance=1e-4):
+	"""Description of the function
+
+	Compares the times and the objective values of the rows of two reports of the same suite, matched by their key.
+	A time is a regression when it is more than threshold slower and more than noise seconds slower, such that small timings do not flag.
+	An objective value changed when it differs more than the relative tolerance, unless the solver of either row hit the time limit.
+
+	Parameters:
+	baseline (str): path of the report of the previous run
+	candidate (str): path of the report of the new run
+	threshold (float): relative slowdown that is a regression
+	noise (float): absolute slowdown in seconds below which a time is not a regression
+	tolerance (float): relative difference of an objective value below which it is the same, e.g. of the MIP gap of the solver
+
+	Returns:
+	list: one dict per regression or changed objective value
+
+	"""
+
+	before = {key(row): row for row in read(baseline)}
+	problems = []
+	for row in read(candidate):
+		old = before.get(key(row))
+		if old is None:
+			continue
+		name = ' '.join(str(value) for field, value in key(row))
+		for field in fields(row, TIMES):
+			if field in old and row[field] is not None and old[field] is not None:
+				regression = row[field] - old[field] > max(noise, threshold * old[field])
+				if regression:
+					problems.append({'row': name, 'field': field, 'baseline': old[field], 'candidate': row[field]})
+				if stdout:
+					ratio = '%7.2fx' % (row[field] / old[field]) if old[field] > 0 else '%8s' % '-'
+					stdout.write('%-50s %-16s %9.3f %9.3f %s %s' % (name, field, old[field], row[field], ratio, 'REGRESSION' if regression else ''))
+		# A flag of the outcome that changed, e.g. the loops and the tensor version of a metric are no longer the same
+		for field, value in row.items():
+			if field not in KEYS and isinstance(value, bool) and isinstance(old.get(field), bool) and value != old[field]:
+				problems.append({'row': name, 'field': field, 'baseline': old[field], 'candidate': value})
+				if stdout:
+					stdout.write('%-50s %-16s %9s %9s          CHANGED' % (name, field, old[field], value))
+		# A different optimum means the model changed, unless a time limit was hit
+		if TIME_LIMIT in (row.get('status'), old.get('status')):
+			continue
+		for field in fields(row, VALUES):
+			if field not in old:
+				continue
+			new, previous = row[field], old[field]
+			if new is None or previous is None:
+				changed = new is not previous
+			else:
+				changed = abs(new - previous) > tolerance * max(abs(new), abs(previous), 1)
+			if changed:
+				problems.append({'row': name, 'field': field, 'baseline': previous, 'candidate': new})
+				if stdout:
+					stdout.write('%-50s %-16s %9s %9s          CHANGED' % (name, field, previous, new))
+	return problems
@@ -0,0 +1,52 @@
+import time
+from pyomo.environ import SolverFactory
+from ..backends import BACKENDS, SolverError
+from ..matrix import OBJECTIVES
+from ..solver import PlanningSession
+
+def availableBackends():
+	"""Returns the backends of BACKENDS that can be used here, cbc and glpk need their binary"""
+	return [backend for backend in BACKENDS if backend == 'highs' or SolverFactory(backend).available(exception_flag=False)]
+
+def run(instances, backends=None, options=None, stdout=None):
+	"""Description of the function
+
+	Solves every instance under every objective with every backend, in one PlanningSession per instance and backend as the planning does.
+	The build time is the time of the matrices and the Pyomo model, the solve time includes writing the model file and loading the solution.
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+	backends (list): the solver backends, see backends.py, all available backends by default
+	options (dict): time_limit, mip_gap and threads of the solver
+
+	Returns:
+	list: one dict per instance, backend and objective with the size, the times in seconds, the objective value, the status and the MIP gap
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		for backend in backends or availableBackends():
+			start = time.perf_counter()
+			session = PlanningSession(solver=backend, options=options, **instance)
+			built = time.perf_counter() - start
+			for objective in OBJECTIVES:
+				row = {'instance': name, 'backend': backend, 'objective': objective, 'variables': session.matrices.size, 'rows': session.matrices.A.shape[0]}
+				start = time.perf_counter()
+				try:
+					row['value'] = session.solve(objective)[1][objective]
+				except SolverError:
+					row['value'] = None
+				elapsed = time.perf_counter() - start
+				stats = session.backend.stats
+				phases = stats.get('phases', {})
+				# The first solve builds the Pyomo model, which is part of the build
+				row['build'] = built + phases.get('model', 0)
+				row['solve'] = elapsed - phases.get('model', 0)
+				row['status'] = str(stats.get('status', 'infeasible'))
+				row['gap'] = stats.get('gap')
+				built = 0
+				rows.append(row)
+				if stdout:
+					stdout.write('%-14s %-7s %-18s %9d %6d %8.3f %9.3f %10s %9s %s' % (name, backend, objective, row['variables'], row['rows'], row['build'], row['solve'], '-' if row['value'] is None else '%.2f' % row['value'], '-' if row['gap'] is None else '%.4f' % row['gap'], row['status']))
+	return rows
@@ -0,0 +1,45 @@
+import time
+from ..matrix import OBJECTIVES
+from ..solver import PlanningSession
+
+def timedSolve(session, objective):
+	start = time.perf_counter()
+	result = session.solve(objective)
+	return result, time.perf_counter() - start
+
+def run(instances, stdout=None):
+	"""Description of the function
+
+	Measures the time-to-optimal of every objective with and without a MIP start on the same instances:
+	cold (a new model per objective, no start), chained (one session, every solve starts from the solution of the previous objective)
+	and re-solve (a new session that starts from the timetable of the cold solve, as for a second planning of the same date).
+
+	Parameters:
+	instances (list): (name, instance) tuples, of which the instance holds the keyword arguments of Optimize.maxOutput
+
+	Returns:
+	list: one dict per instance and objective with the solve time per mode in seconds
+
+	"""
+
+	rows = []
+	for name, instance in instances:
+		cold = {objective: timedSolve(PlanningSession(**instance), objective) for objective in OBJECTIVES}
+		session = PlanningSession(**instance)
+		chained = {objective: timedSolve(session, objective) for objective in OBJECTIVES}
+		resolved = {objective: timedSolve(PlanningSession(start=cold[objective][0][0], **instance), objective) for objective in OBJECTIVES}
+		for objective in OBJECTIVES:
+			row = {
+				'instance': name,
+				'objective': objective,
+				'value': cold[objective][0][1][objective],
+				'cold': cold[objective][1],
+				'chained': chained[objective][1],
+				'resolve': resolved[objective][1],
+				# The optimum must not depend on the start
+				'same_optimum': cold[objective][0][1][objective] == chained[objective][0][1][objective] == resolved[objective][0][1][objective],
+			}
+			rows.append(row)
+			if stdout:
+				stdout.write('%(instance)-14s %(objective)-18s %(value)10.2f %(cold)9.3f %(chained)9.3f %(resolve)9.3f %(same_optimum)7s' % row)
+	return rows
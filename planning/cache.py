@@ -0,0 +1,114 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Availability
+
+# Increase when the solver returns something else for the same inputs, so the cached results are not used anymore
+CACHE_VERSION = 1
+
+def canonical(value):
+	"""Converts NumPy numbers and tuples in the solver inputs to plain JSON values"""
+	if isinstance(value, (list, tuple)):
+		return [canonical(item) for item in value]
+	if isinstance(value, dict):
+		return {str(key): canonical(item) for key, item in value.items()}
+	if isinstance(value, (str, bool)) or value is None:
+		return value
+	return float(value)
+
+def instance_hash(instance, objective, solver=None):
+	"""Description of the function
+
+	Returns the SHA-256 hash of the canonical JSON of the solver inputs, the objective and the solver settings.
+	The keys of the dictionaries are sorted. The lists keep their order, as the order of the shifts and skills is the order of the timetable.
+
+	Parameters:
+	instance (dict): the keyword arguments of Optimize.maxOutput
+	objective (str): the measure to maximize
+	solver (dict): the solver backend and its options, as a time limit or a gap can change the result
+
+	Returns:
+	str: hexadecimal hash
+
+	"""
+
+	document = json.dumps({'instance': canonical(instance), 'objective': objective, 'solver': canonical(solver), 'version': CACHE_VERSION}, sort_keys=True, separators=(',', ':'))
+	return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+class ResultCache:
+	"""Description of the class
+
+	Cache of solver results in the 'planning' cache of settings.CACHES, which is shared by every process.
+	Every hit renews the timeout of that entry, so the results that are not used anymore expire after the TIMEOUT of the cache.
+	The number of entries is bounded by the MAX_ENTRIES of the cache, beyond which the database cache culls a part of its entries.
+	There is no shared index, so concurrent processes do not overwrite each other.
+	The hits and misses are counted. As the database cache increments by reading and writing, concurrent counts can be lost.
+
+	"""
+
+	HITS = 'planning_results_hits'
+	MISSES = 'planning_results_misses'
+	VERSION = 'planning_results_version' # Increased by clear, such that the results cached before are not used anymore
+
+	def __init__(self, alias='planning', solver=None):
+		self.cache = caches[alias]
+		self.solver = solver
+		self.version = self.cache.get(self.VERSION, 1)
+
+	def count(self, key):
+		self.cache.add(key, 0, None)
+		try:
+			self.cache.incr(key)
+		except ValueError: # Evicted between add and incr
+			self.cache.set(key, 1, None)
+
+	def key(self, instance, objective):
+		return 'planning_result_%d_%s' % (self.version, instance_hash(instance, objective, self.solver))
+
+	def get(self, instance, objective):
+		"""Returns the cached result of the objective for the inputs, None when it is not cached"""
+		key = self.key(instance, objective)
+		result = self.cache.get(key)
+		if result is None:
+			self.count(self.MISSES)
+			return None
+		self.count(self.HITS)
+		self.cache.touch(key)
+		return result
+
+	def set(self, instance, objective, result):
+		self.cache.set(self.key(instance, objective), result)
+
+	def stats(self):
+		return {
+			'hits': self.cache.get(self.HITS, 0),
+			'misses': self.cache.get(self.MISSES, 0),
+			'timeout': self.cache.default_timeout,
+			'max_entries': self.cache._max_entries,
+		}
+
+	def clear(self):
+		"""Resets the counters and stops using the cached results, which expire or are culled later"""
+		self.version += 1
+		self.cache.set(self.VERSION, self.version, None)
+		self.cache.delete_many([self.HITS, self.MISSES])
+
+# The dates with availabilities, i.e. the dates of the planning forms, are kept in the cache until an availability is saved or deleted
+DATES_KEY = 'planning_dates'
+
+def planning_dates(alias='planning'):
+	"""Returns the dates with availabilities as YYYY-MM-DD, the latest first"""
+	dates = caches[alias].get(DATES_KEY)
+	if dates is None:
+		dates = [str(date) for date in Availability.objects.order_by('-date').values_list('date', flat=True).distinct()]
+		caches[alias].set(DATES_KEY, dates, None)
+	return dates
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def clear_planning_dates(sender=None, **kwargs):
+	"""Removes the dates from the cache, also after bulk changes of availabilities that skip the signals"""
+	caches['planning'].delete(DATES_KEY)
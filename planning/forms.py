@@ -1,5 +1,8 @@
 from django import forms
+from django.db.models import Count,Q
 from .models import Workers,WorkerSkills,Skills,Availability,Tasks
+from .cache import planning_dates
+from .importer import COLUMNS
 
 class PlanningForm(forms.Form):
 	date = forms.ChoiceField(label='Date', choices=[])
@@ -7,8 +10,76 @@ class PlanningForm(forms.Form):
 
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
-		self.fields['date'].choices = [(avb['date'], avb['date']) for avb in Availability.objects.values('date').distinct().order_by('-date')]
-		skills = Skills.objects.all()
-		for skill in skills:
+		self.fields['date'].choices = [(date, date) for date in planning_dates()]
+		# The number of open tasks per skill in the same query as the skills
+		self.skills = Skills.objects.annotate(open_tasks=Count('tasks', filter=Q(tasks__status=0)))
+		for skill in self.skills:
 			self.fields["min_" + skill.name] = forms.FloatField(label="Minimum output for " + skill.name, help_text="Zero is no minimum.", initial=0)
-			self.fields["max_" + skill.name] = forms.FloatField(label="Maximum output for " + skill.name, help_text="Default is set to open outstanding tasks for this skill.", initial=Tasks.objects.filter(skills=skill.id,status=0).count())
+			self.fields["max_" + skill.name] = forms.FloatField(label="Maximum output for " + skill.name, help_text="Default is set to open outstanding tasks for this skill.", initial=skill.open_tasks)
+
+class HorizonForm(PlanningForm):
+	end_date = forms.ChoiceField(label='End date', choices=[])
+
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.fields['date'].label = 'Start date'
+		self.fields['end_date'].choices = self.fields['date'].choices
+		self.order_fields(['date', 'end_date'])
+		for skill in self.skills:
+			self.fields["weekly_min_" + skill.name] = forms.FloatField(label="Weekly minimum output for " + skill.name, help_text="Empty is no weekly minimum.", required=False)
+			self.fields["weekly_max_" + skill.name] = forms.FloatField(label="Weekly maximum output for " + skill.name, help_text="Empty is no weekly maximum. Weeks are only planned jointly with a weekly minimum or maximum.", required=False)
+
+	def clean(self):
+		cleaned_data = super().clean()
+		if cleaned_data.get('date') and cleaned_data.get('end_date') and cleaned_data['end_date'] < cleaned_data['date']:
+			raise forms.ValidationError('The end date must not be before the start date.')
+		return cleaned_data
+
+
+class RepairForm(forms.Form):
+	worker = forms.ChoiceField(label='Worker', choices=[], required=False)
+	unavailable = forms.MultipleChoiceField(label='Not available in', choices=[], required=False, widget=forms.CheckboxSelectMultiple)
+	skill = forms.ChoiceField(label='Skill', choices=[], required=False)
+	productivity = forms.FloatField(label='New output per hour of the worker for the skill', min_value=0, required=False)
+	shift = forms.ChoiceField(label='Shift', choices=[], required=False)
+	shift_length = forms.FloatField(label='New length of the shift', min_value=0, required=False)
+	penalty = forms.FloatField(label='Penalty per changed assignment', help_text='Zero is no penalty. A higher penalty keeps more of the published planning.', min_value=0, initial=0)
+
+
+	def __init__(self, *args, workers=(), shifts=(), skills=(), **kwargs):
+		super().__init__(*args, **kwargs)
+		self.fields['worker'].choices = [('', '-')] + [(worker, worker) for worker in workers]
+		self.fields['unavailable'].choices = [(shift, shift) for shift in shifts]
+		self.fields['skill'].choices = [('', '-')] + [(skill, skill) for skill in skills]
+		self.fields['shift'].choices = [('', '-')] + [(shift, shift) for shift in shifts]
+
+	def clean(self):
+		cleaned_data = super().clean()
+		if (cleaned_data.get('unavailable') or cleaned_data.get('productivity') is not None) and not cleaned_data.get('worker'):
+			raise forms.ValidationError('Choose the worker of the change.')
+		if cleaned_data.get('productivity') is not None and not cleaned_data.get('skill'):
+			raise forms.ValidationError('Choose the skill of the new output.')
+		if cleaned_data.get('shift_length') is not None and not cleaned_data.get('shift'):
+			raise forms.ValidationError('Choose the shift of the new length.')
+		if not self.delta():
+			raise forms.ValidationError('Enter a change to re-plan.')
+		return cleaned_data
+
+	def delta(self):
+		"""Returns the change in the format of applyDelta in solver.py"""
+		data = self.cleaned_data
+		delta = {}
+		if data.get('worker') and data.get('unavailable'):
+			delta['unavailable'] = [[data['worker'], shift] for shift in data['unavailable']]
+		if data.get('worker') and data.get('skill') and data.get('productivity') is not None:
+			delta['productivity'] = [[data['worker'], data['skill'], data['productivity']]]
+		if data.get('shift') and data.get('shift_length') is not None:
+			delta['shift_lengths'] = [[data['shift'], data['shift_length']]]
+		return delta
+
+
+class ImportForm(forms.Form):
+	kind = forms.ChoiceField(label='Import', choices=[(kind, '%s (columns: %s)' % (kind.capitalize(), ', '.join(columns))) for kind, columns in COLUMNS.items()])
+	file = forms.FileField(label='File', help_text='CSV, or Excel (.xlsx, .xls). The first row holds the names of the columns, dates are YYYY-MM-DD and the shifts of an availability are separated by ;.')
+	sheet = forms.CharField(label='Sheet', help_text='Sheet of an Excel file, empty is the first sheet.', required=False)
@@ -0,0 +1,127 @@
+import numpy as np
+from scipy.optimize import milp, LinearConstraint, Bounds
+from .matrix import PlanningMatrices
+from .backends import SolverError
+
+class Heuristic:
+	"""Description of the class
+
+	Quick alternative to Optimize that does not prove optimality. The methods have the same parameters and results as the ones of Optimize.
+	The (skill, worker, shift) assignments are taken one by one in the order of a priority, as long as the worker is free in the shift,
+	the skill has a free workplace in the shift and the maximum output of the skill is not exceeded. The minimum outputs are filled first.
+
+	Parameters:
+	method (str): 'greedy' takes the assignments in the order of their objective value, 'lp' solves the LP relaxation with HiGHS,
+	rounds it by taking the assignments in the order of their LP value and repairs it with the greedy assignments of the remaining workers
+
+	"""
+
+	def __init__(self, method='greedy'):
+		if method not in ('greedy', 'lp'):
+			raise ValueError("Unknown method '%s', choose 'greedy' or 'lp'" % method)
+		self.method = method
+
+	def maxOutput(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('output', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxGrossProfit(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('gross_profit', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxPreferences(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('preference', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxProgression(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('skill_progression', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def solve(self, objective, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		"""Description of the function
+
+		Parameters:
+		objective (str): the measure to maximize, one of 'output', 'preference', 'gross_profit' or 'skill_progression'
+		The other parameters are the same as for Optimize.maxOutput.
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		matrices = PlanningMatrices(shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+		return matrices.results(self.assignment(matrices, objective))
+
+	def assignment(self, matrices, objective):
+		"""Returns the 0/1 value of every decision variable of the PlanningMatrices, a SolverError is raised when the assignment does not meet the minimum outputs"""
+		coefficients = matrices.objective(objective)
+		if self.method == 'lp':
+			relaxation = self.relaxation(matrices, coefficients)
+			if relaxation is not None:
+				# Rounding: the largest LP values first, ties are broken by the objective value
+				x = greedy(matrices, np.lexsort((-coefficients, -relaxation)), coefficients > 0)
+				if meetsMinimum(matrices, x):
+					return x
+		x = greedy(matrices, np.argsort(-coefficients, kind='stable'), coefficients > 0)
+		if not meetsMinimum(matrices, x):
+			raise SolverError('No planning found, the greedy assignment did not meet the minimum outputs')
+		return x
+
+	def relaxation(self, matrices, coefficients):
+		"""Returns the solution of the LP relaxation, None when it is infeasible"""
+		result = milp(-coefficients, constraints=LinearConstraint(matrices.A, matrices.row_lower, matrices.row_upper), bounds=Bounds(0, matrices.upper))
+		return result.x if result.success else None
+
+def greedy(matrices, order, wanted):
+	"""Description of the function
+
+	Parameters:
+	matrices (PlanningMatrices): the instance
+	order (array): the columns in the order in which they are assigned
+	wanted (array): the columns that are worth assigning, i.e. with a positive objective value
+
+	Returns:
+	array: the 0/1 value of every decision variable
+
+	"""
+
+	S, W, T = len(matrices.skills), len(matrices.workers), len(matrices.shifts)
+	output = matrices.output()
+	skill_idx, worker_idx, shift_idx = matrices.skill_idx.tolist(), matrices.worker_idx.tolist(), matrices.shift_idx.tolist()
+	output_list, max_output, workplaces = output.tolist(), matrices.max_output.tolist(), matrices.workplaces.tolist()
+	usable = matrices.upper > 0
+
+	# State of the assignment: the task per worker per shift, the used workplaces per skill per shift and the output per skill
+	busy = [False] * (W * T)
+	used = [0] * (S * T)
+	produced = [0.0] * S
+	x = np.zeros(matrices.size)
+
+	def take(i):
+		s, task, place = skill_idx[i], worker_idx[i] * T + shift_idx[i], skill_idx[i] * T + shift_idx[i]
+		if busy[task] or used[place] >= workplaces[s] or produced[s] + output_list[i] > max_output[s] + 1e-9:
+			return False
+		busy[task] = True
+		used[place] += 1
+		produced[s] += output_list[i]
+		x[i] = 1
+		return True
+
+	# Minimum outputs first, the skill with the least room (capacity minus minimum) first, its most productive assignments first
+	minimum = matrices.min_output.tolist()
+	capacity = np.bincount(matrices.skill_idx, weights=output * usable, minlength=S)
+	for s in np.argsort(capacity - matrices.min_output, kind='stable').tolist():
+		if minimum[s] <= 0:
+			continue
+		columns = np.flatnonzero((matrices.skill_idx == s) & usable & (output > 0))
+		for i in columns[np.argsort(-output[columns], kind='stable')].tolist():
+			if produced[s] >= minimum[s] - 1e-9:
+				break
+			take(i)
+
+	# Then the rest in the order of the priority
+	for i in order[(usable & wanted)[order]].tolist():
+		if not x[i]:
+			take(i)
+	return x
+
+def meetsMinimum(matrices, x):
+	"""Returns whether the assignment x meets the minimum output of every skill"""
+	produced = np.bincount(matrices.skill_idx, weights=matrices.output() * x, minlength=len(matrices.skills))
+	return bool(np.all(produced >= matrices.min_output - 1e-6))
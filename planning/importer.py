@@ -0,0 +1,241 @@
+import datetime
+import pandas as pd
+from django.db import transaction
+from .models import Workers,WorkerSkills,Skills,Availability,Shifts
+from .cache import clear_planning_dates
+from . import snapshot
+
+# The columns per kind of import, of which the first ones up to REQUIRED are required. The shifts of an availability are separated by ;
+COLUMNS = {
+	'workers': ['name', 'preference'],
+	'skills': ['name', 'workplaces', 'gross_profit'],
+	'availability': ['worker', 'date', 'shifts'],
+	'productivity': ['worker', 'skill', 'date', 'productivity'],
+}
+REQUIRED = {'workers': 1, 'skills': 1, 'availability': 3, 'productivity': 4}
+CHUNK_SIZE = 5000
+MAX_ERRORS = 100 # The number of invalid rows of which the error is kept
+
+def chunks(source, chunk_size=CHUNK_SIZE, sheet=None):
+	"""Description of the function
+
+	Reads a CSV file in chunks of rows, or an Excel file (.xlsx, .xls) of which the sheet is read at once and returned in chunks.
+	Every value is read as text, empty cells are empty strings. A date cell of an Excel file is read as YYYY-MM-DD, or with its time when it has one.
+
+	Parameters:
+	source (str or file): path or uploaded file
+	chunk_size (int): the number of rows per chunk
+	sheet (str): the name of the sheet of an Excel file, the first sheet by default
+
+	Returns:
+	generator: DataFrame per chunk, of which the index is the row number in the file
+
+	"""
+
+	name = str(getattr(source, 'name', source)).lower()
+	if name.endswith(('.xlsx', '.xls')):
+		try:
+			frame = pd.read_excel(source, sheet_name=sheet or 0, dtype=object)
+		except ImportError as error:
+			raise ValueError('Reading Excel files needs openpyxl (xlsx) or xlrd (xls): %s' % error)
+		frame = frame.apply(lambda column: column.map(cell))
+		frames = (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+	else:
+		frames = pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True)
+	for frame in frames:
+		frame.columns = [str(column).strip().lower() for column in frame.columns]
+		frame.index = frame.index + 2 # The row number in the file, after the header
+		yield frame
+
+def cell(value):
+	"""Returns the text of a cell of an Excel file, a date without a time as YYYY-MM-DD"""
+	if pd.isna(value):
+		return ''
+	if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+		return value.strftime('%Y-%m-%d')
+	return str(value)
+
+def write_availability(rows, remove_empty=False):
+	"""Description of the function
+
+	Writes availabilities with bulk inserts, updates and deletes of Availability and its shift through table, of which the caller holds the transaction.
+	The availability of a worker and date is unique, an existing one gets the new shifts.
+
+	Parameters:
+	rows (dict): the set of shift ids per (worker id, date)
+	remove_empty (bool): delete the availabilities without shifts instead of keeping them without shifts
+
+	Returns:
+	int:created, int:updated, int:deleted
+
+	"""
+
+	if not rows:
+		return 0, 0, 0
+	removed = {key for key, shifts in rows.items() if remove_empty and not shifts}
+	# The availabilities of the dates of the rows, found by the date range such that the query has two parameters
+	first, last = min(date for worker, date in rows), max(date for worker, date in rows)
+	def availabilities():
+		return {(worker, date): pk for worker, date, pk in Availability.objects.filter(date__gte=first, date__lte=last).values_list('worker', 'date', 'id')}
+	existing = availabilities()
+	new = [Availability(worker_id=worker, date=date) for worker, date in rows if (worker, date) not in existing and (worker, date) not in removed]
+	Availability.objects.bulk_create(new, batch_size=500)
+	ids = availabilities() if new else existing
+
+	# The shifts are replaced in the through table of Availability.shift
+	Through = Availability.shift.through
+	Through.objects.filter(availability_id__in=[existing[key] for key in rows if key in existing]).delete()
+	Through.objects.bulk_create([Through(availability_id=ids[key], shifts_id=shift) for key, shifts in rows.items() if key not in removed for shift in shifts], batch_size=500)
+	deleted = [existing[key] for key in removed if key in existing]
+	Availability.objects.filter(id__in=deleted).delete()
+	return len(new), len([key for key in rows if key in existing and key not in removed]), len(deleted)
+
+class Importer:
+	"""Description of the class
+
+	Imports workers, skills, availability or productivity from a CSV or Excel file. Every chunk of rows is validated, the names of the workers,
+	skills and shifts are looked up in maps that are read once, and the rows are written with bulk_create and bulk_update in one transaction per chunk.
+	A row that exists (the same name, the same worker and date or the same worker, skill and date) is updated. Invalid rows are skipped and reported.
+
+	Parameters:
+	kind (str): 'workers', 'skills', 'availability' or 'productivity', see COLUMNS
+
+	"""
+
+	def __init__(self, kind):
+		if kind not in COLUMNS:
+			raise ValueError('Unknown kind of import %s, choose one of %s' % (kind, ', '.join(COLUMNS)))
+		self.kind = kind
+		self.workers = dict(Workers.objects.values_list('name', 'id'))
+		self.skills = dict(Skills.objects.values_list('name', 'id'))
+		self.shifts = dict(Shifts.objects.values_list('name', 'id'))
+		self.summary = {'rows': 0, 'created': 0, 'updated': 0, 'invalid': 0, 'errors': []}
+		self.updates = []
+		self.pairs = set() # The (worker, skill) of the imported productivities
+		# The values of the existing workers and skills, such that only the changed ones are updated
+		if kind == 'workers':
+			self.preferences = dict(Workers.objects.values_list('name', 'preference'))
+		if kind == 'skills':
+			self.values = {name: (workplaces, gross_profit) for name, workplaces, gross_profit in Skills.objects.values_list('name', 'workplaces', 'gross_profit')}
+
+	def run(self, source, chunk_size=CHUNK_SIZE, sheet=None):
+		"""Imports the rows of the file and returns the summary: the number of rows, created, updated and invalid rows and the errors"""
+		for frame in chunks(source, chunk_size, sheet):
+			missing = [column for column in COLUMNS[self.kind][:REQUIRED[self.kind]] if column not in frame.columns]
+			if missing:
+				raise ValueError('The file misses the column(s) %s' % ', '.join(missing))
+			# An optional column that is not in the file is not updated
+			self.updates = [column for column in COLUMNS[self.kind][1:] if column in frame.columns]
+			for column in COLUMNS[self.kind]:
+				if column not in frame.columns:
+					frame[column] = ''
+			frame = frame[COLUMNS[self.kind]].apply(lambda column: column.str.strip())
+			self.summary['rows'] += len(frame)
+			with transaction.atomic():
+				getattr(self, 'import_' + self.kind)(frame)
+
+		# The bulk writes skip the signals, hence the productivity snapshot of the imported workers and skills and the cached dates are updated here
+		if self.kind == 'productivity' and self.pairs:
+			snapshot.rebuild(self.pairs)
+		if self.kind == 'availability':
+			clear_planning_dates()
+		return self.summary
+
+	def valid(self, frame, invalid, message):
+		"""Reports the rows of the frame where invalid holds and returns the other rows"""
+		for row in frame.index[invalid]:
+			if len(self.summary['errors']) < MAX_ERRORS:
+				self.summary['errors'].append('Row %d: %s' % (row, message))
+		self.summary['invalid'] += int(invalid.sum())
+		return frame[~invalid]
+
+	def names(self, frame, column, lookup, label):
+		"""Returns the rows of which the name in the column is known and adds the primary key as column_id"""
+		frame = frame.assign(**{column + '_id': frame[column].map(lookup)})
+		frame = self.valid(frame, (frame[column] == '') | frame[column + '_id'].isna(), 'unknown %s' % label)
+		return frame.astype({column + '_id': int})
+
+	def dates(self, frame):
+		"""Returns the rows with a valid date (YYYY-MM-DD) and converts the dates"""
+		frame = frame.assign(date=pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce'))
+		frame = self.valid(frame, frame['date'].isna(), 'the date is not YYYY-MM-DD')
+		return frame.assign(date=frame['date'].dt.date)
+
+	def numbers(self, frame, column, default=None, integer=False):
+		"""Returns the rows of which the column is a number of at least 0, an empty cell is the default"""
+		values = pd.to_numeric(frame[column].where(frame[column] != '', default), errors='coerce')
+		invalid = values.isna() | (values < 0)
+		if integer:
+			invalid |= values.fillna(0) % 1 != 0
+		frame = self.valid(frame.assign(**{column: values}), invalid, '%s is not a number of at least 0' % column)
+		return frame.astype({column: int}) if integer else frame
+
+	def import_workers(self, frame):
+		frame = self.valid(frame, frame['name'] == '', 'the name is empty')
+		frame = self.valid(frame, frame['name'].str.len() > 50, 'the name is longer than 50 characters')
+		preference = frame['preference'].map(self.skills)
+		frame = self.valid(frame, (frame['preference'] != '') & preference.isna(), 'unknown preferred skill')
+		preference = frame['preference'].map(self.skills)
+		rows = dict(zip(frame['name'], (None if pd.isna(skill) else int(skill) for skill in preference)))
+
+		# Without the preference column nothing of an existing worker is updated
+		existing = [Workers(id=self.workers[name], name=name, preference_id=skill) for name, skill in rows.items() if name in self.workers and self.updates and self.preferences[name] != skill]
+		new = [Workers(name=name, preference_id=skill) for name, skill in rows.items() if name not in self.workers]
+		Workers.objects.bulk_update(existing, ['preference'], batch_size=500)
+		Workers.objects.bulk_create(new, batch_size=500)
+		self.workers.update(Workers.objects.filter(name__in=[worker.name for worker in new]).values_list('name', 'id'))
+		self.preferences.update(rows)
+		self.summary['created'] += len(new)
+		self.summary['updated'] += len(existing)
+
+	def import_skills(self, frame):
+		frame = self.valid(frame, frame['name'] == '', 'the name is empty')
+		frame = self.valid(frame, frame['name'].str.len() > 50, 'the name is longer than 50 characters')
+		frame = self.numbers(frame, 'workplaces', default='1', integer=True)
+		frame = self.numbers(frame, 'gross_profit', default='0')
+		rows = {name: (workplaces, gross_profit) for name, workplaces, gross_profit in zip(frame['name'], frame['workplaces'], frame['gross_profit'])}
+
+		# Only the columns of the file are compared and updated
+		existing = [Skills(id=self.skills[name], name=name, workplaces=int(workplaces), gross_profit=float(gross_profit)) for name, (workplaces, gross_profit) in rows.items()
+			if name in self.skills and any(value != previous for column, value, previous in zip(('workplaces', 'gross_profit'), (workplaces, gross_profit), self.values[name]) if column in self.updates)]
+		new = [Skills(name=name, workplaces=int(workplaces), gross_profit=float(gross_profit)) for name, (workplaces, gross_profit) in rows.items() if name not in self.skills]
+		if self.updates:
+			Skills.objects.bulk_update(existing, self.updates, batch_size=500)
+		Skills.objects.bulk_create(new, batch_size=500)
+		self.skills.update(Skills.objects.filter(name__in=[skill.name for skill in new]).values_list('name', 'id'))
+		self.values.update({name: (int(workplaces), float(gross_profit)) for name, (workplaces, gross_profit) in rows.items()})
+		self.summary['created'] += len(new)
+		self.summary['updated'] += len(existing)
+
+	def import_availability(self, frame):
+		frame = self.names(frame, 'worker', self.workers, 'worker')
+		frame = self.dates(frame)
+		shifts = frame['shifts'].str.split(';').apply(lambda names: [name.strip() for name in names if name.strip()])
+		frame = self.valid(frame.assign(shifts=shifts), shifts.apply(lambda names: any(name not in self.shifts for name in names)), 'unknown shift')
+		if frame.empty:
+			return
+		# The last row of a worker and date counts
+		rows = {(worker, date): {self.shifts[name] for name in names} for worker, date, names in zip(frame['worker_id'], frame['date'], frame['shifts'])}
+
+		created, updated, deleted = write_availability(rows)
+		self.summary['created'] += created
+		self.summary['updated'] += updated
+
+	def import_productivity(self, frame):
+		frame = self.names(frame, 'worker', self.workers, 'worker')
+		frame = self.names(frame, 'skill', self.skills, 'skill')
+		frame = self.dates(frame)
+		frame = self.numbers(frame, 'productivity')
+		if frame.empty:
+			return
+		rows = {(worker, skill, date): float(productivity) for worker, skill, date, productivity in zip(frame['worker_id'], frame['skill_id'], frame['date'], frame['productivity'])}
+
+		first, last = frame['date'].min(), frame['date'].max()
+		existing = {(worker, skill, date): pk for worker, skill, date, pk in WorkerSkills.objects.filter(date__gte=first, date__lte=last).values_list('worker', 'skill', 'date', 'id')}
+		updated = [WorkerSkills(id=existing[key], productivity=productivity) for key, productivity in rows.items() if key in existing]
+		new = [WorkerSkills(worker_id=worker, skill_id=skill, date=date, productivity=productivity) for (worker, skill, date), productivity in rows.items() if (worker, skill, date) not in existing]
+		WorkerSkills.objects.bulk_update(updated, ['productivity'], batch_size=500)
+		WorkerSkills.objects.bulk_create(new, batch_size=500)
+		self.pairs.update((worker, skill) for worker, skill, date in rows)
+		self.summary['created'] += len(new)
+		self.summary['updated'] += len(updated)
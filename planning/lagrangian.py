@@ -0,0 +1,178 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+from .matrix import PlanningMatrices
+from .heuristic import greedy
+from .profiling import logger
+from .backends import SolverError
+
+def solveShift(coefficients, A, capacity, upper):
+	"""Description of the function
+
+	Solves the subproblem of one shift: every worker does at most one task and every skill has its workplaces.
+	These constraints form a transportation problem, hence the LP has an integral optimum and no branching is needed.
+
+	Parameters:
+	coefficients (array): the Lagrangian objective coefficient of every decision variable of the shift
+	A (csr_matrix): the task rows and the workplace rows of the shift
+	capacity (array): the right-hand side of the rows
+	upper (array): the upper bound of every decision variable of the shift
+
+	Returns:
+	array: the value of every decision variable of the shift
+
+	"""
+
+	wanted = coefficients > 1e-12
+	x = np.zeros(len(coefficients))
+	if wanted.any():
+		result = linprog(-coefficients[wanted], A_ub=A[:, wanted], b_ub=capacity, bounds=np.column_stack([np.zeros(wanted.sum()), upper[wanted]]), method='highs')
+		x[wanted] = np.round(result.x)
+	return x
+
+class Lagrangian:
+	"""Description of the class
+
+	Decomposition of the planning by shift for very large workforces. Only the minimum and maximum output per skill link the shifts.
+	These constraints are moved into the objective with a multiplier per skill (Lagrangian relaxation). The remaining problem falls apart
+	into one subproblem per shift, which are solved independently (in the process pool with processes > 1). The multipliers follow
+	subgradient steps. Every iteration gives an upper bound (dual bound) and the greedy repair of the subproblem solutions
+	(see heuristic.py) gives a planning (primal bound). The methods have the same parameters and results as the ones of Optimize.
+
+	Parameters:
+	iterations (int): the maximum number of subgradient iterations
+	tolerance (float): the relative gap between the bounds at which the iterations stop
+	step (float): the initial step size factor of the subgradient steps (Polyak), halved when the dual bound does not improve for patience iterations
+	patience (int): the number of iterations without improvement of the dual bound before the step size factor is halved
+	processes (int): the number of processes that solve the subproblems
+
+	"""
+
+	def __init__(self, iterations=100, tolerance=1e-3, step=2.0, patience=5, processes=1):
+		self.iterations = iterations
+		self.tolerance = tolerance
+		self.step = step
+		self.patience = patience
+		self.processes = processes
+		self.history = []
+
+	def maxOutput(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('output', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxGrossProfit(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('gross_profit', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxPreferences(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('preference', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def maxProgression(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		return self.solve('skill_progression', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def solve(self, objective, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		"""Description of the function
+
+		Parameters:
+		objective (str): the measure to maximize, one of 'output', 'preference', 'gross_profit' or 'skill_progression'
+		The other parameters are the same as for Optimize.maxOutput.
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		matrices = PlanningMatrices(shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+		return matrices.results(self.assignment(matrices, objective))
+
+	def subproblems(self, matrices):
+		"""Returns the columns, the constraint matrix and the right-hand side of the subproblem of every shift"""
+		W, S = len(matrices.members), len(matrices.skills)
+		shifts = []
+		for t in range(len(matrices.shifts)):
+			columns = np.flatnonzero(matrices.shift_idx == t)
+			n = len(columns)
+			# Rows: the task of every worker in the shift, then the workplaces of every skill in the shift
+			A = sp.csr_matrix((np.ones(2 * n), (np.concatenate([matrices.worker_idx[columns], W + matrices.skill_idx[columns]]), np.tile(np.arange(n), 2))), shape=(W + S, n))
+			shifts.append((columns, A, np.concatenate([matrices.capacity, matrices.workplaces])))
+		return shifts
+
+	def assignment(self, matrices, objective):
+		"""Description of the function
+
+		Parameters:
+		matrices (PlanningMatrices): the instance, without aggregated workers
+		objective (str): the measure to maximize
+
+		Returns:
+		array: the 0/1 value of every decision variable of the best planning found, the bounds per iteration are kept in history.
+		A SolverError is raised when no planning meets the minimum outputs.
+
+		"""
+
+		# Avoid a circular import, the process pool is shared with the solver
+		from .solver import processPool, boundedResults, availableCores
+
+		coefficients = matrices.objective(objective)
+		output = matrices.output()
+		skill_idx = matrices.skill_idx
+		maximum = np.where(np.isinf(matrices.max_output), 0, matrices.max_output)
+		bounded = ~np.isinf(matrices.max_output) # Only a finite maximum gets a multiplier
+		shifts = self.subproblems(matrices)
+		processes = min(self.processes, len(shifts), availableCores())
+		pool = processPool(self.processes) if processes > 1 else None
+
+		# Multipliers of the maximum (above) and the minimum (below) output per skill, both at least 0
+		above, below = np.zeros(len(matrices.skills)), np.zeros(len(matrices.skills))
+		best_x, primal, dual = np.zeros(matrices.size), -np.inf, np.inf
+		step, stalled = self.step, 0
+		self.history = []
+		for iteration in range(self.iterations):
+			# Subproblems: the objective minus the multiplied output of every assignment
+			reduced = coefficients - (above - below)[skill_idx] * output
+			x = np.zeros(matrices.size)
+			tasks = [(reduced[columns], A, capacity, matrices.upper[columns]) for columns, A, capacity in shifts]
+			if pool:
+				solved = dict(boundedResults(pool, solveShift, enumerate(tasks), processes))
+				solutions = [solved[index] for index in range(len(tasks))]
+			else:
+				solutions = [solveShift(*task) for task in tasks]
+			for (columns, A, capacity), solution in zip(shifts, solutions):
+				x[columns] = solution
+
+			# Dual bound: the Lagrangian function of the multipliers
+			produced = np.bincount(skill_idx, weights=output * x, minlength=len(matrices.skills))
+			bound = reduced @ x + above @ maximum - below @ matrices.min_output
+			if bound < dual - 1e-9:
+				dual, stalled = bound, 0
+			else:
+				stalled += 1
+				if stalled >= self.patience:
+					step, stalled = step / 2, 0
+
+			# Primal bound: the subproblem solutions when they meet the output per skill, and the greedy repair that takes them first
+			repaired = greedy(matrices, np.lexsort((-coefficients, -x)), coefficients > 0)
+			for candidate in (x, repaired):
+				candidate_output = np.bincount(skill_idx, weights=output * candidate, minlength=len(matrices.skills))
+				if np.all(candidate_output >= matrices.min_output - 1e-6) and np.all(candidate_output <= matrices.max_output + 1e-6) and coefficients @ candidate > primal:
+					best_x, primal = candidate, coefficients @ candidate
+
+			gap = (dual - primal) / max(abs(primal), 1e-9) if np.isfinite(primal) else np.inf
+			self.history.append({'iteration': iteration, 'primal': float(primal), 'dual': float(dual), 'gap': float(gap), 'step': step})
+			logger.debug('lagrangian %s', self.history[-1])
+			if gap <= self.tolerance:
+				break
+
+			# Subgradient step towards the multipliers that lower the dual bound (Polyak step size)
+			gradient_above = np.where(bounded, maximum - produced, 0)
+			gradient_below = produced - matrices.min_output
+			gradient_above[(above <= 0) & (gradient_above > 0)] = 0 # Projection: a multiplier at 0 that would become negative stays at 0
+			gradient_below[(below <= 0) & (gradient_below > 0)] = 0
+			norm = gradient_above @ gradient_above + gradient_below @ gradient_below
+			if norm <= 0:
+				break # The subproblem solutions meet every output constraint, hence they are optimal
+			target = primal if np.isfinite(primal) else 0.95 * bound
+			size = step * (bound - target) / norm
+			above = np.maximum(0, above - size * gradient_above)
+			below = np.maximum(0, below - size * gradient_below)
+		if not np.isfinite(primal):
+			raise SolverError('No planning found, the greedy repair did not meet the minimum outputs')
+		return best_x
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from planning.benchmarks import aggregate, build, heuristic, lagrangian, metrics, presolve, progression, report, solvers, warmstart
+from planning.benchmarks.instances import generateInstance
+
+class Command(BaseCommand):
+	help = 'Benchmarks the solver on synthetic instances'
+
+	def add_arguments(self, parser):
+		parser.add_argument('suite', choices=['build', 'warmstart', 'heuristic', 'presolve', 'aggregate', 'metrics', 'solvers', 'lagrangian', 'progression', 'compare'], help='build: model build time per workers x skills x shifts, warmstart: solve time with and without MIP starts, heuristic: optimality gap of the heuristic against CBC, presolve: model size and solve time without and with presolve, aggregate: solve time with a binary per worker and with classes of interchangeable workers, metrics: time to obtain the results of a solution with loops and with arrays, solvers: build and solve time, objective value and gap per objective and backend, lagrangian: bounds and time of the decomposition by shift against the MIP, progression: time to fit the progression of every worker and skill per pair and at once, compare: regressions of the --candidate report against the --baseline report')
+		parser.add_argument('--workers', type=int, nargs='+', default=[50, 100, 200, 400])
+		parser.add_argument('--skills', type=int, nargs='+', default=[12])
+		parser.add_argument('--shifts', type=int, nargs='+', default=[4, 8])
+		parser.add_argument('--density', type=float, default=0.5)
+		parser.add_argument('--availability', type=float, default=0.8)
+		parser.add_argument('--tightness', type=float, default=0.5, help='share of the output the workers could do on a skill that is above its maximum output')
+		parser.add_argument('--minimum', type=float, default=0.0, help='minimum output of every skill as a share of its maximum output')
+		parser.add_argument('--repeat', type=int, default=3)
+		parser.add_argument('--seed', type=int, default=0)
+		parser.add_argument('--classes', type=int, default=None, help='number of distinct workers, every worker is a copy of one of them')
+		parser.add_argument('--solver', default='cbc', help='solver backend of the presolve, aggregate and lagrangian suites')
+		parser.add_argument('--backends', nargs='+', default=None, help='solver backends of the solvers suite, all available backends by default')
+		parser.add_argument('--time-limit', type=float, default=None, help='time limit per solve in seconds of the presolve, aggregate, solvers and lagrangian suites')
+		parser.add_argument('--iterations', type=int, default=100, help='maximum number of subgradient iterations of the lagrangian suite')
+		parser.add_argument('--processes', type=int, default=1, help='number of processes that solve the subproblems of the lagrangian suite')
+		parser.add_argument('--observations', type=int, default=6, help='maximum number of productivity observations per worker and skill of the progression suite')
+		parser.add_argument('--output', default=None, help='writes the rows to a report, CSV when it ends with .csv and JSON otherwise')
+		parser.add_argument('--baseline', default=None, help='report of the previous run, for compare')
+		parser.add_argument('--candidate', default=None, help='report of the new run, for compare')
+		parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown that compare reports as a regression')
+
+	def handle(self, *args, **options):
+		def generate(workers, skills, shifts):
+			return generateInstance(workers, skills, shifts, density=options['density'], availability=options['availability'], seed=options['seed'], classes=options['classes'], tightness=options['tightness'], minimum=options['minimum'])
+
+		if options['suite'] == 'compare':
+			if not options['baseline'] or not options['candidate']:
+				raise CommandError('compare needs --baseline and --candidate')
+			self.stdout.write('%-50s %-16s %9s %9s %8s' % ('row', 'field', 'baseline', 'candidate', 'ratio'))
+			problems = report.compare(options['baseline'], options['candidate'], options['threshold'], stdout=self.stdout)
+			if problems:
+				raise CommandError('%d regressions or changed values' % len(problems))
+			return
+
+		if options['suite'] == 'build':
+			self.stdout.write('%7s %6s %6s %9s %19s %19s %9s' % ('', '', '', '', 'expression', 'matrix', ''))
+			self.stdout.write('%7s %6s %6s %9s %9s %9s %9s %9s %9s' % ('workers', 'skills', 'shifts', 'variables', 'build', 'write', 'build', 'write', 'speedup'))
+			rows = build.run(generate, options['workers'], options['skills'], options['shifts'], repeat=options['repeat'], stdout=self.stdout)
+		elif options['suite'] == 'progression':
+			self.stdout.write('%-14s %12s %9s %9s %9s %11s' % ('instance', 'observations', 'loops', 'batched', 'speedup', 'difference'))
+			rows = progression.run(options['workers'], options['skills'], options['observations'], repeat=options['repeat'], seed=options['seed'], stdout=self.stdout)
+		else:
+			instances = []
+			for workers in options['workers']:
+				for skills in options['skills']:
+					for shifts in options['shifts']:
+						instances.append(('%dx%dx%d' % (workers, skills, shifts), generate(workers, skills, shifts)))
+		if options['suite'] == 'warmstart':
+			self.stdout.write('%-14s %-18s %10s %9s %9s %9s %7s' % ('instance', 'objective', 'optimum', 'cold', 'chained', 'resolve', 'same'))
+			rows = warmstart.run(instances, stdout=self.stdout)
+		elif options['suite'] == 'heuristic':
+			self.stdout.write('%-14s %-18s %10s %9s %18s %18s %9s %9s' % ('', '', '', 'cbc', 'greedy', 'lp', 'greedy', 'lp'))
+			self.stdout.write('%-14s %-18s %10s %9s %9s %8s %9s %8s %9s %9s' % ('instance', 'objective', 'optimum', 'time', 'time', 'gap', 'time', 'gap', 'feasible', 'feasible'))
+			rows = heuristic.run(instances, stdout=self.stdout)
+		elif options['suite'] == 'presolve':
+			self.stdout.write('%-14s %8s %9s %6s %9s %8s %-18s %9s %10s' % ('instance', 'presolve', 'variables', 'rows', 'nonzeros', 'build', 'objective', 'solve', 'value'))
+			rows = presolve.run(instances, options['solver'], {'time_limit': options['time_limit']}, stdout=self.stdout)
+		elif options['suite'] == 'aggregate':
+			self.stdout.write('%-14s %7s %-18s %30s %30s' % ('', '', '', 'binary per worker', 'classes'))
+			self.stdout.write('%-14s %7s %-18s %9s %9s %10s %9s %9s %10s %9s' % ('instance', 'classes', 'objective', 'variables', 'solve', 'value', 'variables', 'solve', 'value', 'speedup'))
+			rows = aggregate.run(instances, options['solver'], {'time_limit': options['time_limit']}, stdout=self.stdout)
+		elif options['suite'] == 'metrics':
+			self.stdout.write('%-14s %9s %9s %9s %9s %7s' % ('instance', 'variables', 'loops', 'tensor', 'speedup', 'same'))
+			rows = metrics.run(instances, repeat=options['repeat'], stdout=self.stdout)
+		elif options['suite'] == 'solvers':
+			self.stdout.write('%-14s %-7s %-18s %9s %6s %8s %9s %10s %9s %s' % ('instance', 'backend', 'objective', 'variables', 'rows', 'build', 'solve', 'value', 'gap', 'status'))
+			rows = solvers.run(instances, options['backends'], {'time_limit': options['time_limit']}, stdout=self.stdout)
+		elif options['suite'] == 'lagrangian':
+			self.stdout.write('%-14s %-18s %9s %9s %10s %10s %10s %8s %9s %10s' % ('instance', 'objective', 'variables', 'time', 'iterations', 'primal', 'dual', 'gap', options['solver'], 'value'))
+			rows = lagrangian.run(instances, options['solver'], {'time_limit': options['time_limit']}, options['iterations'], options['processes'], stdout=self.stdout)
+
+		if options['output']:
+			parameters = {key: options[key] for key in ('workers', 'skills', 'shifts', 'density', 'availability', 'tightness', 'minimum', 'repeat', 'seed', 'classes', 'solver', 'backends', 'time_limit', 'iterations', 'processes', 'observations')}
+			report.write(rows, options['output'], options['suite'], parameters)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from planning.importer import COLUMNS, CHUNK_SIZE, Importer
+
+class Command(BaseCommand):
+	help = 'Imports workers, skills, availability or productivity from a CSV or Excel file'
+
+	def add_arguments(self, parser):
+		parser.add_argument('kind', choices=list(COLUMNS), help='; '.join('%s: %s' % (kind, ', '.join(columns)) for kind, columns in COLUMNS.items()))
+		parser.add_argument('file', help='CSV file, or Excel file when it ends with .xlsx or .xls')
+		parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='number of rows that are written in one transaction')
+		parser.add_argument('--sheet', default=None, help='sheet of an Excel file, the first sheet by default')
+
+	def handle(self, *args, **options):
+		try:
+			summary = Importer(options['kind']).run(options['file'], options['chunk_size'], options['sheet'])
+		except (ValueError, OSError) as error:
+			raise CommandError(error)
+		for error in summary['errors']:
+			self.stderr.write(error)
+		self.stdout.write('Rows: %(rows)d, created: %(created)d, updated: %(updated)d, invalid: %(invalid)d' % summary)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from planning.cache import ResultCache
+
+class Command(BaseCommand):
+	help = 'Shows the hits and misses of the cache of solver results'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--clear', action='store_true', help='remove every cached result and reset the counters')
+
+	def handle(self, *args, **options):
+		result_cache = ResultCache()
+		if options['clear']:
+			result_cache.clear()
+			self.stdout.write('Planning cache cleared')
+			return
+		stats = result_cache.stats()
+		requests = stats['hits'] + stats['misses']
+		self.stdout.write('Hits: %d' % stats['hits'])
+		self.stdout.write('Misses: %d' % stats['misses'])
+		self.stdout.write('Hit ratio: %.0f%%' % (stats['hits'] / requests * 100 if requests else 0))
+		self.stdout.write('Results expire %d seconds after their last use, the planning cache holds at most %d entries' % (stats['timeout'], stats['max_entries']))
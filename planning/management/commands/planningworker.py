@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from planning.planner import claim_job, run_job, requeue_stale_jobs, worker_name
+
+class Command(BaseCommand):
+	help = 'Claims and solves queued planning jobs. Several workers can run at the same time.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('--interval', type=float, default=1, help='seconds to wait when no job is queued')
+		parser.add_argument('--stale', type=float, default=30, help='minutes without a heartbeat after which a running job is queued again')
+		parser.add_argument('--once', action='store_true', help='stop when no job is queued')
+
+	def handle(self, *args, **options):
+		name = worker_name()
+		self.stdout.write('Planning worker %s started' % name)
+		while True:
+			requeue_stale_jobs(options['stale'])
+			job = claim_job(name)
+			if job is None:
+				if options['once']:
+					break
+				time.sleep(options['interval'])
+				continue
+			self.stdout.write('Planning job %d for %s claimed' % (job.id, job.date))
+			job = run_job(job)
+			self.stdout.write('Planning job %d %s' % (job.id, job.get_status_display().lower()))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from planning import snapshot
+
+class Command(BaseCommand):
+	help = 'Builds the productivity snapshot again from the worker skills, e.g. after a bulk import that skipped the signals'
+
+	def handle(self, *args, **options):
+		rows = snapshot.rebuild()
+		self.stdout.write('Productivity snapshot rebuilt: %d rows' % rows)
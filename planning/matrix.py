@@ -0,0 +1,307 @@
+import numpy as np
+import scipy.sparse as sp
+from pyomo.environ import ConcreteModel, Var, Constraint, Objective, Binary, NonNegativeIntegers, maximize
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.common.gc_manager import PauseGC
+
+# The measures that can be used as an objective. The keys are the same as the measures returned by the solver.
+OBJECTIVES = ['output', 'preference', 'gross_profit', 'skill_progression']
+
+class LinearMatrices:
+	"""Description of the class
+
+	Base class of a maximization problem in matrix form: row_lower <= A x <= row_upper, 0 <= x <= upper and x integer.
+	Subclasses set A, row_lower, row_upper and upper, and return the coefficients of an objective with objective(name).
+
+	"""
+
+	@property
+	def size(self):
+		return self.A.shape[1]
+
+	def infeasibleRows(self):
+		"""Returns the rows of which the bounds cannot be met by any value of the variables between 0 and upper, e.g. the minimum output of a skill that no available worker has"""
+		highest = self.A.maximum(0) @ self.upper
+		lowest = self.A.minimum(0) @ self.upper
+		return np.flatnonzero((highest < self.row_lower - 1e-9) | (lowest > self.row_upper + 1e-9) | (self.row_lower > self.row_upper))
+
+	def model(self):
+		"""Returns a Pyomo model of the instance, of which every constraint is a row of the constraint matrix
+
+		Returns:
+		ConcreteModel: with works (one variable per column), constraints (one per row) and obj (one deactivated objective per measure in OBJECTIVES)
+
+		"""
+
+		lower_rows = [None if np.isinf(bound) else bound for bound in self.row_lower.tolist()]
+		upper_rows = [None if np.isinf(bound) else bound for bound in self.row_upper.tolist()]
+		indptr, indices, data = self.A.indptr.tolist(), self.A.indices.tolist(), self.A.data.tolist()
+
+		# Building many small objects triggers the garbage collector over and over, hence it is paused
+		with PauseGC():
+			model = ConcreteModel()
+			if np.all(self.upper <= 1):
+				model.works = Var(range(self.size), within=Binary)
+			else:
+				upper = self.upper.tolist()
+				model.works = Var(range(self.size), within=NonNegativeIntegers, bounds=lambda m, i: (0, upper[i]))
+			works = [model.works[i] for i in range(self.size)]
+			for i in np.flatnonzero(self.upper == 0).tolist():
+				works[i].fix(0)
+
+			# Every row is handed over as a linear expression, so Pyomo does not have to build an expression tree
+			def row_rule(m, row):
+				start, end = indptr[row], indptr[row + 1]
+				return (lower_rows[row], LinearExpression(constant=0, linear_coefs=data[start:end], linear_vars=[works[i] for i in indices[start:end]]), upper_rows[row])
+			model.constraints = Constraint(range(self.A.shape[0]), rule=row_rule)
+			model.obj = Objective(OBJECTIVES, rule=lambda m, name: self.expression(works, self.objective(name)), sense=maximize)
+			model.obj.deactivate()
+		return model
+
+	def expression(self, works, coefficients):
+		"""Returns the linear expression of the coefficients over the list of variables"""
+		nonzero = np.flatnonzero(coefficients).tolist()
+		return LinearExpression(constant=0, linear_coefs=coefficients[nonzero].tolist(), linear_vars=[works[i] for i in nonzero])
+
+class PlanningMatrices(LinearMatrices):
+	"""Description of the class
+
+	Turns the dictionaries of a planning instance into NumPy arrays and a scipy.sparse constraint matrix in one pass.
+	The decision variables are the (skill, worker, shift) triples, flattened in that order.
+	With aggregate, workers with the same productivity, preference, progression and availability are interchangeable. They are grouped
+	into one class, of which the decision variables are the number of its workers per (skill, shift). This removes the symmetric
+	solutions that the solver would otherwise branch on. The results are expanded to the workers of the classes again.
+
+	Parameters:
+	shifts (list): list of the shifts that are available to be planned
+	workers (list): list of all workers that are part of the planning
+	skills (list): list of all skills
+	min_values (dict): dictionary of the minimum required output per skill
+	max_values (dict): dictionary of the maximum required output per skill
+	workerskills (dict): dictionary of the output per skill per time unit per worker
+	availability (dict): dictionary of the availability per timeslot per worker
+	shift_lengths (dict): dictionary of the shift length per shift in time unit (mostly hours)
+	max_workplaces (dict): dictionary of the maximum of workplaces available per timeslot per skill
+	gross_profit (dict): dictionary of the gross profit per output of skill
+	preferences (dict): dictionary of the preferences per worker
+	progression (dict): dictionary of the progression per worker
+	presolve (bool): only create the decision variables of which an assignment is possible and worth something
+	aggregate (bool): group interchangeable workers into classes
+
+	"""
+
+	def __init__(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression, presolve=True, aggregate=False):
+		self.shifts = list(shifts)
+		self.workers = list(workers)
+		self.skills = list(skills)
+		S, W, T = len(self.skills), len(self.workers), len(self.shifts)
+
+		# Parameters as arrays: (workers, skills), (workers, shifts) and vectors per skill or per shift
+		self.productivity = np.array([[workerskills[worker][skill] for skill in self.skills] for worker in self.workers], dtype=float).reshape(W, S)
+		self.preference = np.array([[preferences[worker][skill] for skill in self.skills] for worker in self.workers], dtype=float).reshape(W, S)
+		self.progression = np.array([[progression[worker][skill] for skill in self.skills] for worker in self.workers], dtype=float).reshape(W, S)
+		self.available = np.array([[availability.get(worker, {}).get(shift, 1) != 0 for shift in self.shifts] for worker in self.workers], dtype=bool).reshape(W, T)
+		self.lengths = np.array([shift_lengths[shift] for shift in self.shifts], dtype=float)
+		self.workplaces = np.array([max_workplaces[skill] for skill in self.skills], dtype=float)
+		self.gross_profit = np.array([gross_profit[skill] for skill in self.skills], dtype=float)
+		self.min_output = np.array([min_values.get(skill, 0) for skill in self.skills], dtype=float)
+		self.max_output = np.array([max_values.get(skill, np.inf) for skill in self.skills], dtype=float)
+
+		# Every row of the worker arrays is a class of workers, which is a single worker unless the workers are aggregated
+		self.members = [[w] for w in range(W)]
+		self.capacity = np.ones(W)
+		if aggregate:
+			self._aggregate()
+		W = len(self.members)
+
+		# Decision variables: one per (skill, class, shift), the upper bound is 0 or the number of workers of the class (1 without aggregate)
+		skill_idx, worker_idx, shift_idx = [idx.ravel() for idx in np.indices((S, W, T))]
+		usable = self.available[worker_idx, shift_idx] # Do not plan when the worker is not available
+		if presolve:
+			# Presolve: leave out the unavailable slots, the triples of which every objective value is 0 (i.e. the worker does not have the skill)
+			# and the triples that cannot be assigned: no workplaces or a single assignment gives more output than the maximum of the skill.
+			# Hence, skills with a maximum output of 0 and workers without any usable slot do not get variables at all.
+			output = self.productivity[worker_idx, skill_idx] * self.lengths[shift_idx]
+			worth = (output > 0) | (self.preference[worker_idx, skill_idx] > 0) | (self.progression[worker_idx, skill_idx] > 0)
+			fits = (output <= self.max_output[skill_idx]) & (self.workplaces[skill_idx] >= 1)
+			keep = usable & worth & fits
+			skill_idx, worker_idx, shift_idx, usable = skill_idx[keep], worker_idx[keep], shift_idx[keep], usable[keep]
+		self.skill_idx, self.worker_idx, self.shift_idx = skill_idx, worker_idx, shift_idx
+		self.upper = usable * self.capacity[worker_idx]
+
+		self.A, self.row_lower, self.row_upper = self._build_constraints()
+
+	def _aggregate(self):
+		signature = np.hstack([self.productivity, self.preference, self.progression, self.available])
+		_, first, inverse, counts = np.unique(signature, axis=0, return_index=True, return_inverse=True, return_counts=True)
+		# The members of every class in the order of the workers, the classes in the order of their first worker
+		groups = np.split(np.argsort(inverse.ravel(), kind='stable'), np.cumsum(counts)[:-1])
+		order = np.argsort(first)
+		self.members = [groups[c].tolist() for c in order]
+		self.capacity = counts[order].astype(float)
+		first = first[order]
+		self.productivity, self.preference, self.progression, self.available = self.productivity[first], self.preference[first], self.progression[first], self.available[first]
+
+	def keys(self):
+		"""Returns the (skill, worker, shift) names of the decision variables in the order of the columns, the worker is the first worker of the class"""
+		names = np.array([self.workers[members[0]] for members in self.members], dtype=object)
+		return list(zip(np.array(self.skills, dtype=object)[self.skill_idx], names[self.worker_idx], np.array(self.shifts, dtype=object)[self.shift_idx]))
+
+	def assignment(self, timetable):
+		"""Returns the value of every decision variable for the assignment of a timetable ({shift: {skill: [workers]}}), e.g. of a previous solve"""
+		rows = {self.workers[w]: c for c, members in enumerate(self.members) for w in members}
+		skills = {skill: s for s, skill in enumerate(self.skills)}
+		shifts = {shift: t for t, shift in enumerate(self.shifts)}
+		counts = np.zeros((len(self.skills), len(self.members), len(self.shifts)))
+		for shift, row in timetable.items():
+			for skill, names in row.items():
+				for worker in names:
+					if shift in shifts and skill in skills and worker in rows:
+						counts[skills[skill], rows[worker], shifts[shift]] += 1
+		return np.minimum(counts[self.skill_idx, self.worker_idx, self.shift_idx], self.upper)
+
+	def output(self):
+		"""Returns the output of every decision variable, i.e. productivity times shift length"""
+		return self.productivity[self.worker_idx, self.skill_idx] * self.lengths[self.shift_idx]
+
+	def objective(self, name):
+		"""Returns the objective coefficients of every decision variable for one of the OBJECTIVES"""
+		if name == 'output':
+			return self.output()
+		elif name == 'gross_profit':
+			return self.output() * self.gross_profit[self.skill_idx]
+		elif name == 'preference':
+			return self.preference[self.worker_idx, self.skill_idx] * self.lengths[self.shift_idx]
+		elif name == 'skill_progression':
+			return self.progression[self.worker_idx, self.skill_idx] * self.lengths[self.shift_idx]
+		raise ValueError("Unknown objective '%s', choose one of %s" % (name, ', '.join(OBJECTIVES)))
+
+	def tensor(self, x):
+		"""Returns the values of the decision variables as an array of shape (skills, classes, shifts), which is 0 for the triples that have no variable"""
+		works = np.zeros((len(self.skills), len(self.members), len(self.shifts)))
+		works[self.skill_idx, self.worker_idx, self.shift_idx] = np.round(np.asarray(x, dtype=float))
+		return works
+
+	def measures(self, works):
+		"""Description of the function
+
+		Computes every measure as a contraction of the (skills, classes, shifts) array of tensor with the parameter arrays.
+
+		Parameters:
+		works (array): the result of tensor
+
+		Returns:
+		dict: {output, preference, gross_profit, skill_progression} rounded to 2 decimals
+
+		"""
+
+		hours = np.einsum('swt,t->sw', works, self.lengths) # Hours per skill per class
+		output = np.einsum('sw,ws->s', hours, self.productivity) # Output per skill
+		return {
+			'output': round(float(output.sum()), 2),
+			'preference': round(float(np.einsum('sw,ws->', hours, self.preference)), 2),
+			'gross_profit': round(float(output @ self.gross_profit), 2),
+			'skill_progression': round(float(np.einsum('sw,ws->', hours, self.progression)), 2),
+		}
+
+	def results(self, x):
+		"""Description of the function
+
+		The solution is turned into a (skills, classes, shifts) array once, of which the timetable, the measures and the participation are taken.
+
+		Parameters:
+		x (array): value of every decision variable, i.e. 0 or 1, or the number of workers of the class
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		works = self.tensor(x)
+		cells = {(t, s): [] for t in range(len(self.shifts)) for s in range(len(self.skills))}
+		# The number of workers of a class is handed out to its members in order, skill after skill
+		handed = np.zeros((len(self.members), len(self.shifts)), dtype=int)
+		for s, c, t in zip(*[idx.tolist() for idx in np.nonzero(works)]):
+			count = int(works[s, c, t])
+			cells[t, s].extend(self.members[c][handed[c, t]:handed[c, t] + count])
+			handed[c, t] += count
+		table = {shift: {skill: [self.workers[w] for w in sorted(cells[t, s])] for s, skill in enumerate(self.skills)} for t, shift in enumerate(self.shifts)}
+		return [table, self.measures(works), float(works.sum() / (self.available * self.capacity[:, None]).sum())]
+
+	def _build_constraints(self):
+		S, W, T = len(self.skills), len(self.members), len(self.shifts)
+		n = len(self.skill_idx)
+		columns = np.arange(n)
+
+		# Max one task per worker per timeslot, i.e. the number of workers of the class
+		task_rows = self.worker_idx * T + self.shift_idx
+		# Maximum number of workplaces per shift
+		workplace_rows = W * T + self.skill_idx * T + self.shift_idx
+		# Output per skill between the provided min and max value
+		output = self.output()
+		nonzero = output != 0
+		output_rows = W * T + S * T + self.skill_idx[nonzero]
+
+		A = sp.coo_matrix((
+			np.concatenate([np.ones(n), np.ones(n), output[nonzero]]),
+			(np.concatenate([task_rows, workplace_rows, output_rows]), np.concatenate([columns, columns, columns[nonzero]]))
+		), shape=(W * T + S * T + S, n)).tocsr()
+		lower = np.concatenate([np.full(W * T, -np.inf), np.full(S * T, -np.inf), self.min_output])
+		upper = np.concatenate([np.repeat(self.capacity, T), np.repeat(self.workplaces, T), self.max_output])
+
+		# Not every skill has output in the matrix. Hence, in that case: skip the constraint, unless it cannot be met (see infeasibleRows).
+		keep = (np.diff(A.indptr) > 0) | (lower > 0) | (upper < 0)
+		return A[keep], lower[keep], upper[keep]
+
+class HorizonMatrices(LinearMatrices):
+	"""Description of the class
+
+	Plans several days in one model. The constraint matrices of the days are stacked on the diagonal, hence the days only
+	depend on each other through the output per skill per period (e.g. per week), which must be between the period targets.
+
+	Parameters:
+	days (list): PlanningMatrices of every day
+	periods (list): the period (e.g. the week) of every day
+	period_min (dict): dictionary of the minimum required output per skill per period
+	period_max (dict): dictionary of the maximum required output per skill per period
+
+	"""
+
+	def __init__(self, days, periods, period_min=None, period_max=None):
+		self.days = days
+		self.offsets = np.cumsum([0] + [day.size for day in days])
+		skills = days[0].skills if days else []
+		period_min, period_max = period_min or {}, period_max or {}
+		targets = [skill for skill in skills if skill in period_min or skill in period_max]
+		labels = list(dict.fromkeys(periods))
+
+		# Output per skill per period between the targets, one row per (period, skill with a target)
+		rows, columns, data = [], [], []
+		for d, day in enumerate(days):
+			output = day.output()
+			for t, skill in enumerate(targets):
+				if skill not in day.skills:
+					continue
+				index = np.flatnonzero((day.skill_idx == day.skills.index(skill)) & (output != 0))
+				rows.append(np.full(len(index), labels.index(periods[d]) * len(targets) + t))
+				columns.append(index + self.offsets[d])
+				data.append(output[index])
+		linking = sp.coo_matrix((
+			np.concatenate(data) if data else [],
+			(np.concatenate(rows) if rows else [], np.concatenate(columns) if columns else [])
+		), shape=(len(labels) * len(targets), self.offsets[-1])).tocsr()
+		lower = np.tile([period_min.get(skill, 0) for skill in targets], len(labels)).astype(float)
+		upper = np.tile([period_max.get(skill, np.inf) for skill in targets], len(labels)).astype(float)
+		keep = np.diff(linking.indptr) > 0
+
+		self.A = sp.vstack([sp.block_diag([day.A for day in days], format='csr'), linking[keep]], format='csr') if days else linking
+		self.row_lower = np.concatenate([day.row_lower for day in days] + [lower[keep]])
+		self.row_upper = np.concatenate([day.row_upper for day in days] + [upper[keep]])
+		self.upper = np.concatenate([day.upper for day in days]) if days else np.zeros(0)
+
+	def objective(self, name):
+		return np.concatenate([day.objective(name) for day in self.days]) if self.days else np.zeros(0)
+
+	def split(self, values):
+		"""Splits a list over the columns into one list per day"""
+		return [values[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
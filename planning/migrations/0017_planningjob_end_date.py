@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0016_planningjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planningjob',
+            name='end_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
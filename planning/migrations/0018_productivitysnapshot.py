@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_snapshot(apps, schema_editor):
+    # One snapshot row per WorkerSkills, valid up to the next productivity of the same worker and skill
+    WorkerSkills = apps.get_model('planning', 'WorkerSkills')
+    ProductivitySnapshot = apps.get_model('planning', 'ProductivitySnapshot')
+    rows = []
+    for observation in WorkerSkills.objects.order_by('worker', 'skill', 'date'):
+        if rows and (rows[-1].worker_id, rows[-1].skill_id) == (observation.worker_id, observation.skill_id):
+            rows[-1].valid_to = observation.date
+        rows.append(ProductivitySnapshot(worker_id=observation.worker_id, skill_id=observation.skill_id, productivity=observation.productivity, valid_from=observation.date))
+    ProductivitySnapshot.objects.bulk_create(rows, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0017_planningjob_end_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductivitySnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('productivity', models.FloatField(default=0)),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Productivity snapshots',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='workerskills',
+            index=models.Index(fields=['worker', 'skill', 'date'], name='planning_wo_worker__9cac07_idx'),
+        ),
+        migrations.AddField(
+            model_name='productivitysnapshot',
+            name='skill',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='planning.skills'),
+        ),
+        migrations.AddField(
+            model_name='productivitysnapshot',
+            name='worker',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='planning.workers'),
+        ),
+        migrations.AddIndex(
+            model_name='productivitysnapshot',
+            index=models.Index(fields=['worker', 'skill', 'valid_from'], name='planning_pr_worker__e59243_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productivitysnapshot',
+            index=models.Index(fields=['valid_from', 'valid_to'], name='planning_pr_valid_f_e6d5e0_idx'),
+        ),
+        migrations.RunPython(fill_snapshot, migrations.RunPython.noop),
+    ]
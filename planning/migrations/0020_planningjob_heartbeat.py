@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0019_availability_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planningjob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
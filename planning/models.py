@@ -72,6 +72,7 @@ class Availability(models.Model):
 	class Meta: 
 		verbose_name_plural = 'Availability'
 		unique_together = ('worker', 'date',) # Do not allow to have duplicate availabilities for a worker on a date and a certain shift.
+		indexes = [models.Index(fields=['date'])]
 
 class WorkerSkills(models.Model):
 	date = models.DateField()
@@ -82,4 +83,42 @@ class WorkerSkills(models.Model):
 		return self.skill.name
 	class Meta: 
 		verbose_name_plural = 'Worker skills'
-		unique_together = ('date', 'worker', 'skill',) # Do not allow for the worker to have the multiple skills simultaneously.
\ No newline at end of file
+		unique_together = ('date', 'worker', 'skill',) # Do not allow for the worker to have the multiple skills simultaneously.
+		indexes = [models.Index(fields=['worker', 'skill', 'date'])]
+
+class ProductivitySnapshot(models.Model):
+	# The productivity of a worker on a skill from valid_from up to valid_to, one row per WorkerSkills. It is kept up to date by snapshot.py.
+	worker = models.ForeignKey(Workers, on_delete=models.CASCADE)
+	skill = models.ForeignKey(Skills, on_delete=models.CASCADE)
+	productivity = models.FloatField(default=0)
+	valid_from = models.DateField()
+	valid_to = models.DateField(blank=True, null=True) # The date of the next productivity, empty for the latest productivity
+	class Meta:
+		verbose_name_plural = 'Productivity snapshots'
+		indexes = [models.Index(fields=['worker', 'skill', 'valid_from']), models.Index(fields=['valid_from', 'valid_to'])]
+	def __str__(self): return '%s %s from %s' % (self.worker, self.skill, self.valid_from)
+
+class PlanningJob(models.Model):
+	# A planning is created by a worker process (python manage.py planningworker), the result page polls the status.
+	QUEUED, RUNNING, DONE, FAILED = 0, 1, 2, 3
+	STATUS_CHOICES = [
+		(QUEUED, 'Queued'),
+		(RUNNING, 'Running'),
+		(DONE, 'Done'),
+		(FAILED, 'Failed')
+	]
+	date = models.DateField()
+	end_date = models.DateField(blank=True, null=True) # Last date of a horizon planning
+	parameters = models.TextField() # JSON of the date and the minimum and maximum output per skill
+	status = models.IntegerField(default=QUEUED, choices=STATUS_CHOICES)
+	result = models.TextField(blank=True) # JSON of the context of the result page
+	error = models.TextField(blank=True)
+	worker = models.CharField(max_length=100, blank=True) # The worker process that claimed the job
+	created = models.DateTimeField(auto_now_add=True)
+	started = models.DateTimeField(blank=True, null=True)
+	finished = models.DateTimeField(blank=True, null=True)
+	heartbeat = models.DateTimeField(blank=True, null=True) # Updated by the worker while the job runs
+	class Meta:
+		verbose_name_plural = 'Planning jobs'
+		indexes = [models.Index(fields=['status', 'created'])]
+	def __str__(self): return 'Planning of %s' % (self.date if self.end_date is None else '%s to %s' % (self.date, self.end_date))
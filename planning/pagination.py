@@ -0,0 +1,105 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# Lists that grow with the history (availabilities, tasks, workers) are shown a page at a time. The pages are found with keyset (cursor)
+# pagination: a page starts after the ordering values of the last row of the previous page, such that a page costs the same at any depth.
+PAGE_SIZE = 50
+
+def encode(values):
+	"""Returns the cursor of the ordering values of a row"""
+	return base64.urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+def decode(cursor):
+	"""Returns the ordering values of a cursor, None when the cursor is invalid or holds other values than text and numbers"""
+	try:
+		values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+	except (binascii.Error, ValueError):
+		return None
+	if not isinstance(values, list) or any(isinstance(value, bool) or not isinstance(value, (str, int, float)) for value in values):
+		return None
+	return values
+
+def beyond(ordering, values, backwards=False):
+	"""Description of the function
+
+	Returns the condition of the rows after (or before, when backwards) the row with the values in the ordering.
+	For the ordering (a, b) this is a > x or (a = x and b > y), of which > becomes < for a descending field.
+
+	Parameters:
+	ordering (list): the fields of the ordering, e.g. ['-date', 'id'], which ends with a unique field
+	values (list): the value per field
+
+	Returns:
+	Q: the condition
+
+	"""
+
+	condition = Q()
+	for i, field in enumerate(ordering):
+		name = field.lstrip('-')
+		descending = field.startswith('-') != backwards
+		step = Q(**{'%s__%s' % (name, 'lt' if descending else 'gt'): values[i]})
+		for previous, value in zip(ordering[:i], values):
+			step &= Q(**{previous.lstrip('-'): value})
+		condition |= step
+	return condition
+
+class Page:
+	"""Description of the class
+
+	A page of rows with the links to the previous and next page, which keep the other parameters of the request (e.g. ?sort=all).
+
+	Parameters:
+	request (HttpRequest): the request of the page, of which after or before holds the cursor
+	queryset (QuerySet): the rows to show
+	ordering (list): the fields of the ordering, which ends with a unique field such as id
+	size (int): the number of rows per page
+
+	"""
+
+	def __init__(self, request, queryset, ordering, size=PAGE_SIZE):
+		self.ordering = ordering
+		parameters = request.GET.copy()
+		after, before = decode(parameters.pop('after', [''])[0]), decode(parameters.pop('before', [''])[0])
+		backwards = before is not None and len(before) == len(ordering)
+		cursor = before if backwards else after
+		valid = cursor is not None and len(cursor) == len(ordering)
+		if valid:
+			try:
+				queryset = queryset.filter(beyond(ordering, cursor, backwards))
+			except (TypeError, ValueError, ValidationError):
+				# A value that does not fit its field (e.g. of a changed link) shows the first page
+				valid = False
+		if not valid:
+			cursor, backwards = None, False
+		if backwards:
+			queryset = queryset.order_by(*[field[1:] if field.startswith('-') else '-' + field for field in ordering])
+		else:
+			queryset = queryset.order_by(*ordering)
+
+		# One row more than the page tells whether there is a page beyond it
+		rows = list(queryset[:size + 1])
+		more = len(rows) > size
+		rows = rows[:size]
+		if backwards:
+			rows.reverse()
+		self.rows = rows
+		has_previous, has_next = (more, True) if backwards else (cursor is not None, more)
+		self.previous = self.link(parameters, 'before', rows[0]) if rows and has_previous else None
+		self.next = self.link(parameters, 'after', rows[-1]) if rows and has_next else None
+
+	def __iter__(self):
+		return iter(self.rows)
+
+	def __len__(self):
+		return len(self.rows)
+
+	def link(self, parameters, direction, row):
+		"""Returns the query string of the page before or after the row"""
+		parameters = parameters.copy()
+		parameters[direction] = encode([getattr(row, field.lstrip('-')) for field in self.ordering])
+		return '?' + parameters.urlencode()
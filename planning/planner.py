@@ -0,0 +1,340 @@
+import datetime
+import json
+import socket
+import os
+import traceback
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .models import WorkerSkills,Skills,Availability,Shifts,PlanningJob
+from .matrix import OBJECTIVES
+from .solver import solveObjectives,solveHorizon,PlanningSession,applyDelta,progressionFit
+from .cache import ResultCache,instance_hash
+from .profiling import Profile
+from . import snapshot
+from .progress import Progress,NoProgress,Heartbeat
+
+# This file contains the planning itself: obtaining the inputs of the solver from the database,
+# solving them under the four objectives and the queue of planning jobs that is processed by the planningworker command.
+
+def planning_inputs(input_date, min_values, max_values):
+    """Returns the keyword arguments of the solver for the availabilities on the date
+
+    The inputs are read with a fixed number of queries, whatever the number of workers: the skills, the shifts, the availabilities
+    with their shifts, the productivity snapshot (see snapshot.py) and the productivity observations of the available workers up to the date.
+    A skill of which the worker has no productivity on or before the date is not a skill of the worker yet.
+    """
+    skills = pd.DataFrame.from_records(Skills.objects.values('id', 'name', 'workplaces', 'gross_profit'), columns=['id', 'name', 'workplaces', 'gross_profit'])
+    shifts = pd.DataFrame.from_records(Shifts.objects.values('id', 'name', 'length'), columns=['id', 'name', 'length'])
+    availabilities = list(Availability.objects.filter(date=input_date).select_related('worker').prefetch_related('shift'))
+    workers = [availability.worker for availability in availabilities]
+    worker_ids = [worker.id for worker in workers]
+
+    # Productivity on the date per worker and skill, a (workers, skills) table
+    current = pd.DataFrame.from_records(snapshot.as_of(input_date).filter(worker__availability__date=input_date).values('worker', 'skill', 'productivity'), columns=['worker', 'skill', 'productivity'])
+    productivity = current.pivot(index='worker', columns='skill', values='productivity').reindex(index=worker_ids, columns=skills['id'])
+    has_skill = productivity.notna().to_numpy()
+    productivity = productivity.fillna(0).to_numpy()
+    # The preference is 2 for the preferred skill of the worker, 1 for the other skills and 0 for skills the worker does not have
+    preferred = np.array([worker.preference_id for worker in workers], dtype=float)[:, None] == skills['id'].to_numpy()[None, :]
+    preference = np.where(has_skill, np.where(preferred, 2, 1), 0)
+
+    # Progression per worker and skill of the observations up to the date, see progressionFit
+    observations = pd.DataFrame.from_records(WorkerSkills.objects.filter(worker__availability__date=input_date, date__lte=input_date).values('worker', 'skill', 'date', 'productivity'), columns=['worker', 'skill', 'date', 'productivity'])
+    columns = pd.Series(np.arange(len(skills)), index=skills['id'])
+    rows = pd.Series(np.arange(len(worker_ids)), index=worker_ids, dtype=int)
+    known = observations[observations['skill'].isin(columns.index)]
+    group = rows[known['worker']].to_numpy() * len(skills) + columns[known['skill']].to_numpy()
+    progression = progressionFit(group, pd.to_datetime(known['date']).to_numpy(), known['productivity'].to_numpy(), len(worker_ids) * len(skills)).reshape(len(worker_ids), len(skills))
+
+    # Availability per worker and shift
+    available = {availability.worker.name: {shift.id for shift in availability.shift.all()} for availability in availabilities}
+    model_workers = [worker.name for worker in workers]
+    model_skills = skills['name'].tolist()
+    model_shifts = shifts['name'].tolist()
+    return {
+        'shifts': model_shifts,
+        'workers': model_workers,
+        'skills': model_skills,
+        'min_values': min_values,
+        'max_values': max_values,
+        'workerskills': {worker: dict(zip(model_skills, productivity[i].tolist())) for i, worker in enumerate(model_workers)},
+        'availability': {worker: {shift.name: int(shift.id in available[worker]) for shift in shifts.itertuples()} for worker in model_workers},
+        'shift_lengths': dict(zip(model_shifts, shifts['length'].tolist())),
+        'max_workplaces': dict(zip(model_skills, skills['workplaces'].tolist())),
+        'gross_profit': dict(zip(model_skills, skills['gross_profit'].tolist())),
+        'preferences': {worker: dict(zip(model_skills, preference[i].tolist())) for i, worker in enumerate(model_workers)},
+        'progression': {worker: dict(zip(model_skills, progression[i].tolist())) for i, worker in enumerate(model_workers)},
+    }
+
+def solver_settings():
+    """Returns the solver backend, its options and whether workers are aggregated, of the settings"""
+    return {'solver': settings.PLANNING_SOLVER, 'options': settings.PLANNING_SOLVER_OPTIONS.get(settings.PLANNING_SOLVER), 'aggregate': settings.PLANNING_AGGREGATE}
+
+def create_planning(input_date, min_values, max_values, progress=None):
+    """Solves the planning of the date under the four objectives and returns the context of the result page
+
+    With progress (see progress.py), the phases, the incumbents of the solver and the result of every objective are published as soon as they are known.
+    """
+    progress = progress or NoProgress()
+    # The wall time per phase, the SQL queries and the stats of every solve are logged and shown on the result page with DEBUG
+    profile = Profile()
+    with profile.queries():
+        progress.publish('phase', {'phase': 'inputs'})
+        with profile.phase('inputs'):
+            instance = planning_inputs(input_date, min_values, max_values)
+        skills = instance['skills']
+
+        def publish(objective, result):
+            progress.publish('result', {'objective': objective, 'timetable': result[0], 'measures': result[1], 'participation': round(result[2] * 100)})
+
+        # Results of the same inputs are taken from the cache, the other objectives are sent to solver.py.
+        # They are solved concurrently when PLANNING_PROCESSES allows it.
+        objectives = ['output', 'gross_profit', 'preference', 'skill_progression']
+        result_cache = ResultCache(solver=solver_settings())
+        with profile.phase('cache'):
+            results = {objective: result_cache.get(instance, objective) for objective in objectives}
+        stats = {objective: {'cached': True} for objective in objectives if results[objective] is not None}
+        unsolved = [objective for objective in objectives if results[objective] is None]
+        for objective in objectives:
+            if results[objective] is not None:
+                publish(objective, results[objective])
+        if unsolved:
+            # The timetables of the previous planning of this date are used as MIP start
+            starts_key = 'planning_starts_%s' % input_date
+            progress.publish('phase', {'phase': 'solve', 'objectives': unsolved})
+            with profile.phase('solve'), progress.watch(unsolved) as logfiles:
+                results.update(solveObjectives(instance, unsolved, processes=settings.PLANNING_PROCESSES, starts=caches['planning'].get(starts_key), stats=stats, callback=publish, logfiles=logfiles, **solver_settings()))
+            with profile.phase('cache'):
+                caches['planning'].set(starts_key, {objective: result[0] for objective, result in results.items()}, 60 * 60 * 24)
+                for objective in unsolved:
+                    result_cache.set(instance, objective, results[objective])
+        with profile.phase('context'):
+            context = planning_context(input_date, skills, results)
+    profile.values.update({'workers': len(instance['workers']), 'skills': len(skills), 'shifts': len(instance['shifts'])})
+    profile.log('planning', date=input_date)
+    context['profile'] = dict(profile.asDict(), objectives=stats)
+    # The workers and shifts are offered by the form to re-plan after a change
+    context.update({'workers': instance['workers'], 'shifts': instance['shifts']})
+    return context
+
+# The timetable per objective in the context of the result page
+TIMETABLES = {'output': 'max_output', 'gross_profit': 'max_gross_profit', 'preference': 'max_preferences', 'skill_progression': 'max_progression'}
+
+def create_repair(input_date, min_values, max_values, previous, delta, penalty=0, progress=None):
+    """Description of the function
+
+    Re-plans the published planning of a date after a change, see PlanningSession.repair. Only the affected shifts and skills are
+    optimized again, the other assignments are kept.
+
+    Parameters:
+    input_date (str): the date in YYYY-MM-DD
+    min_values (dict), max_values (dict): the minimum and maximum output per skill of the published planning
+    previous (dict): the context of the result page of the published planning
+    delta (dict): the change, see applyDelta
+    penalty (float): value of the measure that a changed assignment costs
+    progress (Progress): where the phases and the result of every objective are published, see create_planning
+
+    Returns:
+    dict: the context of the result page
+
+    """
+
+    progress = progress or NoProgress()
+    profile = Profile()
+    with profile.queries():
+        progress.publish('phase', {'phase': 'inputs'})
+        with profile.phase('inputs'):
+            instance, shifts, skills = applyDelta(planning_inputs(input_date, min_values, max_values), delta)
+        session = PlanningSession(**instance, **solver_settings())
+        results = {}
+        progress.publish('phase', {'phase': 'solve', 'objectives': list(TIMETABLES)})
+        with profile.phase('solve'):
+            for objective, key in TIMETABLES.items():
+                results[objective] = session.repair(objective, previous[key], shifts, skills, penalty)
+                progress.publish('result', {'objective': objective, 'timetable': results[objective][0], 'measures': results[objective][1], 'participation': round(results[objective][2] * 100)})
+        with profile.phase('context'):
+            context = planning_context(input_date, instance['skills'], results)
+    profile.log('repair', date=input_date)
+    context['profile'] = dict(profile.asDict(), objectives=session.stats)
+    context.update({'workers': instance['workers'], 'shifts': instance['shifts']})
+    # The number of assignments per objective that differ from the published planning
+    changes = {}
+    for objective, key in TIMETABLES.items():
+        old, new = previous[key], context[key]
+        changes[objective] = sum(len(set(old.get(shift, {}).get(skill, [])) ^ set(new[shift][skill])) for shift in new for skill in new[shift])
+    context['repair'] = {'delta': delta, 'penalty': penalty, 'shifts': shifts, 'skills': skills, 'changes': changes}
+    return context
+
+# The maximum number of solves of a Pareto front, of which every solve is limited to PLANNING_PARETO_TIME_LIMIT seconds
+PARETO_MAX_SOLVES = 40
+
+def check_pareto(measures, points):
+    """Raises a ValueError when the measures are not two or more objectives or when their front takes more than PARETO_MAX_SOLVES solves"""
+    if len(measures) < 2 or len(set(measures)) != len(measures) or any(measure not in OBJECTIVES for measure in measures):
+        raise ValueError('Choose two or more different measures of %s' % ', '.join(OBJECTIVES))
+    solves = points ** (len(measures) - 1) + len(measures)
+    if solves > PARETO_MAX_SOLVES:
+        raise ValueError('A front of %d measures with %d points takes %d solves, at most %d are allowed' % (len(measures), points, solves, PARETO_MAX_SOLVES))
+
+def pareto_settings():
+    """Returns the solver settings of a Pareto front: the time limit of every solve is at most PLANNING_PARETO_TIME_LIMIT"""
+    solver = solver_settings()
+    options = dict(solver['options'] or {})
+    limit = settings.PLANNING_PARETO_TIME_LIMIT
+    if limit and not (options.get('time_limit') and options['time_limit'] <= limit):
+        options['time_limit'] = limit
+    return dict(solver, options=options)
+
+def create_pareto(input_date, min_values, max_values, measures, points):
+    """Returns the Pareto front of the measures of the date, see PlanningSession.paretoFront, which is cached like the results"""
+    check_pareto(measures, points)
+    instance = planning_inputs(input_date, min_values, max_values)
+    key = 'planning_pareto_%s' % instance_hash(instance, {'measures': measures, 'points': points}, pareto_settings())
+    front = caches['planning'].get(key)
+    if front is None:
+        front = PlanningSession(**instance, **pareto_settings()).paretoFront(measures, points)
+        caches['planning'].set(key, front)
+    return front
+
+def planning_context(input_date, skills, results):
+    """Returns the context of the result page of one date from the result per objective"""
+    max_output = results['output']
+    max_gross_profit = results['gross_profit']
+    max_preferences = results['preference']
+    max_progression = results['skill_progression']
+
+    # Radar chart setup
+    measure_results = {}
+    measures = ['output', 'preference', 'gross_profit', 'skill_progression']
+    for measure in measures:
+        outputs = [max_output[1][measure], max_preferences[1][measure], max_gross_profit[1][measure], max_progression[1][measure]]
+        outputs_perc = []
+        for output in outputs:
+            if round(max(outputs)) == 0:
+                outputs_perc.append(0)
+            else:
+                outputs_perc.append(round(output / max(outputs) * 100))
+        measure_results[measure] = outputs_perc
+
+
+    return {'date': input_date, 'skills': skills, 'max_output': max_output[0], 'max_output_measures': max_output[1], 'max_output_participation': round(max_output[2]*100), 'measures': measure_results, 'max_gross_profit': max_gross_profit[0], 'max_gross_profit_measures': max_gross_profit[1], 'max_gross_profit_participation': round(max_gross_profit[2]*100), 'max_preferences': max_preferences[0], 'max_preferences_measures': max_preferences[1], 'max_preferences_participation': round(max_preferences[2]*100), 'max_progression': max_progression[0], 'max_progression_measures': max_progression[1], 'max_progression_participation': round(max_progression[2]*100)}
+
+def create_horizon_planning(start_date, end_date, min_values, max_values, weekly_min=None, weekly_max=None):
+    """Description of the function
+
+    Solves the planning of every date with availabilities from start_date up to and including end_date under the four objectives.
+    Without weekly targets the dates are independent: the cache is used per date and the other dates are solved in parallel.
+    With weekly targets (the output per skill per ISO week) the dates are solved jointly in one model.
+
+    Parameters:
+    start_date (str): first date in YYYY-MM-DD
+    end_date (str): last date in YYYY-MM-DD
+    min_values (dict): dictionary of the minimum required output per skill per date
+    max_values (dict): dictionary of the maximum required output per skill per date
+    weekly_min (dict): dictionary of the minimum required output per skill per week
+    weekly_max (dict): dictionary of the maximum required output per skill per week
+
+    Returns:
+    dict: context of the horizon result page
+
+    """
+
+    dates = Availability.objects.filter(date__gte=start_date, date__lte=end_date).values_list('date', flat=True).distinct().order_by('date')
+    instances = {str(date): planning_inputs(date, min_values, max_values) for date in dates}
+    objectives = ['output', 'gross_profit', 'preference', 'skill_progression']
+    starts_cache = caches['planning']
+    starts = {date: starts_cache.get('planning_starts_%s' % date) or {} for date in instances}
+
+    if weekly_min or weekly_max:
+        results = solveHorizon(instances, objectives, processes=settings.PLANNING_PROCESSES, period_min=weekly_min, period_max=weekly_max, starts=starts, **solver_settings())
+    else:
+        # Every date is the same planning as create_planning, hence the results of the same inputs are taken from the cache
+        result_cache = ResultCache(solver=solver_settings())
+        results = {date: {objective: result_cache.get(instance, objective) for objective in objectives} for date, instance in instances.items()}
+        unsolved = {date: instance for date, instance in instances.items() if None in results[date].values()}
+        for date, solved in solveHorizon(unsolved, objectives, processes=settings.PLANNING_PROCESSES, starts=starts, **solver_settings()).items():
+            for objective in objectives:
+                result_cache.set(instances[date], objective, solved[objective])
+            results[date] = solved
+
+    days = []
+    totals = {objective: {} for objective in objectives}
+    for date, instance in instances.items():
+        starts_cache.set('planning_starts_%s' % date, {objective: result[0] for objective, result in results[date].items()}, 60 * 60 * 24)
+        day = planning_context(date, instance['skills'], results[date])
+        day['timetables'] = [['Output maximization', day['max_output']], ['Gross profit maximization', day['max_gross_profit']], ['Preference maximization', day['max_preferences']], ['Progression maximization', day['max_progression']]]
+        days.append(day)
+        for objective in objectives:
+            for measure, value in results[date][objective][1].items():
+                totals[objective][measure] = round(totals[objective].get(measure, 0) + value, 2)
+
+    return {'start_date': start_date, 'end_date': end_date, 'skills': [skill.name for skill in Skills.objects.all()], 'weekly': bool(weekly_min or weekly_max), 'days': days, 'max_output_totals': totals['output'], 'max_preferences_totals': totals['preference'], 'max_gross_profit_totals': totals['gross_profit'], 'max_progression_totals': totals['skill_progression']}
+
+def worker_name():
+    """Returns the name of this worker process, which is stored on the jobs it claims"""
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+def claim_job(worker, pk=None):
+    """Description of the function
+
+    Claims the oldest queued planning job. The status is changed with a conditional UPDATE, of which only
+    one worker process can succeed, hence several workers never claim the same job.
+
+    Parameters:
+    worker (str): name of the worker process
+    pk (int): claim this job instead of the oldest one
+
+    Returns:
+    PlanningJob: the claimed job, None if no job is queued
+
+    """
+
+    queued = PlanningJob.objects.filter(status=PlanningJob.QUEUED)
+    if pk is not None:
+        queued = queued.filter(pk=pk)
+    for pk in queued.order_by('created').values_list('pk', flat=True)[:10]:
+        claimed = PlanningJob.objects.filter(pk=pk, status=PlanningJob.QUEUED).update(status=PlanningJob.RUNNING, worker=worker, started=timezone.now(), heartbeat=timezone.now())
+        if claimed:
+            return PlanningJob.objects.get(pk=pk)
+    return None
+
+def run_job(job):
+    """Creates the planning of a claimed job and stores the result or the error on the job, of which the heartbeat is kept while it runs"""
+    parameters = json.loads(job.parameters)
+    progress = Progress(job.id)
+    try:
+        with Heartbeat(job.id, HEARTBEAT):
+            if 'pareto_of' in parameters:
+                result = {'measures': parameters['measures'], 'points': create_pareto(parameters['date'], parameters['min_values'], parameters['max_values'], parameters['measures'], parameters['points'])}
+            elif 'repair_of' in parameters:
+                previous = PlanningJob.objects.get(pk=parameters['repair_of'])
+                result = create_repair(parameters['date'], parameters['min_values'], parameters['max_values'], json.loads(previous.result), parameters['delta'], parameters.get('penalty', 0), progress)
+                result['repair']['of'] = previous.pk
+            elif 'end_date' in parameters:
+                result = create_horizon_planning(parameters['date'], parameters['end_date'], parameters['min_values'], parameters['max_values'], parameters.get('weekly_min'), parameters.get('weekly_max'))
+            else:
+                result = create_planning(parameters['date'], parameters['min_values'], parameters['max_values'], progress)
+    except Exception:
+        job.status = PlanningJob.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.status = PlanningJob.DONE
+        job.result = json.dumps(result, cls=DjangoJSONEncoder)
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished'])
+    progress.publish('done', {'status': job.get_status_display()})
+    return job
+
+# Seconds between two heartbeats of a running job, far below the minutes after which a job is stale
+HEARTBEAT = 60
+
+def requeue_stale_jobs(minutes):
+    """Queues the jobs again of which the heartbeat is older than the given minutes, because their worker was stopped"""
+    stale = timezone.now() - datetime.timedelta(minutes=minutes)
+    running = PlanningJob.objects.filter(status=PlanningJob.RUNNING)
+    return running.filter(Q(heartbeat__lt=stale) | Q(heartbeat__isnull=True, started__lt=stale)).update(status=PlanningJob.QUEUED, worker='', started=None, heartbeat=None)
@@ -0,0 +1,53 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from django.db import connection
+
+# Every planning and every solve is logged as one line with a JSON document, e.g. to find out where the time of a slow planning goes
+logger = logging.getLogger('planning')
+
+class Profile:
+	"""Description of the class
+
+	Wall time per phase of a planning (e.g. inputs, model, write, solve, load, results) and other values of interest,
+	such as the number of variables, the solver status and the number of SQL queries.
+
+	"""
+
+	def __init__(self):
+		self.phases = {}
+		self.values = {}
+
+	@contextmanager
+	def phase(self, name):
+		"""Adds the wall time of the block to the phase"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+	@contextmanager
+	def queries(self):
+		"""Counts the SQL queries of the block on the default database"""
+		def count(execute, sql, params, many, context):
+			self.values['queries'] = self.values.get('queries', 0) + 1
+			return execute(sql, params, many, context)
+		self.values.setdefault('queries', 0)
+		with connection.execute_wrapper(count):
+			yield
+
+	def add(self, stats):
+		"""Adds the phases and values of the stats of a solver backend, see asDict"""
+		for name, seconds in stats.get('phases', {}).items():
+			self.phases[name] = self.phases.get(name, 0) + seconds
+		self.values.update({key: value for key, value in stats.items() if key != 'phases'})
+
+	def asDict(self):
+		"""Returns the phases in seconds (rounded to 0.1 ms) and the values as a JSON-able dict"""
+		return dict(self.values, phases={name: round(seconds, 4) for name, seconds in self.phases.items()})
+
+	def log(self, event, **fields):
+		"""Writes the profile as one structured log line"""
+		logger.info('%s %s', event, json.dumps(dict(self.asDict(), **fields), sort_keys=True, default=str))
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+# Lines of the cbc log with a new planning (incumbent) or a new bound. cbc minimizes, hence the maximized measures are negative.
+INCUMBENT = re.compile(r'Cbc00(?:04|12)I Integer solution of (-?[\d.]+)')
+BOUND = re.compile(r'best possible (-?[\d.]+)')
+
+class Progress:
+	"""Description of the class
+
+	The events of a planning job (phases, incumbents and the result per objective), which the result page streams while the job runs.
+	The events are kept in the 'planning' cache, which is shared by the worker process that writes them and the web processes that read them.
+	Every event is a cache entry of its own, such that publishing an event does not rewrite the previous ones.
+
+	Parameters:
+	job (int): primary key of the PlanningJob
+	alias (str): the cache of settings.CACHES
+
+	"""
+
+	TIMEOUT = 60 * 60
+
+	def __init__(self, job, alias='planning'):
+		self.cache = caches[alias]
+		self.key = 'planning_progress_%d' % job
+		self.lock = threading.Lock()
+		self.solved = set() # The objectives of which the result is published
+
+	def publish(self, event, data=None):
+		"""Appends an event, e.g. publish('phase', {'phase': 'solve'})"""
+		with self.lock:
+			# After its result, the incumbents of an objective are old news
+			if event == 'incumbent' and data['objective'] in self.solved:
+				return
+			if event == 'result':
+				self.solved.add(data['objective'])
+			index = self.cache.get(self.key, 0)
+			self.cache.set('%s_%d' % (self.key, index), {'event': event, 'data': data or {}, 'time': time.time()}, self.TIMEOUT)
+			self.cache.set(self.key, index + 1, self.TIMEOUT)
+
+	def events(self, since=0):
+		"""Returns the events from index since on"""
+		count = self.cache.get(self.key, 0)
+		if count <= since:
+			return []
+		keys = ['%s_%d' % (self.key, index) for index in range(since, count)]
+		found = self.cache.get_many(keys)
+		return [found[key] for key in keys if key in found]
+
+	@contextmanager
+	def watch(self, objectives):
+		"""Yields a solver log file per objective, of which a LogWatcher publishes the incumbents while the block runs"""
+		directory = tempfile.mkdtemp(prefix='planning_')
+		logfiles = {objective: os.path.join(directory, '%s.log' % objective) for objective in objectives}
+		watcher = LogWatcher(self, logfiles)
+		watcher.start()
+		try:
+			yield logfiles
+		finally:
+			watcher.stop()
+			shutil.rmtree(directory, ignore_errors=True)
+
+class NoProgress:
+	"""Progress of a planning that nobody follows, e.g. of the management commands"""
+
+	def publish(self, event, data=None):
+		pass
+
+	@contextmanager
+	def watch(self, objectives):
+		yield None
+
+class LogWatcher(threading.Thread):
+	"""Description of the class
+
+	Follows the solver logs of the objectives while they are solved (see PyomoBackend.logfile) and publishes every better planning
+	and bound as an 'incumbent' event. The logs can be written by other processes, e.g. by the process pool of solveObjectives.
+
+	Parameters:
+	progress (Progress): where the events are published
+	logfiles (dict): path of the log per objective
+
+	"""
+
+	def __init__(self, progress, logfiles, interval=0.25):
+		super().__init__(daemon=True)
+		self.progress = progress
+		self.logfiles = logfiles
+		self.interval = interval
+		self.stopped = threading.Event()
+		self.positions = {objective: 0 for objective in logfiles}
+		self.values = {objective: (None, None) for objective in logfiles}
+
+	def run(self):
+		try:
+			while not self.stopped.wait(self.interval):
+				self.read()
+			self.read()
+		finally:
+			connection.close() # The thread has a database connection of its own
+
+	def stop(self):
+		self.stopped.set()
+		self.join()
+
+	def read(self):
+		"""Publishes the incumbent and the bound of the new complete lines of every log"""
+		for objective, path in self.logfiles.items():
+			if objective in self.progress.solved or not os.path.exists(path):
+				continue
+			with open(path) as log:
+				log.seek(self.positions[objective])
+				lines = log.read()
+			complete = lines.rfind('\n') + 1
+			self.positions[objective] += len(lines[:complete].encode())
+			value, bound = self.values[objective]
+			for line in lines[:complete].splitlines():
+				incumbent, possible = INCUMBENT.search(line), BOUND.search(line)
+				value = abs(float(incumbent.group(1))) if incumbent else value
+				bound = abs(float(possible.group(1))) if possible else bound
+			if (value, bound) != self.values[objective] and value is not None:
+				self.values[objective] = (value, bound)
+				self.progress.publish('incumbent', {'objective': objective, 'value': value, 'bound': bound})
+
+class Heartbeat(threading.Thread):
+	"""Description of the class
+
+	Stores the time on the heartbeat of a running planning job every interval while the block of the worker runs, such that
+	a job of which the worker was stopped is recognized by its old heartbeat (see requeue_stale_jobs), however long a solve takes.
+
+	Parameters:
+	job (int): primary key of the PlanningJob
+	interval (float): seconds between two heartbeats
+
+	"""
+
+	def __init__(self, job, interval=60):
+		super().__init__(daemon=True)
+		self.job = job
+		self.interval = interval
+		self.stopped = threading.Event()
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *exception):
+		self.stopped.set()
+		self.join()
+
+	def run(self):
+		# Avoid a circular import, the models are loaded after this module
+		from .models import PlanningJob
+		try:
+			while not self.stopped.wait(self.interval):
+				PlanningJob.objects.filter(pk=self.job).update(heartbeat=timezone.now())
+		finally:
+			connection.close() # The thread has a database connection of its own
+
+def stream(progress, done, since=0, interval=0.5, heartbeat=15, timeout=20):
+	"""Description of the function
+
+	Yields the events of a job as server-sent events, until the 'done' event or the timeout. The timeout is well inside the timeout of
+	a gunicorn worker, after it the browser reconnects within a second and resumes from its Last-Event-ID.
+
+	Parameters:
+	progress (Progress): the events of the job
+	done (function): returns whether the job has finished, for a job of which the events are gone (e.g. expired)
+	since (int): index of the first event, i.e. the Last-Event-ID of the browser plus one
+
+	Returns:
+	generator: the text of the events
+
+	"""
+
+	start = last = checked = time.monotonic()
+	yield 'retry: 1000\n\n'
+	while time.monotonic() - start < timeout:
+		events = progress.events(since)
+		for event in events:
+			yield 'id: %d\nevent: %s\ndata: %s\n\n' % (since, event['event'], json.dumps(event['data']))
+			since += 1
+			if event['event'] == 'done':
+				return
+		now = time.monotonic()
+		if events:
+			last = now
+		elif now - checked > 2:
+			# Without new events, the job may have finished without them
+			checked = now
+			if done():
+				yield 'event: done\ndata: {}\n\n'
+				return
+		if now - last > heartbeat:
+			yield ': heartbeat\n\n'
+			last = now
+		time.sleep(interval)
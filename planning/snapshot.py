@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import WorkerSkills, ProductivitySnapshot
+
+# The productivity of every worker and skill as of a date is one indexed range query on ProductivitySnapshot, instead of the latest
+# WorkerSkills per worker and skill. The snapshot is kept up to date when a WorkerSkills is saved or deleted. Bulk changes that skip
+# the signals, e.g. QuerySet.update or loaddata, are followed by python manage.py productivitysnapshot.
+
+def intervals(observations):
+	"""Description of the function
+
+	Parameters:
+	observations (iterable): dicts with worker, skill, date and productivity, sorted by worker, skill and date
+
+	Returns:
+	list: a ProductivitySnapshot per observation, valid up to the next observation of the same worker and skill
+
+	"""
+
+	rows = []
+	for observation in observations:
+		pair = (observation['worker'], observation['skill'])
+		if rows and (rows[-1].worker_id, rows[-1].skill_id) == pair:
+			rows[-1].valid_to = observation['date']
+		rows.append(ProductivitySnapshot(worker_id=pair[0], skill_id=pair[1], productivity=observation['productivity'], valid_from=observation['date']))
+	return rows
+
+def refresh(worker, skill):
+	"""Builds the snapshot of one worker and skill again from its WorkerSkills"""
+	with transaction.atomic():
+		ProductivitySnapshot.objects.filter(worker=worker, skill=skill).delete()
+		observations = WorkerSkills.objects.filter(worker=worker, skill=skill).order_by('date').values('worker', 'skill', 'date', 'productivity')
+		ProductivitySnapshot.objects.bulk_create(intervals(observations))
+
+def rebuild(pairs=None):
+	"""Description of the function
+
+	Builds the snapshot again from WorkerSkills, of every worker and skill or of the workers and skills of the pairs, e.g. after an import.
+
+	Parameters:
+	pairs (set): (worker id, skill id) of which the snapshot is built again, all by default
+
+	Returns:
+	int: the number of rows
+
+	"""
+
+	snapshots, observations = ProductivitySnapshot.objects.all(), WorkerSkills.objects.all()
+	if pairs is not None:
+		# The workers and skills of the pairs, which may hold a few more pairs, of which the snapshot is the same when it is built again
+		workers, skills = {worker for worker, skill in pairs}, {skill for worker, skill in pairs}
+		snapshots = snapshots.filter(worker__in=workers, skill__in=skills)
+		observations = observations.filter(worker__in=workers, skill__in=skills)
+	with transaction.atomic():
+		snapshots.delete()
+		observations = observations.order_by('worker', 'skill', 'date').values('worker', 'skill', 'date', 'productivity')
+		rows = intervals(observations.iterator())
+		ProductivitySnapshot.objects.bulk_create(rows, batch_size=1000)
+	return len(rows)
+
+def as_of(date):
+	"""Returns the snapshot rows that are valid on the date, i.e. the latest productivity on or before the date of every worker and skill"""
+	return ProductivitySnapshot.objects.filter(Q(valid_to__gt=date) | Q(valid_to__isnull=True), valid_from__lte=date)
+
+@receiver(pre_save, sender=WorkerSkills)
+def remember_pair(sender, instance, **kwargs):
+	# A changed worker or skill leaves the snapshot of the previous pair to refresh
+	instance._snapshot_pair = WorkerSkills.objects.filter(pk=instance.pk).values_list('worker', 'skill').first() if instance.pk else None
+
+@receiver(post_save, sender=WorkerSkills)
+def workerskills_saved(sender, instance, raw=False, **kwargs):
+	if raw:
+		return # loaddata, followed by a rebuild
+	previous = getattr(instance, '_snapshot_pair', None)
+	if previous and previous != (instance.worker_id, instance.skill_id):
+		refresh(*previous)
+	refresh(instance.worker_id, instance.skill_id)
+
+@receiver(post_delete, sender=WorkerSkills)
+def workerskills_deleted(sender, instance, **kwargs):
+	refresh(instance.worker_id, instance.skill_id)
@@ -1,9 +1,14 @@
-from pyomo.environ import *
-from pyomo.opt import SolverFactory
+import datetime
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from scipy.optimize import curve_fit
 import numpy as np
 import pyutilib.subprocess.GlobalData
 pyutilib.subprocess.GlobalData.DEFINE_SIGNAL_HANDLERS_DEFAULT = False # To make sure it works on Django
+from .matrix import PlanningMatrices, HorizonMatrices, OBJECTIVES
+from .backends import solverBackend, SolverError
+from .profiling import Profile
 
 class ProgressFit:
 	
@@ -16,7 +21,70 @@ class ProgressFit:
 
 		return fit
 
+def progressionFit(group, dates, productivity, groups, asof=None):
+	"""Description of the function
+
+	Fits productivity = a * ln(days since the first observation) + b for every worker and skill at once. The line is the closed-form
+	least squares solution of sums per group, instead of a curve_fit per worker and skill as ProgressFit. The first observation of a group is at x = 0.
+
+	Parameters:
+	group (array): the group (e.g. worker and skill) of every observation, from 0 to groups - 1
+	dates (array): the date of every observation
+	productivity (array): the productivity of every observation
+	groups (int): the number of groups
+	asof (date): only the observations on or before this date are used, all observations by default
+
+	Returns:
+	array: the progression a / max(x) of every group, 0.5 for a group with one observation or with max(x) = 0, 0 for a group without observations
+
+	"""
+
+	group = np.asarray(group, dtype=int)
+	days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+	productivity = np.asarray(productivity, dtype=float)
+	if asof is not None:
+		kept = days <= np.datetime64(asof, 'D').astype(np.int64)
+		group, days, productivity = group[kept], days[kept], productivity[kept]
+
+	first = np.full(groups, np.iinfo(np.int64).max)
+	np.minimum.at(first, group, days)
+	elapsed = days - first[group]
+	x = np.where(elapsed > 0, np.log(np.maximum(elapsed, 1)), 0)
+	count = np.bincount(group, minlength=groups)
+	last = np.zeros(groups)
+	np.maximum.at(last, group, x)
+
+	# Slope of the least squares line from the sums of the deviations from the mean per group
+	mean_x = np.bincount(group, weights=x, minlength=groups) / np.maximum(count, 1)
+	mean_y = np.bincount(group, weights=productivity, minlength=groups) / np.maximum(count, 1)
+	dx, dy = x - mean_x[group], productivity - mean_y[group]
+	sxx = np.bincount(group, weights=dx * dx, minlength=groups)
+	sxy = np.bincount(group, weights=dx * dy, minlength=groups)
+	slope = np.divide(sxy, sxx, out=np.zeros(groups), where=sxx > 0)
+	# Take the slope of the last (maximum) value of a*ln(x)+b, which is a/x, value is 0.5 if division by zero (i.e., when x = 0)
+	progression = np.divide(slope, last, out=np.full(groups, 0.5), where=last > 0)
+	progression[count == 1] = 0.5
+	progression[count == 0] = 0
+	return progression
+
 class Optimize:
+	"""Description of the class
+
+	Parameters:
+	solver (str): 'cbc', 'glpk', 'highs' or another solver in Pyomo's SolverFactory, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+	aggregate (bool): group interchangeable workers into classes, see PlanningMatrices
+
+	After a solve, stats holds the wall time per phase, the size of the model, the solver status and the MIP gap, see PlanningSession.
+
+	"""
+
+	def __init__(self, solver='cbc', options=None, aggregate=False):
+		self.solver = solver
+		self.options = options
+		self.aggregate = aggregate
+		self.stats = None
+
 	def maxOutput(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
 		"""Description of the function
 
@@ -42,131 +110,7 @@ class Optimize:
 
 		"""
 
-		warnings = []
-		model = ConcreteModel()
-		model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts),
-			within=Binary, initialize=0)
-
-		def obj_function(m):
-			total = 0
-			for skill in skills:
-				for shift in shifts:
-					total += sum(m.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
-			return total
-
-		model.obj = Objective(rule=obj_function, sense=maximize)
-
-		model.constraints = ConstraintList()
-
-		# Constraints
-		# Max one task per worker per timeslot
-
-		for shift in shifts:
-			for worker in workers:
-				model.constraints.add(
-					1 >= sum(model.works[skill, worker, shift] for skill in skills)
-				)
-
-		# Dot not plan when the worker is not available
-		for worker, timeslot in availability.items():
-			for key in timeslot:
-				if timeslot[key] == 0:
-					model.constraints.add(
-						0 == sum(model.works[skill, worker, key] for skill in skills)
-					)
-
-		# Maximum number of workplaces per shift
-		for shift in shifts:
-			for skill in skills:
-				model.constraints.add(
-					max_workplaces[skill] >= sum(model.works[skill, worker, shift] for worker in workers)
-				)
-
-		# Output per skill cannot be higher than the provided max number
-		model.outputSet = Set(initialize=skills)
-		def skills_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp <= max_values[skill]
-		model.sr = Constraint(model.outputSet, rule=skills_rule)
-
-		# Output per skill must be higher than the provided min value
-		model.outputMinSet = Set(initialize=skills)
-		def skills_min_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp >= min_values[skill]
-		model.smr = Constraint(model.outputMinSet, rule=skills_min_rule)
-
-		# Solver
-		opt = SolverFactory('cbc')  # cbc solver as it is open-source
-		results = opt.solve(model)
-
-		# Outputs
-		def timetable(works):
-		    table = {shift: {skill: [] for skill in skills} for shift in shifts}
-		    for worker in workers:
-		    	for skill in skills:
-		    		for shift in shifts:
-		    			if works[skill, worker, shift].value == 1:
-		    				table[shift][skill].append(worker)
-		    return table
-
-		def participation(works):
-			total = 0
-			for worker in availability:
-				for shift in shifts:
-					if availability[worker][shift] == 1:
-						total += 1
-
-			deployed = 0
-			for worker in workers:
-				for skill in skills:
-					for shift in shifts:
-						if works[skill, worker, shift].value == 1:
-							deployed += 1
-			return (deployed/total)
-
-		def output(works):
-			var = 0
-			for skill in skills:
-					for shift in shifts:
-						var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
-			return round(var,2)
-		
-		def preference(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		def grossprofit(works):
-			var = 0
-			for skill in skills:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
-			return round(var,2)
-
-		def skillprogression(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*progression[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		for skill in max_values:
-			total = 0
-			for shift in shifts:
-				for worker in workers:
-					total += model.works[skill, worker, shift].value * workerskills[worker][skill] * shift_lengths[shift]
-			warnings.append(total)
-
-		return [timetable(model.works), {'output': output(model.works), 'preference': preference(model.works), 'gross_profit': grossprofit(model.works), 'skill_progression': skillprogression(model.works)}, participation(model.works)]
+		return self.solve('output', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
 
 	def maxGrossProfit(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
 		"""Description of the function
@@ -193,123 +137,7 @@ class Optimize:
 
 		"""
 
-		model = ConcreteModel()
-		model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts),
-			within=Binary, initialize=0)
-
-		def obj_function(m):
-			total = 0
-			for skill in skills:
-				for shift in shifts:
-					total += sum(m.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
-			return total
-
-		model.obj = Objective(rule=obj_function, sense=maximize)
-
-		model.constraints = ConstraintList()
-
-		# Constraints
-		# Max one task per worker per timeslot
-
-		for shift in shifts:
-			for worker in workers:
-				model.constraints.add(
-					1 >= sum(model.works[skill, worker, shift] for skill in skills)
-				)
-
-		# Dot not plan when the worker is not available
-		for worker, timeslot in availability.items():
-			for key in timeslot:
-				if timeslot[key] == 0:
-					model.constraints.add(
-						0 == sum(model.works[skill, worker, key] for skill in skills)
-					)
-
-		# Maximum number of workplaces per shift
-		for shift in shifts:
-			for skill in skills:
-				model.constraints.add(
-					max_workplaces[skill] >= sum(model.works[skill, worker, shift] for worker in workers)
-				)
-
-		# Output per skill cannot be higher than the provided max value
-		model.outputSet = Set(initialize=skills)
-		def skills_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp <= max_values[skill]
-		model.sr = Constraint(model.outputSet, rule=skills_rule)
-
-		# Output per skill must be higher than the provided min value
-		model.outputMinSet = Set(initialize=skills)
-		def skills_min_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp >= min_values[skill]
-		model.smr = Constraint(model.outputMinSet, rule=skills_min_rule)
-
-		# Solver
-		opt = SolverFactory('cbc')  # cbc solver as it is open-source
-		results = opt.solve(model)
-
-		# Outputs
-		def timetable(works):
-		    table = {shift: {skill: [] for skill in skills} for shift in shifts}
-		    for worker in workers:
-		    	for skill in skills:
-		    		for shift in shifts:
-		    			if works[skill, worker, shift].value == 1:
-		    				table[shift][skill].append(worker)
-		    return table
-
-		def participation(works):
-			total = 0
-			for worker in availability:
-				for shift in shifts:
-					if availability[worker][shift] == 1:
-						total += 1
-
-			deployed = 0
-			for worker in workers:
-				for skill in skills:
-					for shift in shifts:
-						if works[skill, worker, shift].value == 1:
-							deployed += 1
-			return (deployed/total)
-
-		def output(works):
-			var = 0
-			for skill in skills:
-					for shift in shifts:
-						var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
-			return round(var,2)
-		
-		def preference(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		def grossprofit(works):
-			var = 0
-			for skill in skills:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
-			return round(var,2)
-
-		def skillprogression(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*progression[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		return [timetable(model.works), {'output': output(model.works), 'preference': preference(model.works), 'gross_profit': grossprofit(model.works), 'skill_progression': skillprogression(model.works)}, participation(model.works)]
+		return self.solve('gross_profit', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
 
 	def maxPreferences(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
 		"""Description of the function
@@ -336,123 +164,7 @@ class Optimize:
 
 		"""
 
-		model = ConcreteModel()
-		model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts),
-			within=Binary, initialize=0)
-
-		def obj_function(m):
-			total = 0
-			for worker in workers:
-				for shift in shifts:
-					total += sum(m.works[skill, worker, shift]*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
-			return total
-
-		model.obj = Objective(rule=obj_function, sense=maximize)
-
-		model.constraints = ConstraintList()
-
-		# Constraints
-		# Max one task per worker per timeslot
-
-		for shift in shifts:
-			for worker in workers:
-				model.constraints.add(
-					1 >= sum(model.works[skill, worker, shift] for skill in skills)
-				)
-
-		# Dot not plan when the worker is not available
-		for worker, timeslot in availability.items():
-			for key in timeslot:
-				if timeslot[key] == 0:
-					model.constraints.add(
-						0 == sum(model.works[skill, worker, key] for skill in skills)
-					)
-
-		# Maximum number of workplaces per shift
-		for shift in shifts:
-			for skill in skills:
-				model.constraints.add(
-					max_workplaces[skill] >= sum(model.works[skill, worker, shift] for worker in workers)
-				)
-
-		# Output per skill cannot be higher than the provided max value
-		model.outputSet = Set(initialize=skills)
-		def skills_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp <= max_values[skill]
-		model.sr = Constraint(model.outputSet, rule=skills_rule)
-
-		# Output per skill must be higher than the provided min value
-		model.outputMinSet = Set(initialize=skills)
-		def skills_min_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp >= min_values[skill]
-		model.smr = Constraint(model.outputMinSet, rule=skills_min_rule)
-
-		# Solver
-		opt = SolverFactory('cbc')  # cbc solver as it is open-source
-		results = opt.solve(model)
-
-		# Outputs
-		def timetable(works):
-		    table = {shift: {skill: [] for skill in skills} for shift in shifts}
-		    for worker in workers:
-		    	for skill in skills:
-		    		for shift in shifts:
-		    			if works[skill, worker, shift].value == 1:
-		    				table[shift][skill].append(worker)
-		    return table
-
-		def participation(works):
-			total = 0
-			for worker in availability:
-				for shift in shifts:
-					if availability[worker][shift] == 1:
-						total += 1
-
-			deployed = 0
-			for worker in workers:
-				for skill in skills:
-					for shift in shifts:
-						if works[skill, worker, shift].value == 1:
-							deployed += 1
-			return (deployed/total)
-
-		def output(works):
-			var = 0
-			for skill in skills:
-					for shift in shifts:
-						var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
-			return round(var,2)
-		
-		def preference(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		def grossprofit(works):
-			var = 0
-			for skill in skills:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
-			return round(var,2)
-
-		def skillprogression(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*progression[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		return [timetable(model.works), {'output': output(model.works), 'preference': preference(model.works), 'gross_profit': grossprofit(model.works), 'skill_progression': skillprogression(model.works)}, participation(model.works)]
+		return self.solve('preference', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
 
 	def maxProgression(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
 		"""Description of the function
@@ -479,120 +191,401 @@ class Optimize:
 
 		"""
 
-		model = ConcreteModel()
-		model.works = Var(((skill, worker, shift) for worker in workers for skill in skills for shift in shifts),
-			within=Binary, initialize=0)
-
-		def obj_function(m):
-			total = 0
-			for worker in workers:
-				for shift in shifts:
-					total += sum(m.works[skill, worker, shift]*progression[worker][skill] for skill in skills) * shift_lengths[shift]
-			return total
-
-		model.obj = Objective(rule=obj_function, sense=maximize)
-
-		model.constraints = ConstraintList()
-
-		# Constraints
-		# Max one task per worker per timeslot
-
-		for shift in shifts:
-			for worker in workers:
-				model.constraints.add(
-					1 >= sum(model.works[skill, worker, shift] for skill in skills)
-				)
-
-		# Dot not plan when the worker is not available
-		for worker, timeslot in availability.items():
-			for key in timeslot:
-				if timeslot[key] == 0:
-					model.constraints.add(
-						0 == sum(model.works[skill, worker, key] for skill in skills)
-					)
-
-		# Maximum number of workplaces per shift
-		for shift in shifts:
-			for skill in skills:
-				model.constraints.add(
-					max_workplaces[skill] >= sum(model.works[skill, worker, shift] for worker in workers)
-				)
-
-		# Output per skill cannot be higher than the provided max value
-		model.outputSet = Set(initialize=skills)
-		def skills_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp <= max_values[skill]
-		model.sr = Constraint(model.outputSet, rule=skills_rule)
-
-		# Output per skill must be higher than the provided min value
-		model.outputMinSet = Set(initialize=skills)
-		def skills_min_rule(model, skill):
-			temp = sum(sum(model.works[skill, worker, shift]*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] for shift in shifts)
-			if type(temp) is float: # Not every combination of skills, workers, and shifts, multiplied by workerskills appear in the matrix. Hence, in that case: skip the constraint.
-				return Constraint.Skip
-			else:
-				return temp >= min_values[skill]
-		model.smr = Constraint(model.outputMinSet, rule=skills_min_rule)
-
-		# Solver
-		opt = SolverFactory('cbc')  # cbc solver as it is open-source
-		results = opt.solve(model)
-
-		# Outputs
-		def timetable(works):
-		    table = {shift: {skill: [] for skill in skills} for shift in shifts}
-		    for worker in workers:
-		    	for skill in skills:
-		    		for shift in shifts:
-		    			if works[skill, worker, shift].value == 1:
-		    				table[shift][skill].append(worker)
-		    return table
-
-		def participation(works):
-			total = 0
-			for worker in availability:
-				for shift in shifts:
-					if availability[worker][shift] == 1:
-						total += 1
-
-			deployed = 0
-			for worker in workers:
-				for skill in skills:
-					for shift in shifts:
-						if works[skill, worker, shift].value == 1:
-							deployed += 1
-			return (deployed/total)
-
-		def output(works):
-			var = 0
-			for skill in skills:
-					for shift in shifts:
-						var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift]
-			return round(var,2)
-		
-		def preference(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*preferences[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		def grossprofit(works):
-			var = 0
-			for skill in skills:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*workerskills[worker][skill] for worker in workers) * shift_lengths[shift] * gross_profit[skill]
-			return round(var,2)
-
-		def skillprogression(works):
-			var = 0
-			for worker in workers:
-				for shift in shifts:
-					var += sum(model.works[skill, worker, shift].value*progression[worker][skill] for skill in skills) * shift_lengths[shift]
-			return round(var,2)
-
-		return [timetable(model.works), {'output': output(model.works), 'preference': preference(model.works), 'gross_profit': grossprofit(model.works), 'skill_progression': skillprogression(model.works)}, participation(model.works)]
\ No newline at end of file
+		return self.solve('skill_progression', shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression)
+
+	def solve(self, objective, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression):
+		"""Description of the function
+
+		Parameters:
+		objective (str): the measure to maximize, one of 'output', 'preference', 'gross_profit' or 'skill_progression'
+		The other parameters are the same as for maxOutput.
+
+		Objective:
+		maximize the given measure based on the above-stated parameters
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		session = PlanningSession(shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression, self.solver, options=self.options, aggregate=self.aggregate)
+		result = session.solve(objective)
+		self.stats = session.stats[objective]
+		return result
+
+class PlanningSession:
+	"""Description of the class
+
+	Builds the feasible region of a planning instance once, such that it can be solved under several objectives.
+	Only the active objective is swapped between the solves, see backends.py.
+	Every solve starts from the best known assignment (MIP start): the solution of the previous objective or a given timetable.
+
+	Parameters:
+	The same as for Optimize.maxOutput, followed by
+	solver (str): 'cbc', 'glpk', 'highs' or another solver in Pyomo's SolverFactory
+	start (dict): timetable of a previous solve to start the first solve from
+	options (dict): time_limit, mip_gap and threads of the solver
+	aggregate (bool): group interchangeable workers into classes, see PlanningMatrices
+
+	After a solve, stats holds the wall time per phase, the size of the model, the solver status and the MIP gap per objective.
+
+	"""
+
+	def __init__(self, shifts, workers, skills, min_values, max_values, workerskills, availability, shift_lengths, max_workplaces, gross_profit, preferences, progression, solver='cbc', start=None, options=None, aggregate=False):
+		self.instance = {'shifts': shifts, 'workers': workers, 'skills': skills, 'min_values': min_values, 'max_values': max_values, 'workerskills': workerskills, 'availability': availability, 'shift_lengths': shift_lengths, 'max_workplaces': max_workplaces, 'gross_profit': gross_profit, 'preferences': preferences, 'progression': progression}
+
+		# The instance is turned into coefficient matrices in one pass, which are handed to the solver backend
+		self.profile = Profile()
+		with self.profile.phase('matrices'):
+			self.matrices = PlanningMatrices(aggregate=aggregate, **self.instance)
+		self.backend = solverBackend(solver, options)
+		self.stats = {}
+		self.start = None
+		if start:
+			self.setStart(start)
+
+	def setStart(self, timetable):
+		"""Seeds the next solve with the assignment of a timetable ({shift: {skill: [workers]}}), e.g. of a previous solve"""
+		self.start = self.matrices.assignment(timetable)
+
+	def solve(self, objective):
+		"""Description of the function
+
+		Parameters:
+		objective (str): the measure to maximize, one of 'output', 'preference', 'gross_profit' or 'skill_progression'
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		return self.profiled(objective, lambda: self.optimum(objective))
+
+	def repair(self, objective, timetable, shifts=(), skills=(), penalty=0):
+		"""Description of the function
+
+		Re-plans a published timetable after a change, e.g. a worker that called in sick. The assignments outside the affected
+		shifts and skills are pinned, only the affected shifts and skills are optimized again. The assignments that the change
+		made impossible (e.g. of an unavailable worker) are left out. When the pinned assignments cannot meet the minimum outputs anymore,
+		the whole planning is optimized again. An optional penalty per changed assignment keeps the planning close to the published one.
+
+		Parameters:
+		objective (str): the measure to maximize
+		timetable (dict): the published timetable ({shift: {skill: [workers]}})
+		shifts (list): the shifts that are affected by the change, e.g. of an unavailable worker or with a changed length
+		skills (list): the skills that are affected by the change, e.g. of a changed productivity
+		penalty (float): value of the measure that a changed assignment costs, 0 for no penalty. With aggregate, every worker of
+		a class that was planned on a skill and shift gets the penalty as bonus, which is exact for the binary model only.
+
+		Returns:
+		dict:timetable, dict:{output, preference, gross_profit, progression}, int:participation
+
+		"""
+
+		matrices = self.matrices
+		previous = matrices.assignment(timetable)
+		coefficients = objective
+		if penalty:
+			# -penalty * |x - previous| is linear for binaries: -penalty * x when it was not planned, +penalty * x (minus a constant) when it was
+			coefficients = matrices.objective(objective) + penalty * np.where(previous > 0, 1, -1)
+		free = np.isin(matrices.shift_idx, [matrices.shifts.index(shift) for shift in shifts]) | np.isin(matrices.skill_idx, [matrices.skills.index(skill) for skill in skills])
+		pinned = np.where(free, np.nan, previous)
+
+		def optimum():
+			self.start = previous
+			try:
+				return self.optimum(coefficients, pinned=pinned)
+			except SolverError:
+				return self.optimum(coefficients) # The pinned assignments are infeasible, e.g. a minimum output that the change made unreachable
+		return self.profiled(objective, optimum)
+
+	def profiled(self, objective, optimum):
+		"""Returns the results of the solution that optimum() returns, of which the phases are kept in stats and logged"""
+		# The first solve includes building the matrices
+		profile, self.profile = self.profile, Profile()
+		x = optimum()
+		profile.add(self.backend.stats)
+		with profile.phase('results'):
+			result = self.results(x)
+		self.stats[objective] = profile.asDict()
+		profile.log('solve', objective=objective)
+		return result
+
+	def optimum(self, objective, floors=None, pinned=None):
+		"""Returns the values of the decision variables of the optimum of the objective (a measure or coefficients) with a minimum per measure of floors and pinned values, see backends.py"""
+		x = self.backend.solve(self.matrices, objective, self.start, floors, pinned)
+		# The solution is feasible for every objective, hence it is the start of the next solve
+		self.start = x
+		return x
+
+	def paretoFront(self, measures, points=5):
+		"""Description of the function
+
+		Computes the trade-off between measures with the augmented epsilon-constraint method. The first measure is maximized,
+		while every other measure must be at least a value of a grid (epsilon) between its lowest value in the payoff table (its values at
+		the optima of the measures) and its own optimum. A small fraction of the other measures is added to the objective, such that no point
+		is dominated by another planning. The model and the previous solution (as MIP start) are reused between the points.
+
+		Parameters:
+		measures (list): two or more of the measures in OBJECTIVES, the first one is maximized
+		points (int): number of grid values per other measure, i.e. points ** (len(measures) - 1) solves after len(measures) solves of the payoff table
+
+		Returns:
+		list: one dict per point that is not dominated, with the value of every measure and the participation ('values') and the 'timetable'
+
+		"""
+
+		if len(measures) < 2 or len(set(measures)) != len(measures) or any(measure not in OBJECTIVES for measure in measures):
+			raise ValueError('Choose two or more different measures of %s' % ', '.join(OBJECTIVES))
+		primary, others = measures[0], list(measures[1:])
+		coefficients = {name: self.matrices.objective(name) for name in OBJECTIVES}
+
+		# Payoff table: the value of every measure at the optimum of every measure. Every other measure runs from its lowest value in
+		# the table up to its own optimum, such that with three or more measures the grid spans the whole front.
+		payoff = []
+		for name in measures:
+			x = self.optimum(name)
+			payoff.append({measure: coefficients[measure] @ x for measure in measures})
+		best = payoff[0][primary]
+		lowest = {name: min(row[name] for row in payoff) for name in others}
+		highest = {name: payoff[measures.index(name)][name] for name in others}
+		ranges = {name: max(highest[name] - lowest[name], 1e-9) for name in others}
+		augmented = coefficients[primary] + 1e-4 * max(abs(best), 1) * sum(coefficients[name] / ranges[name] for name in others) / len(others)
+
+		front = []
+		grid = [np.linspace(lowest[name], highest[name], points) if highest[name] > lowest[name] else [lowest[name]] for name in others]
+		for epsilon in itertools.product(*grid):
+			try:
+				x = self.optimum(augmented, dict(zip(others, epsilon)))
+			except SolverError:
+				continue # No planning meets every minimum, e.g. a combination of more than two measures
+			timetable, values, participation = self.results(x)
+			front.append({'values': dict(values, participation=round(participation * 100, 2)), 'timetable': timetable})
+
+		# Leave out the same and the dominated points
+		def dominates(a, b):
+			return all(a[name] >= b[name] for name in measures) and any(a[name] > b[name] for name in measures)
+		front = [point for i, point in enumerate(front) if not any(dominates(other['values'], point['values']) or (j < i and other['values'] == point['values']) for j, other in enumerate(front))]
+		return sorted(front, key=lambda point: [point['values'][name] for name in others])
+
+	def results(self, x):
+		"""Returns the timetable, the measures and the participation of a solution"""
+		return self.matrices.results(x)
+
+class HorizonSession(PlanningSession):
+	"""Description of the class
+
+	Plans a horizon of several days in one model, such that the days can share constraints: the output per skill of
+	every period (by default the ISO week) must be between period_min and period_max. Otherwise the same as PlanningSession.
+
+	Parameters:
+	instances (dict): the keyword arguments of Optimize.maxOutput per date
+	period_min (dict): dictionary of the minimum required output per skill per period
+	period_max (dict): dictionary of the maximum required output per skill per period
+	periods (dict): the period per date, the ISO week of the date by default
+	solver (str): 'cbc', 'glpk', 'highs' or another solver in Pyomo's SolverFactory
+	start (dict): timetable per date to start the first solve from
+	options (dict): time_limit, mip_gap and threads of the solver
+	aggregate (bool): group interchangeable workers into classes, see PlanningMatrices
+
+	"""
+
+	def __init__(self, instances, period_min=None, period_max=None, periods=None, solver='cbc', start=None, options=None, aggregate=False):
+		self.instances = instances
+		self.dates = list(instances)
+		periods = periods or {date: isoWeek(date) for date in self.dates}
+		self.profile = Profile()
+		with self.profile.phase('matrices'):
+			days = [PlanningMatrices(aggregate=aggregate, **instances[date]) for date in self.dates]
+			self.matrices = HorizonMatrices(days, [periods[date] for date in self.dates], period_min, period_max)
+		self.backend = solverBackend(solver, options)
+		self.stats = {}
+		self.start = None
+		if start:
+			self.setStart(start)
+
+	def setStart(self, timetables):
+		"""Seeds the next solve with a timetable per date"""
+		self.start = np.concatenate([day.assignment(timetables.get(date, {})) for date, day in zip(self.dates, self.matrices.days)])
+
+	def results(self, x):
+		"""Returns the timetable, the measures and the participation of a solution per date"""
+		return {date: day.results(part) for date, day, part in zip(self.dates, self.matrices.days, self.matrices.split(x))}
+
+def applyDelta(instance, delta):
+	"""Description of the function
+
+	Applies a change to the solver inputs of a date, e.g. a worker that called in sick after the planning was published.
+
+	Parameters:
+	instance (dict): the keyword arguments of Optimize.maxOutput, which are not changed
+	delta (dict): 'unavailable': [(worker, shift)], 'productivity': [(worker, skill, output per time unit)] and 'shift_lengths': [(shift, length)]
+
+	Returns:
+	dict: the changed instance, list: the affected shifts, list: the affected skills
+
+	"""
+
+	instance = dict(instance, availability={worker: dict(slots) for worker, slots in instance['availability'].items()}, workerskills={worker: dict(outputs) for worker, outputs in instance['workerskills'].items()}, shift_lengths=dict(instance['shift_lengths']))
+	shifts, skills = [], []
+	for worker, shift in delta.get('unavailable', []):
+		if worker not in instance['workers'] or shift not in instance['shifts']:
+			raise ValueError('Unknown worker %s or shift %s' % (worker, shift))
+		instance['availability'].setdefault(worker, {})[shift] = 0
+		shifts.append(shift)
+	for worker, skill, value in delta.get('productivity', []):
+		if worker not in instance['workers'] or skill not in instance['skills']:
+			raise ValueError('Unknown worker %s or skill %s' % (worker, skill))
+		instance['workerskills'][worker][skill] = value
+		skills.append(skill)
+	for shift, length in delta.get('shift_lengths', []):
+		if shift not in instance['shifts']:
+			raise ValueError('Unknown shift %s' % shift)
+		instance['shift_lengths'][shift] = length
+		shifts.append(shift)
+	return instance, list(dict.fromkeys(shifts)), list(dict.fromkeys(skills))
+
+def isoWeek(date):
+	"""Returns the (year, week) of a date or a YYYY-MM-DD string"""
+	if isinstance(date, str):
+		date = datetime.date.fromisoformat(date)
+	return tuple(date.isocalendar()[:2])
+
+def availableCores():
+	"""Returns the number of cores this process may run on"""
+	if hasattr(os, 'sched_getaffinity'):
+		return len(os.sched_getaffinity(0))
+	return os.cpu_count() or 1
+
+_pool = None
+
+def processPool(processes):
+	"""Returns the process pool of this process, which is created on first use with the processes (PLANNING_PROCESSES) capped by the
+	number of cores and kept for the next requests. A caller that runs fewer processes limits the tasks it submits, see boundedResults"""
+	global _pool
+	if _pool is None:
+		_pool = ProcessPoolExecutor(max_workers=max(1, min(processes, availableCores())))
+	return _pool
+
+def boundedResults(pool, function, tasks, processes):
+	"""Yields the key and the result of every task, a (key, arguments of the function) pair, as soon as it is done,
+	of which at most processes are submitted to the pool at the same time"""
+	tasks = iter(tasks)
+	pending = {pool.submit(function, *arguments): key for key, arguments in itertools.islice(tasks, processes)}
+	while pending:
+		done, _ = wait(pending, return_when=FIRST_COMPLETED)
+		for future in done:
+			key = pending.pop(future)
+			for next_key, arguments in itertools.islice(tasks, 1):
+				pending[pool.submit(function, *arguments)] = next_key
+			yield key, future.result()
+
+def solveObjective(instance, objective, start=None, solver='cbc', options=None, aggregate=False, logfile=None):
+	"""Returns the result of the objective and the stats of its solve, in a process of the pool"""
+	session = PlanningSession(start=start, solver=solver, options=options, aggregate=aggregate, **instance)
+	session.backend.logfile = logfile
+	return session.solve(objective), session.stats[objective]
+
+def solveObjectives(instance, objectives=OBJECTIVES, processes=1, starts=None, solver='cbc', options=None, aggregate=False, stats=None, callback=None, logfiles=None):
+	"""Description of the function
+
+	Solves the instance under every objective. The objectives do not depend on each other, hence they can be
+	dispatched to a bounded process pool. With one process (or one core) they are solved one after another in one PlanningSession.
+
+	Parameters:
+	instance (dict): the keyword arguments of Optimize.maxOutput
+	objectives (list): the measures to maximize
+	processes (int): the maximum number of processes that solve at the same time
+	starts (dict): timetable per objective to start from, e.g. of the previous solve of the same date
+	solver (str): the solver backend, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+	aggregate (bool): group interchangeable workers into classes, see PlanningMatrices
+	stats (dict): filled with the stats of PlanningSession per objective
+	callback (function): called with the objective and its result as soon as the objective is solved
+	logfiles (dict): the path per objective to which the log of a Pyomo solver is written while it solves
+
+	Returns:
+	dict: the result of PlanningSession.solve per objective
+
+	"""
+
+	starts = starts or {}
+	stats = {} if stats is None else stats
+	logfiles = logfiles or {}
+	callback = callback or (lambda objective, result: None)
+	if min(processes, len(objectives), availableCores()) <= 1:
+		# Without a previous timetable of the objective, the solve starts from the solution of the previous objective
+		session = PlanningSession(solver=solver, options=options, aggregate=aggregate, **instance)
+		results = {}
+		for objective in objectives:
+			if objective in starts:
+				session.setStart(starts[objective])
+			session.backend.logfile = logfiles.get(objective)
+			results[objective] = session.solve(objective)
+			callback(objective, results[objective])
+		stats.update(session.stats)
+		return results
+
+	tasks = ((objective, (instance, objective, starts.get(objective), solver, options, aggregate, logfiles.get(objective))) for objective in objectives)
+	results = {}
+	for objective, (result, stats[objective]) in boundedResults(processPool(processes), solveObjective, tasks, processes):
+		results[objective] = result
+		callback(objective, result)
+	return {objective: results[objective] for objective in objectives}
+
+def solveHorizonObjective(instances, objective, period_min=None, period_max=None, periods=None, start=None, solver='cbc', options=None, aggregate=False):
+	return HorizonSession(instances, period_min, period_max, periods, solver, start, options, aggregate).solve(objective)
+
+def solveHorizon(instances, objectives=OBJECTIVES, processes=1, period_min=None, period_max=None, periods=None, starts=None, solver='cbc', options=None, aggregate=False):
+	"""Description of the function
+
+	Solves a horizon of several days under every objective. Without period targets the days do not depend on each other,
+	hence every (date, objective) is solved on its own and dispatched to the process pool. With period targets the days
+	are solved jointly in one HorizonSession, of which the objectives are dispatched to the process pool.
+
+	Parameters:
+	instances (dict): the keyword arguments of Optimize.maxOutput per date
+	objectives (list): the measures to maximize
+	processes (int): the maximum number of processes that solve at the same time
+	period_min (dict): dictionary of the minimum required output per skill per period
+	period_max (dict): dictionary of the maximum required output per skill per period
+	periods (dict): the period per date, the ISO week of the date by default
+	starts (dict): timetable per objective per date to start from
+	solver (str): the solver backend, see backends.py
+	options (dict): time_limit, mip_gap and threads of the solver
+	aggregate (bool): group interchangeable workers into classes, see PlanningMatrices
+
+	Returns:
+	dict: the result of PlanningSession.solve per objective per date
+
+	"""
+
+	starts = starts or {}
+	results = {date: {} for date in instances}
+	if not period_min and not period_max:
+		tasks = [(date, objective) for date in instances for objective in objectives]
+		if min(processes, len(tasks), availableCores()) <= 1:
+			for date, instance in instances.items():
+				results[date] = solveObjectives(instance, objectives, 1, starts.get(date), solver, options, aggregate)
+			return results
+		tasks = (((date, objective), (instances[date], objective, starts.get(date, {}).get(objective), solver, options, aggregate)) for date, objective in tasks)
+		for (date, objective), (result, _) in boundedResults(processPool(processes), solveObjective, tasks, processes):
+			results[date][objective] = result
+		return results
+
+	start = {objective: {date: starts[date][objective] for date in starts if objective in starts[date]} for objective in objectives}
+	if min(processes, len(objectives), availableCores()) <= 1:
+		session = HorizonSession(instances, period_min, period_max, periods, solver, options=options, aggregate=aggregate)
+		solved = {}
+		for objective in objectives:
+			if start[objective]:
+				session.setStart(start[objective])
+			solved[objective] = session.solve(objective)
+	else:
+		tasks = ((objective, (instances, objective, period_min, period_max, periods, start[objective], solver, options, aggregate)) for objective in objectives)
+		solved = dict(boundedResults(processPool(processes), solveHorizonObjective, tasks, processes))
+	for objective, days in solved.items():
+		for date, result in days.items():
+			results[date][objective] = result
+	return results
+
@@ -1,3 +1,483 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import math
+import os
+import tempfile
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import QueryDict
+from django.test import TestCase,RequestFactory,override_settings
+from django.urls import reverse
+from .benchmarks.instances import generateInstance
+from .solver import solveHorizon,PlanningSession,applyDelta
+from django.utils import timezone
+from .planner import planning_inputs,create_pareto,claim_job,requeue_stale_jobs,pareto_settings
+from .importer import Importer
+from .heuristic import Heuristic
+from .matrix import PlanningMatrices
+from .backends import SolverError
+from .benchmarks import report
+from .pagination import Page,encode
+from .forms import PlanningForm,HorizonForm
+from .cache import planning_dates,ResultCache
+from .models import Workers,Skills,Shifts,Availability,WorkerSkills,PlanningJob,ProductivitySnapshot,Projects,Tasks
+from . import snapshot
+from .progress import Progress,stream
+from .views import run_in_request
 
-# Create your tests here.
+class HorizonTests(TestCase):
+
+	def test_weekly_targets(self):
+		# With a weekly maximum the days are solved jointly in one HorizonSession
+		instances = {'2020-04-20': generateInstance(8, 3, 3, seed=1), '2020-04-21': generateInstance(8, 3, 3, seed=2)}
+		skills = instances['2020-04-20']['skills']
+		results = solveHorizon(instances, ['output'], period_max={skill: 60.0 for skill in skills}, solver='highs', options={'mip_gap': 0.01})
+		output = sum(results[date]['output'][1]['output'] for date in instances)
+		self.assertLessEqual(output, 60.0 * len(skills) + 1e-6)
+		self.assertEqual(set(results), set(instances))
+
+class ParetoTests(TestCase):
+
+	def test_three_measures(self):
+		# The grid of every other measure reaches its own optimum, the lower bounds are taken from the payoff table
+		session = PlanningSession(**generateInstance(8, 3, 3, seed=2), solver='highs')
+		measures = ['output', 'preference', 'gross_profit']
+		front = session.paretoFront(measures, 3)
+		for measure in measures:
+			self.assertAlmostEqual(max(point['values'][measure] for point in front), session.solve(measure)[1][measure], delta=0.1)
+
+	def test_max_solves(self):
+		with self.assertRaises(ValueError):
+			create_pareto('2020-08-01', {}, {}, ['output', 'preference', 'gross_profit', 'skill_progression'], 10)
+
+	@override_settings(PLANNING_ASYNC=True, PLANNING_PARETO_TIME_LIMIT=10)
+	def test_job(self):
+		# The front is queued as a planning job of its own, of which the result page polls the result
+		job = PlanningJob.objects.create(date='2020-08-01', parameters=json.dumps({'date': '2020-08-01', 'min_values': {}, 'max_values': {}}), status=PlanningJob.DONE)
+		url = reverse('planning_pareto', kwargs={'pk': job.pk})
+		self.assertEqual(self.client.get(url).status_code, 405)
+		self.assertEqual(self.client.post(url, {'measures': 'output,unknown'}).status_code, 400)
+		self.assertEqual(self.client.post(url, {'measures': 'output,preference,gross_profit', 'points': 10}).status_code, 400)
+		response = self.client.post(url, {'measures': 'output,preference', 'points': 3})
+		self.assertEqual(response.status_code, 202)
+		front = PlanningJob.objects.get(status=PlanningJob.QUEUED)
+		self.assertEqual(json.loads(front.parameters)['pareto_of'], job.pk)
+		self.assertEqual(self.client.get(response.json()['url']).json(), {'done': False, 'status': 'Queued'})
+		points = [{'values': {'output': 10.0, 'preference': 2.0}, 'timetable': {}}]
+		PlanningJob.objects.filter(pk=front.pk).update(status=PlanningJob.DONE, result=json.dumps({'measures': ['output', 'preference'], 'points': points}))
+		self.assertEqual(self.client.get(response.json()['url']).json()['points'], [{'values': points[0]['values']}])
+		self.assertRedirects(self.client.get(reverse('planning_job', kwargs={'pk': front.pk})), reverse('planning_job', kwargs={'pk': job.pk}), fetch_redirect_response=False)
+		# Every solve is limited to PLANNING_PARETO_TIME_LIMIT
+		self.assertEqual(pareto_settings()['options']['time_limit'], 10)
+
+def excel(name, rows):
+	"""Returns an uploaded Excel file of the rows, of which the dates are date cells"""
+	content = io.BytesIO()
+	pd.DataFrame(rows).to_excel(content, index=False)
+	return SimpleUploadedFile(name, content.getvalue())
+
+class ImporterTests(TestCase):
+
+	def setUp(self):
+		skill = Skills.objects.create(name='Picking')
+		Workers.objects.create(name='Anna', preference=skill)
+		Shifts.objects.create(name='Morning', length=8)
+
+	def test_excel_dates(self):
+		rows = [{'worker': 'Anna', 'skill': 'Picking', 'date': datetime.datetime(2020, 8, 1), 'productivity': 1.5}]
+		summary = Importer('productivity').run(excel('productivity.xlsx', rows))
+		self.assertEqual((summary['created'], summary['invalid']), (1, 0))
+		self.assertEqual(WorkerSkills.objects.get().date, datetime.date(2020, 8, 1))
+
+	def test_csv(self):
+		content = b'name,preference\nBen,Picking\nAnna,\n,Picking\nCarl,Unknown\n'
+		summary = Importer('workers').run(SimpleUploadedFile('workers.csv', content))
+		self.assertEqual((summary['rows'], summary['created'], summary['updated'], summary['invalid']), (4, 1, 1, 2))
+		self.assertEqual(summary['errors'], ['Row 4: the name is empty', 'Row 5: unknown preferred skill'])
+		self.assertIsNone(Workers.objects.get(name='Anna').preference)
+		self.assertEqual(Workers.objects.get(name='Ben').preference.name, 'Picking')
+
+	def test_csv_availability(self):
+		content = b'worker,date,shifts\nAnna,2020-08-01,Morning\nAnna,2020-08-02,\nAnna,01-08-2020,Morning\nBen,2020-08-01,Morning\nAnna,2020-08-03,Night\n'
+		summary = Importer('availability').run(SimpleUploadedFile('availability.csv', content))
+		self.assertEqual((summary['created'], summary['invalid']), (2, 3))
+		self.assertEqual(summary['errors'], ['Row 5: unknown worker', 'Row 4: the date is not YYYY-MM-DD', 'Row 6: unknown shift'])
+		self.assertEqual([list(availability.shift.values_list('name', flat=True)) for availability in Availability.objects.order_by('date')], [['Morning'], []])
+
+	def test_unchanged(self):
+		# Only the workers and skills of which a value in the file differs are updated
+		summary = Importer('workers').run(SimpleUploadedFile('workers.csv', b'name\nAnna\nDora\n'))
+		self.assertEqual((summary['created'], summary['updated']), (1, 0))
+		self.assertEqual(Workers.objects.get(name='Anna').preference.name, 'Picking')
+		summary = Importer('workers').run(SimpleUploadedFile('workers.csv', b'name,preference\nAnna,Picking\nDora,Picking\n'))
+		self.assertEqual((summary['created'], summary['updated']), (0, 1))
+		summary = Importer('skills').run(SimpleUploadedFile('skills.csv', b'name,workplaces\nPicking,1\n'))
+		self.assertEqual((summary['created'], summary['updated']), (0, 0))
+
+	def test_strict_dates(self):
+		content = b'worker,skill,date,productivity\nAnna,Picking,2020-08,1\nAnna,Picking,2020-08-01 10:00:00,1\nAnna,Picking,2020-08-01T00:00,1\n'
+		summary = Importer('productivity').run(SimpleUploadedFile('productivity.csv', content))
+		self.assertEqual((summary['created'], summary['invalid']), (0, 3))
+		summary = Importer('productivity').run(excel('productivity.xlsx', [{'worker': 'Anna', 'skill': 'Picking', 'date': datetime.datetime(2020, 8, 1, 10), 'productivity': 1}]))
+		self.assertEqual((summary['created'], summary['invalid']), (0, 1))
+
+	def test_snapshot_pairs(self):
+		# The snapshot is built again for the imported workers and skills only
+		ben = Workers.objects.create(name='Ben')
+		WorkerSkills.objects.create(worker=ben, skill=Skills.objects.get(), date='2020-08-01', productivity=2)
+		ProductivitySnapshot.objects.filter(worker=ben).delete()
+		Importer('productivity').run(SimpleUploadedFile('productivity.csv', b'worker,skill,date,productivity\nAnna,Picking,2020-08-01,1\nAnna,Picking,2020-08-05,3\n'))
+		self.assertEqual(list(snapshot.as_of('2020-08-06').values_list('worker__name', 'productivity')), [('Anna', 3.0)])
+
+	def test_excel(self):
+		rows = [{'name': 'Packing', 'workplaces': 2, 'gross_profit': 1.5}, {'name': 'Picking', 'workplaces': 3, 'gross_profit': None}, {'name': 'Sorting', 'workplaces': -1, 'gross_profit': 1}, {'name': 'Loading', 'workplaces': 1.5, 'gross_profit': 'x'}]
+		summary = Importer('skills').run(excel('skills.xlsx', rows))
+		self.assertEqual((summary['created'], summary['updated'], summary['invalid']), (1, 1, 2))
+		self.assertEqual(Skills.objects.get(name='Picking').workplaces, 3)
+		self.assertFalse(Skills.objects.filter(name__in=['Sorting', 'Loading']).exists())
+
+	def test_excel_invalid(self):
+		rows = [{'worker': 'Anna', 'skill': 'Picking', 'date': 'tomorrow', 'productivity': 1}, {'worker': 'Anna', 'skill': 'Picking', 'date': datetime.datetime(2020, 8, 1), 'productivity': -1}]
+		summary = Importer('productivity').run(excel('productivity.xlsx', rows))
+		self.assertEqual((summary['created'], summary['invalid']), (0, 2))
+		with self.assertRaises(ValueError):
+			Importer('productivity').run(excel('productivity.xlsx', [{'worker': 'Anna', 'date': '2020-08-01'}]))
+
+class JobTests(TestCase):
+
+	def setUp(self):
+		self.jobs = [PlanningJob.objects.create(date='2020-08-01', parameters='{}') for index in range(2)]
+
+	def test_claim_job(self):
+		# Every job is claimed by one worker only, the oldest first
+		self.assertEqual(claim_job('a').pk, self.jobs[0].pk)
+		self.assertIsNone(claim_job('b', self.jobs[0].pk))
+		self.assertEqual(claim_job('b').pk, self.jobs[1].pk)
+		self.assertIsNone(claim_job('c'))
+		self.assertEqual(list(PlanningJob.objects.order_by('pk').values_list('worker', flat=True)), ['a', 'b'])
+
+	def test_requeue_stale_jobs(self):
+		# A job is stale by its heartbeat, not by how long it runs
+		claim_job('a')
+		claim_job('b')
+		old = timezone.now() - datetime.timedelta(minutes=60)
+		PlanningJob.objects.filter(pk=self.jobs[0].pk).update(started=old, heartbeat=old)
+		PlanningJob.objects.filter(pk=self.jobs[1].pk).update(started=old)
+		self.assertEqual(requeue_stale_jobs(30), 1)
+		self.assertEqual(PlanningJob.objects.get(pk=self.jobs[0].pk).status, PlanningJob.QUEUED)
+		self.assertEqual(PlanningJob.objects.get(pk=self.jobs[1].pk).status, PlanningJob.RUNNING)
+		self.assertEqual(claim_job('c').pk, self.jobs[0].pk)
+
+	@override_settings(PLANNING_ASYNC=False)
+	def test_claimed_by_worker(self):
+		# A job that a planning worker claimed first is left to that worker
+		claim_job('a', self.jobs[0].pk)
+		run_in_request(self.jobs[0])
+		job = PlanningJob.objects.get(pk=self.jobs[0].pk)
+		self.assertEqual((job.status, job.worker), (PlanningJob.RUNNING, 'a'))
+
+class PageTests(TestCase):
+
+	def setUp(self):
+		worker = Workers.objects.create(name='Anna')
+		for day in range(1, 4):
+			Availability.objects.create(worker=worker, date=datetime.date(2020, 8, day))
+
+	def page(self, **parameters):
+		return Page(RequestFactory().get('/availability/', parameters), Availability.objects.all(), ['-date', 'id'], size=2)
+
+	def test_pages(self):
+		first = self.page()
+		self.assertEqual([row.date.day for row in first], [3, 2])
+		second = self.page(**QueryDict(first.next[1:]).dict())
+		self.assertEqual([row.date.day for row in second], [1])
+		self.assertIsNotNone(second.previous)
+
+	def test_tampered_cursor(self):
+		# A cursor with a value that does not fit its field shows the first page
+		for values in (['2020-13-45', 1], [[1], {'id': 1}], ['2020-08-02', 'x'], ['2020-08-02'], 'x'):
+			page = self.page(after=encode(values))
+			self.assertEqual([row.date.day for row in page], [3, 2])
+			self.assertIsNone(page.previous)
+		self.assertEqual([row.date.day for row in self.page(before='%%%')], [3, 2])
+
+class HeuristicTests(TestCase):
+
+	def test_minimum_outputs(self):
+		instance = generateInstance(8, 3, 3, seed=1)
+		matrices = PlanningMatrices(**instance)
+		for method in ('greedy', 'lp'):
+			x = Heuristic(method).assignment(matrices, 'output')
+			self.assertTrue((x <= matrices.upper).all())
+		# A minimum output beyond the capacity of a skill is not met
+		instance['min_values'] = dict(instance['min_values'], **{instance['skills'][0]: 1e6})
+		matrices = PlanningMatrices(**instance)
+		for method in ('greedy', 'lp'):
+			with self.assertRaises(SolverError):
+				Heuristic(method).assignment(matrices, 'output')
+
+class SnapshotTests(TestCase):
+
+	def setUp(self):
+		self.worker = Workers.objects.create(name='Anna')
+		self.skill = Skills.objects.create(name='Picking')
+
+	def productivity(self, date):
+		return {row.skill_id: row.productivity for row in snapshot.as_of(date).filter(worker=self.worker)}
+
+	def test_create(self):
+		WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-01', productivity=1)
+		WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-10', productivity=2)
+		self.assertEqual(self.productivity('2020-07-31'), {})
+		self.assertEqual(self.productivity('2020-08-05'), {self.skill.id: 1})
+		self.assertEqual(self.productivity('2020-08-10'), {self.skill.id: 2})
+
+	def test_date_change(self):
+		WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-01', productivity=1)
+		later = WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-10', productivity=2)
+		later.date = datetime.date(2020, 8, 3)
+		later.save()
+		self.assertEqual(self.productivity('2020-08-05'), {self.skill.id: 2})
+		self.assertEqual(ProductivitySnapshot.objects.get(valid_to__isnull=False).valid_to, datetime.date(2020, 8, 3))
+		# Moved to another skill, the snapshot of the previous skill is refreshed as well
+		other = Skills.objects.create(name='Packing')
+		later.skill = other
+		later.save()
+		self.assertEqual(self.productivity('2020-08-05'), {self.skill.id: 1, other.id: 2})
+
+	def test_delete(self):
+		first = WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-01', productivity=1)
+		WorkerSkills.objects.create(worker=self.worker, skill=self.skill, date='2020-08-10', productivity=2)
+		first.delete()
+		self.assertEqual(self.productivity('2020-08-05'), {})
+		# Deleting the worker deletes its WorkerSkills and their snapshot by the cascade
+		self.worker.delete()
+		self.assertFalse(ProductivitySnapshot.objects.exists())
+		self.assertEqual(snapshot.rebuild(), 0)
+
+# The pages are rendered without the manifest of collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AvailabilityGridTests(TestCase):
+
+	def setUp(self):
+		self.workers = [Workers.objects.create(name=name) for name in ('Anna', 'Ben')]
+		self.shifts = [Shifts.objects.create(name=name, length=8) for name in ('Morning', 'Evening')]
+		availability = Availability.objects.create(worker=self.workers[0], date='2020-08-04')
+		availability.shift.add(self.shifts[0])
+
+	def post(self, body):
+		return self.client.post(reverse('availability_grid'), body, content_type='application/json')
+
+	def test_get(self):
+		response = self.client.get(reverse('availability_grid'), {'week': '2020-08-05'})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context['dates'][0], datetime.date(2020, 8, 3))
+		grid = {row['worker'].name: [cell['shifts'] for cell in row['cells']] for row in response.context['grid']}
+		self.assertEqual(grid['Anna'][1], {self.shifts[0].id})
+		self.assertEqual(grid['Ben'], [set()] * 7)
+
+	def test_post(self):
+		changes = [
+			{'worker': self.workers[0].id, 'date': '2020-08-04', 'shifts': []},
+			{'worker': self.workers[1].id, 'date': '2020-08-04', 'shifts': [shift.id for shift in self.shifts]},
+		]
+		response = self.post({'changes': changes})
+		self.assertEqual(response.json(), {'created': 1, 'updated': 0, 'deleted': 1})
+		availability = Availability.objects.get()
+		self.assertEqual((availability.worker, set(availability.shift.all())), (self.workers[1], set(self.shifts)))
+
+	def test_post_invalid(self):
+		for body in ('{', {'changes': [{'worker': self.workers[0].id, 'date': '2020-13-01', 'shifts': []}]}, {'cells': []},
+				{'changes': [{'worker': self.workers[0].id, 'date': '2020-08-04', 'shifts': 1}]}):
+			self.assertEqual(self.post(body).status_code, 400)
+		self.assertEqual(self.post({'changes': [{'worker': self.workers[0].id, 'date': '2020-08-04', 'shifts': [0]}]}).json(), {'error': 'Unknown shift'})
+		self.assertEqual(self.post({'changes': [{'worker': 0, 'date': '2020-08-04', 'shifts': []}]}).json(), {'error': 'Unknown worker'})
+		self.assertEqual(Availability.objects.get().shift.get(), self.shifts[0])
+
+class ReportTests(TestCase):
+
+	def compare(self, baseline, candidate):
+		with tempfile.TemporaryDirectory() as directory:
+			paths = [os.path.join(directory, name) for name in ('baseline.json', 'candidate.csv')]
+			report.write(baseline, paths[0], 'test')
+			report.write(candidate, paths[1], 'test')
+			return {(problem['row'], problem['field']) for problem in report.compare(*paths)}
+
+	def test_compare(self):
+		baseline = [
+			{'instance': 'a', 'objective': 'output', 'matrix_build': 1.0, 'greedy_time': 1.0, 'cold': 1.0, 'value': 100.0, 'status': 'optimal'},
+			{'instance': 'b', 'objective': 'output', 'solve': 1.0, 'value': 100.0, 'status': 'maxTimeLimit'},
+			{'instance': 'c', 'objective': 'output', 'workers_value': 100.0, 'optimum': 50.0, 'same_optimum': True},
+		]
+		candidate = [
+			{'instance': 'a', 'objective': 'output', 'matrix_build': 2.0, 'greedy_time': 1.01, 'cold': 1.5, 'value': 100.001, 'status': 'optimal'},
+			{'instance': 'b', 'objective': 'output', 'solve': 1.0, 'value': 90.0, 'status': 'optimal'},
+			{'instance': 'c', 'objective': 'output', 'workers_value': 99.0, 'optimum': None, 'same_optimum': True},
+		]
+		self.assertEqual(self.compare(baseline, candidate), {('a output', 'matrix_build'), ('a output', 'cold'), ('c output', 'workers_value'), ('c output', 'optimum')})
+
+	def test_changed_flag(self):
+		# A row of which an outcome flag changed is still matched, the flag and the times are reported
+		baseline = [{'instance': 'a', 'variables': 10, 'loops': 1.0, 'tensor': 0.1, 'same': True}, {'instance': 'b', 'presolve': True, 'solve': 1.0}]
+		candidate = [{'instance': 'a', 'variables': 10, 'loops': 5.0, 'tensor': 3.0, 'same': False}, {'instance': 'b', 'presolve': False, 'solve': 9.0}]
+		self.assertEqual(self.compare(baseline, candidate), {('a', 'loops'), ('a', 'tensor'), ('a', 'same')})
+
+class StreamTests(TestCase):
+
+	def test_stream(self):
+		# A stream ends after its timeout, the reconnected browser resumes after the last event it received
+		progress = Progress(1)
+		progress.publish('phase', {'phase': 'inputs'})
+		events = list(stream(progress, lambda: False, interval=0.01, timeout=0.05))
+		self.assertEqual(events, ['retry: 1000\n\n', 'id: 0\nevent: phase\ndata: {"phase": "inputs"}\n\n'])
+		progress.publish('done', {'status': 'Done'})
+		events = list(stream(progress, lambda: False, since=1, interval=0.01, timeout=5))
+		self.assertEqual(events[1:], ['id: 1\nevent: done\ndata: {"status": "Done"}\n\n'])
+
+class InputsTests(TestCase):
+
+	def setUp(self):
+		self.skills = {name: Skills.objects.create(name=name, workplaces=workplaces, gross_profit=profit) for name, workplaces, profit in (('Picking', 2, 3.0), ('Packing', 1, 1.0), ('Sorting', 1, 0.0))}
+		self.shifts = {name: Shifts.objects.create(name=name, length=length) for name, length in (('Morning', 8.0), ('Evening', 6.0))}
+		anna = Workers.objects.create(name='Anna', preference=self.skills['Picking'])
+		ben = Workers.objects.create(name='Ben')
+		carl = Workers.objects.create(name='Carl')
+		self.available(anna, 'Morning', 'Evening')
+		self.available(ben, 'Evening')
+		# The productivity history on both sides of the date, of which the later observations are left out
+		for worker, skill, date, productivity in ((anna, 'Picking', '2020-08-01', 1.0), (anna, 'Picking', '2020-08-08', 2.0), (anna, 'Picking', '2020-08-20', 5.0),
+				(anna, 'Packing', '2020-08-20', 3.0), (ben, 'Packing', '2020-08-05', 1.5), (carl, 'Picking', '2020-08-01', 4.0)):
+			WorkerSkills.objects.create(worker=worker, skill=self.skills[skill], date=date, productivity=productivity)
+
+	def available(self, worker, *shifts, date='2020-08-10'):
+		availability = Availability.objects.create(worker=worker, date=date)
+		availability.shift.set([self.shifts[name] for name in shifts])
+
+	def test_inputs(self):
+		with self.assertNumQueries(6):
+			inputs = planning_inputs('2020-08-10', {'Picking': 1}, {'Picking': 100})
+		self.assertEqual(inputs['workers'], ['Anna', 'Ben'])
+		self.assertEqual(inputs['skills'], ['Picking', 'Packing', 'Sorting'])
+		self.assertEqual(inputs['shifts'], ['Morning', 'Evening'])
+		self.assertEqual((inputs['min_values'], inputs['max_values']), ({'Picking': 1}, {'Picking': 100}))
+		self.assertEqual(inputs['workerskills'], {'Anna': {'Picking': 2.0, 'Packing': 0.0, 'Sorting': 0.0}, 'Ben': {'Picking': 0.0, 'Packing': 1.5, 'Sorting': 0.0}})
+		self.assertEqual(inputs['availability'], {'Anna': {'Morning': 1, 'Evening': 1}, 'Ben': {'Morning': 0, 'Evening': 1}})
+		self.assertEqual(inputs['shift_lengths'], {'Morning': 8.0, 'Evening': 6.0})
+		self.assertEqual(inputs['max_workplaces'], {'Picking': 2, 'Packing': 1, 'Sorting': 1})
+		self.assertEqual(inputs['gross_profit'], {'Picking': 3.0, 'Packing': 1.0, 'Sorting': 0.0})
+		self.assertEqual(inputs['preferences'], {'Anna': {'Picking': 2, 'Packing': 0, 'Sorting': 0}, 'Ben': {'Picking': 0, 'Packing': 1, 'Sorting': 0}})
+		# Anna: the line through (0, 1.0) and (ln 7, 2.0) has the slope 1 / ln 7, divided by ln 7. Ben: one observation
+		progression = inputs['progression']
+		self.assertAlmostEqual(progression['Anna']['Picking'], 1 / math.log(7) ** 2)
+		self.assertEqual((progression['Anna']['Packing'], progression['Ben']['Packing'], progression['Ben']['Picking']), (0, 0.5, 0))
+
+	def test_queries(self):
+		# The number of queries does not grow with the number of workers
+		for index in range(5):
+			worker = Workers.objects.create(name='Worker %d' % index)
+			self.available(worker, 'Morning')
+			WorkerSkills.objects.create(worker=worker, skill=self.skills['Sorting'], date='2020-08-01', productivity=1.0)
+		with self.assertNumQueries(6):
+			inputs = planning_inputs('2020-08-10', {}, {})
+		self.assertEqual(len(inputs['workers']), 7)
+		self.assertEqual(inputs['workerskills']['Worker 4']['Sorting'], 1.0)
+
+def changes(old, new):
+	"""Returns the number of assignments of two timetables that differ"""
+	return sum(len(set(old[shift][skill]) ^ set(new[shift][skill])) for shift in new for skill in new[shift])
+
+class RepairTests(TestCase):
+
+	def setUp(self):
+		self.instance = generateInstance(8, 3, 3, seed=1)
+
+	def test_pinned(self):
+		# A worker that called in sick: only the shift of the worker is planned again, the other shifts are kept
+		timetable = PlanningSession(**self.instance, solver='highs').solve('output')[0]
+		shift, skill = next((shift, skill) for shift in timetable for skill in timetable[shift] if timetable[shift][skill])
+		worker = timetable[shift][skill][0]
+		instance, shifts, skills = applyDelta(self.instance, {'unavailable': [(worker, shift)]})
+		self.assertEqual((shifts, skills), ([shift], []))
+		repaired = PlanningSession(**instance, solver='highs').repair('output', timetable, shifts, skills)[0]
+		for other in timetable:
+			if other != shift:
+				self.assertEqual(changes({other: timetable[other]}, {other: repaired[other]}), 0)
+		self.assertNotIn(worker, [name for names in repaired[shift].values() for name in names])
+
+	def test_penalty(self):
+		# Every shift is free, a penalty per changed assignment keeps the published planning
+		published = PlanningSession(**self.instance, solver='highs').solve('preference')[0]
+		shifts = self.instance['shifts']
+		free = PlanningSession(**self.instance, solver='highs').repair('output', published, shifts)[0]
+		small = PlanningSession(**self.instance, solver='highs').repair('output', published, shifts, penalty=1)[0]
+		large = PlanningSession(**self.instance, solver='highs').repair('output', published, shifts, penalty=1e4)[0]
+		self.assertGreater(changes(published, free), 0)
+		self.assertLessEqual(changes(published, small), changes(published, free))
+		self.assertEqual(changes(published, large), 0)
+
+	def test_unknown_delta(self):
+		worker, shift, skill = self.instance['workers'][0], self.instance['shifts'][0], self.instance['skills'][0]
+		for delta in ({'unavailable': [('Nobody', shift)]}, {'unavailable': [(worker, 'Night')]}, {'productivity': [(worker, 'Juggling', 1.0)]},
+				{'productivity': [('Nobody', skill, 1.0)]}, {'shift_lengths': [('Night', 8.0)]}):
+			with self.assertRaises(ValueError):
+				applyDelta(self.instance, delta)
+		# The instance is not changed by a delta
+		instance, shifts, skills = applyDelta(self.instance, {'shift_lengths': [(shift, 1.0)], 'productivity': [(worker, skill, 0.0)]})
+		self.assertEqual((instance['shift_lengths'][shift], shifts, skills), (1.0, [shift], [skill]))
+		self.assertNotEqual(self.instance['shift_lengths'][shift], 1.0)
+
+class PlanningFormTests(TestCase):
+
+	def setUp(self):
+		project = Projects.objects.create(name='Spring', creation_date='2020-08-01', due_date='2020-09-01')
+		for index in range(5):
+			skill = Skills.objects.create(name='Skill %d' % index)
+			for status in (0, 0, 1):
+				Tasks.objects.create(name='Task', due_date='2020-08-15', skills=skill, project=project, status=status)
+		Availability.objects.create(worker=Workers.objects.create(name='Anna'), date='2020-08-01')
+
+	def test_queries(self):
+		# The dates are cached, the skills and their open tasks are one query, rendering the fields takes none
+		PlanningForm()
+		with self.assertNumQueries(2):
+			PlanningForm().as_p()
+		with self.assertNumQueries(2):
+			form = HorizonForm()
+			form.as_p()
+		self.assertEqual(form.fields['max_Skill 0'].initial, 2)
+		self.assertEqual(form.fields['date'].choices, [('2020-08-01', '2020-08-01')])
+
+	def test_planning_dates(self):
+		# The cached dates are cleared when an availability is saved or deleted
+		self.assertEqual(planning_dates(), ['2020-08-01'])
+		availability = Availability.objects.create(worker=Workers.objects.get(), date='2020-08-02')
+		self.assertEqual(planning_dates(), ['2020-08-02', '2020-08-01'])
+		availability.delete()
+		self.assertEqual(planning_dates(), ['2020-08-01'])
+
+class ResultCacheTests(TestCase):
+
+	def test_counters(self):
+		result_cache = ResultCache(solver={'backend': 'cbc'})
+		instance = {'workers': ['Anna'], 'hours': [8]}
+		self.assertIsNone(result_cache.get(instance, 'output'))
+		result_cache.set(instance, 'output', {'planning': [1]})
+		self.assertEqual(result_cache.get(instance, 'output'), {'planning': [1]})
+		self.assertEqual(result_cache.get(instance, 'output'), {'planning': [1]})
+		# Another objective or other solver settings are other entries
+		self.assertIsNone(result_cache.get(instance, 'cost'))
+		self.assertIsNone(ResultCache(solver={'backend': 'glpk'}).get(instance, 'output'))
+		stats = ResultCache().stats()
+		self.assertEqual((stats['hits'], stats['misses']), (2, 3))
+
+	def test_clear(self):
+		# The results cached before clear are not used anymore, by this or another process
+		result_cache = ResultCache()
+		result_cache.set({'workers': ['Anna']}, 'output', 1)
+		result_cache.get({'workers': ['Anna']}, 'output')
+		result_cache.clear()
+		self.assertEqual((result_cache.stats()['hits'], result_cache.stats()['misses']), (0, 0))
+		self.assertIsNone(result_cache.get({'workers': ['Anna']}, 'output'))
+		self.assertIsNone(ResultCache().get({'workers': ['Anna']}, 'output'))
+		self.assertEqual(ResultCache().stats()['misses'], 2)
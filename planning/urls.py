@@ -10,6 +10,7 @@ urlpatterns = [
     path('login/', auth_views.LoginView.as_view(template_name='planning/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='planning/logout.html'), name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('import/', views.data_import, name='data_import'),
 
     # Workers and skills
     path('workers/', views.workers, name='workers'),
@@ -45,12 +46,21 @@ urlpatterns = [
 
     path('availability/', views.availability, name='availability'),
     path('availability/add/',views.AvailabilityCreate.as_view(), name='availability_add'),
+    path('availability/grid/', views.availability_grid, name='availability_grid'),
     path('availability/<int:pk>/delete/',views.AvailabilityDelete.as_view(), name='availability_delete'),
     path('availability/<int:pk>/edit/',views.AvailabilityUpdateView.as_view(), name='availability_edit'),
 
     path('planning/', views.planning, name='planning'),
     path('planning/create', views.planning_create, name='planning_create'),
     path('planning/result', views.planning_result, name='planning_result'),
+    path('planning/horizon/create', views.planning_horizon_create, name='planning_horizon_create'),
+    path('planning/horizon/result', views.planning_horizon_result, name='planning_horizon_result'),
+    path('planning/result/<int:pk>/', views.planning_job, name='planning_job'),
+    path('planning/result/<int:pk>/status/', views.planning_job_status, name='planning_job_status'),
+    path('planning/result/<int:pk>/events/', views.planning_job_events, name='planning_job_events'),
+    path('planning/result/<int:pk>/pareto/', views.planning_pareto, name='planning_pareto'),
+    path('planning/result/<int:pk>/pareto/<int:front>/', views.planning_pareto_front, name='planning_pareto_front'),
+    path('planning/result/<int:pk>/repair/', views.planning_repair, name='planning_repair'),
     #path('about/', views.about, name='planning-about'),
 
 ]
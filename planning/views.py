@@ -1,18 +1,23 @@
-from django.shortcuts import render,redirect
+from django.shortcuts import render,redirect,get_object_or_404
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect,JsonResponse,StreamingHttpResponse
+from django.db import transaction,IntegrityError
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from .models import Workers,WorkerSkills,Skills,Projects,Tasks,Availability,Shifts
-from .forms import PlanningForm
+from .models import Workers,WorkerSkills,Skills,Projects,Tasks,Availability,Shifts,PlanningJob,ProductivitySnapshot
+from .forms import PlanningForm,HorizonForm,RepairForm,ImportForm
 from django.urls import reverse_lazy,reverse
-from django.db.models import Q,Count,Sum
+from django.conf import settings
+from django.db.models import Q,Count,Sum,Max,Case,When
 import datetime
-from .solver import Optimize
-from .solver import ProgressFit
-import numpy as np
+import json
+from .planner import claim_job,run_job,worker_name,check_pareto
+from .progress import Progress,stream
+from .pagination import Page
+from .importer import Importer,write_availability
+from .cache import clear_planning_dates
 
 def home(request):
     if request.user.is_authenticated:
@@ -38,12 +43,35 @@ def dashboard(request):
 
 # Workers
 def workers(request):
+    page = Page(request, Workers.objects.select_related('preference'), ['name', 'id'])
+    skills = list(Skills.objects.order_by('name'))
+    # The latest productivity per skill of the workers of the page, pivoted into one row per worker
+    pivot = ProductivitySnapshot.objects.filter(worker__in=[worker.id for worker in page], valid_to__isnull=True).values('worker').annotate(**{'skill_%d' % skill.id: Max(Case(When(skill=skill.id, then='productivity'))) for skill in skills})
+    productivity = {row['worker']: row for row in pivot}
+    for worker in page:
+        worker.productivity = [productivity.get(worker.id, {}).get('skill_%d' % skill.id) for skill in skills]
     context = {
-        'workers': Workers.objects.all(),
-        'workerskills': WorkerSkills.objects.all()
+        'workers': page,
+        'skills': skills
     }
     return render(request, 'planning/workers/workers.html', context)
 
+# Import of workers, skills, availability or productivity from a file
+def data_import(request):
+    summary = None
+    if request.method == 'POST':
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                summary = Importer(form.cleaned_data['kind']).run(request.FILES['file'], sheet=form.cleaned_data['sheet'] or None)
+            except ValueError as error:
+                messages.error(request, error)
+            else:
+                messages.success(request, 'Imported %(rows)d rows: %(created)d created, %(updated)d updated and %(invalid)d invalid' % summary)
+    else:
+        form = ImportForm()
+    return render(request, 'planning/import.html', {'form': form, 'summary': summary})
+
 # Update worker details
 class WorkersUpdateView(SuccessMessageMixin, UpdateView):
     model = Workers
@@ -71,13 +99,9 @@ class WorkersCreate(SuccessMessageMixin, CreateView):
 
 # Worker skills page
 def workerskills_edit(request, pk):
-    unique_skills = WorkerSkills.objects.filter(worker=pk).order_by().values('skill').distinct()
-    workerskills = []
-    for unique in unique_skills:
-        ws = WorkerSkills.objects.filter(worker=pk).filter(skill=unique['skill']).order_by('-date')[0]
-        workerskills.append(ws)
+    # The latest productivity per skill, i.e. the snapshot rows that are still valid
     context = {
-        'workerskills': workerskills,
+        'workerskills': ProductivitySnapshot.objects.filter(worker=pk, valid_to__isnull=True).select_related('skill').order_by('skill'),
         'worker': Workers.objects.get(id=pk)
     }
     return render(request, 'planning/workers/workerskills_edit.html', context)
@@ -207,7 +231,7 @@ def viewprojects(request, pk):
     priorities = ["No priority", "Low priority", "Medium priority", "High priority"]
     status = ["Open", "Closed"]
     context = {
-        'tasks': Tasks.objects.filter(project=pk).order_by('due_date'),
+        'tasks': Page(request, Tasks.objects.filter(project=pk).select_related('skills'), ['due_date', 'id']),
         'project': Projects.objects.get(id=pk),
         'priorities': priorities,
         'status': status
@@ -282,19 +306,62 @@ class ShiftsCreate(SuccessMessageMixin, CreateView):
 def availability(request):
     today = datetime.datetime.today()
     sort = request.GET.get('sort')
-    if request.method == 'GET' and sort == 'all':
-        context = {
-            'availabilities': Availability.objects.order_by('-date'),
-            'shifts': Shifts.objects.all()
-        }
-    else:
-        context = {
-            'availabilities': Availability.objects.filter(Q(date__gte=today)).order_by('-date'),
-            'shifts': Shifts.objects.all()
-        }
+    availabilities = Availability.objects.select_related('worker').prefetch_related('shift')
+    if request.method != 'GET' or sort != 'all':
+        availabilities = availabilities.filter(Q(date__gte=today))
+    context = {
+        'availabilities': Page(request, availabilities, ['-date', 'id']),
+        'shifts': Shifts.objects.all()
+    }
 
     return render(request, 'planning/planning/availability.html', context)
 
+# Availability of every worker for every date and shift of a week, of which the page sends the changed cells at once
+def availability_grid(request):
+    try:
+        day = datetime.date.fromisoformat(request.GET.get('week', ''))
+    except ValueError:
+        day = datetime.date.today()
+    monday = day - datetime.timedelta(days=day.weekday())
+    dates = [monday + datetime.timedelta(days=i) for i in range(7)]
+    shifts = list(Shifts.objects.order_by('id'))
+
+    if request.method == 'POST':
+        # The changed cells: {"changes": [{"worker": 1, "date": "2020-08-01", "shifts": [1, 2]}]}, no shifts removes the availability
+        try:
+            changes = json.loads(request.body)['changes']
+            rows = {(int(change['worker']), datetime.date.fromisoformat(change['date'])): {int(shift) for shift in change['shifts']} for change in changes}
+        except (ValueError, KeyError, TypeError) as error:
+            return JsonResponse({'error': 'Invalid changes: %s' % error}, status=400)
+        if not {shift for cell in rows.values() for shift in cell} <= {shift.id for shift in shifts}:
+            return JsonResponse({'error': 'Unknown shift'}, status=400)
+        workers = {worker for worker, date in rows}
+        if Workers.objects.filter(id__in=workers).count() != len(workers):
+            return JsonResponse({'error': 'Unknown worker'}, status=400)
+        try:
+            with transaction.atomic():
+                created, updated, deleted = write_availability(rows, remove_empty=True)
+        except IntegrityError:
+            return JsonResponse({'error': 'The availability was changed by someone else, reload the page'}, status=409)
+        clear_planning_dates()
+        messages.success(request, 'Availability saved: %d added, %d changed and %d removed' % (created, updated, deleted))
+        return JsonResponse({'created': created, 'updated': updated, 'deleted': deleted})
+
+    # The shifts per worker and date of the week in one query, a worker without availability has no row
+    available = {}
+    for worker, date, shift in Availability.objects.filter(date__gte=dates[0], date__lte=dates[-1]).values_list('worker', 'date', 'shift'):
+        available.setdefault((worker, date), set()).update([shift] if shift else [])
+    workers = Workers.objects.order_by('name')
+    grid = [{'worker': worker, 'cells': [{'date': date, 'shifts': available.get((worker.id, date), set())} for date in dates]} for worker in workers]
+    context = {
+        'grid': grid,
+        'dates': dates,
+        'shifts': shifts,
+        'previous': dates[0] - datetime.timedelta(days=7),
+        'next': dates[0] + datetime.timedelta(days=7)
+    }
+    return render(request, 'planning/planning/availability_grid.html', context)
+
 # Update availability details
 class AvailabilityUpdateView(SuccessMessageMixin, UpdateView):
     model = Availability
@@ -320,6 +387,14 @@ class AvailabilityCreate(SuccessMessageMixin, CreateView):
     success_url = reverse_lazy('availability')
     success_message = "Succesfully created"
 
+# Without PLANNING_ASYNC the job is run within the request, unless a planning worker claimed it first
+def run_in_request(job):
+    if settings.PLANNING_ASYNC:
+        return
+    claimed = claim_job(worker_name(), job.id)
+    if claimed is not None:
+        run_job(claimed)
+
 def planning(request):
     return render(request, 'planning/planning/planning.html')
 
@@ -344,105 +419,136 @@ def planning_result(request):
                 elif setting.startswith('max_') == True:
                     max_values[name] = float(data.get(setting))
 
-            # Obtain list of available people
-            availabilities = Availability.objects.filter(date=input_date)
-            model_availabilities = {}
-            model_workerskills = {}
-            model_preferences = {}
-            model_progression = {}
-            model_workers = []
-            for availability in availabilities:
-                model_workers.append(availability.worker.name)
-                # Get availability on date
-                user_availability = {}
-                for shift in Shifts.objects.all():
-                    if shift in availability.shift.all():
-                        user_availability[shift.name] = 1
-                    else:
-                        user_availability[shift.name] = 0
-                model_availabilities[availability.worker.name] = user_availability
-                # Get workerskills of person on the given date and set the preference of the worker
-                user_workerskills = {}
-                user_preferences = {}
-                user_progression = {}
-                for skill in Skills.objects.all():
-                    if WorkerSkills.objects.filter(worker=availability.worker,skill=skill).exists():
-                        user_workerskills[skill.name] = WorkerSkills.objects.filter(Q(date__lte=input_date),worker=availability.worker,skill=skill).values('productivity').order_by('-date')[0]['productivity']
-                        # Check if the skill is the preference of the worker, then value 2, 1 otherwise
-                        if Workers.objects.filter(pk=availability.worker.id,preference=skill).exists(): 
-                            user_preferences[skill.name] = 2
-                        else:
-                            user_preferences[skill.name] = 1
-                    else:
-                        user_workerskills[skill.name] = 0
-                        user_preferences[skill.name] = 0 # If the worker does not have the skill, it can also not prefer the skill. It must have a starting productivity value.
-                    # Determine progression slope
-                    x = []
-                    y = []
-                    observations = WorkerSkills.objects.filter(worker=availability.worker,skill=skill).order_by('date')
-                    if observations.count() == 0:
-                        # No potential
-                        user_progression[skill.name] = 0
-                    elif observations.count() == 1:
-                        # One observation is unable to determine the potential, hence I set a default.
-                        user_progression[skill.name] = 0.5
-                    else:
-                        i = 0
-                        dt = datetime.date(2000, 1, 1) # Set a default datetime
-                        for obs in observations:
-                            if i == 0:
-                                x.append(0)
-                                dt = obs.date
-                            else:
-                                x.append(np.log(float((obs.date - dt).days)))
-                            y.append(obs.productivity) 
-                            i += 1
-
-                        f = ProgressFit()
-                        slope = f.curveFit(x,y)[0]
-                        user_progression[skill.name] = (slope / max(x)) if max(x) != 0 else 0.5 # Take the slope of the last (maximum) value of a*ln(x)+b, which is a/x, value is 0.5 if division by zero (i.e., when x = 0)
-
-                model_workerskills[availability.worker.name] = user_workerskills
-                model_preferences[availability.worker.name] = user_preferences
-                model_progression[availability.worker.name] = user_progression
-
-            # Get maximum workplaces, gross profit per skill and list of skills itself
-            model_max_workplaces = {}
-            model_gross_profit = {}
-            model_skills = []
-            for skill in Skills.objects.all():
-                model_max_workplaces[skill.name] = skill.workplaces
-                model_gross_profit[skill.name] = skill.gross_profit
-                model_skills.append(skill.name)
-            # Get shift lengths
-            model_shift_lengths = {}
-            model_shifts = []
-            for shift in Shifts.objects.all():
-                model_shift_lengths[shift.name] = shift.length
-                model_shifts.append(shift.name)
-
-            skills = model_skills
-            # Send inputs to solver.py
-            function = Optimize()
-            max_output = function.maxOutput(model_shifts, model_workers, model_skills, min_values, max_values, model_workerskills, model_availabilities, model_shift_lengths, model_max_workplaces, model_gross_profit, model_preferences, model_progression)
-            max_gross_profit = function.maxGrossProfit(model_shifts, model_workers, model_skills, min_values, max_values, model_workerskills, model_availabilities, model_shift_lengths, model_max_workplaces, model_gross_profit, model_preferences, model_progression)
-            max_preferences = function.maxPreferences(model_shifts, model_workers, model_skills, min_values, max_values, model_workerskills, model_availabilities, model_shift_lengths, model_max_workplaces, model_gross_profit, model_preferences, model_progression)
-            max_progression = function.maxProgression(model_shifts, model_workers, model_skills, min_values, max_values, model_workerskills, model_availabilities, model_shift_lengths, model_max_workplaces, model_gross_profit, model_preferences, model_progression)
-
-            # Radar chart setup
-            measure_results = {}
-            measures = ['output', 'preference', 'gross_profit', 'skill_progression']
-            for measure in measures:
-                outputs = [max_output[1][measure], max_preferences[1][measure], max_gross_profit[1][measure], max_progression[1][measure]]
-                outputs_perc = []
-                for output in outputs:
-                    if round(max(outputs)) == 0:
-                        outputs_perc.append(0)
-                    else:
-                        outputs_perc.append(round(output / max(outputs) * 100))
-                measure_results[measure] = outputs_perc
-            
-            pass
-            return render(request, 'planning/planning/planning_result.html', {'date': input_date, 'skills': skills, 'max_output': max_output[0], 'max_output_measures': max_output[1], 'max_output_participation': round(max_output[2]*100), 'measures': measure_results, 'max_gross_profit': max_gross_profit[0], 'max_gross_profit_measures': max_gross_profit[1], 'max_gross_profit_participation': round(max_gross_profit[2]*100), 'max_preferences': max_preferences[0], 'max_preferences_measures': max_preferences[1], 'max_preferences_participation': round(max_preferences[2]*100), 'max_progression': max_progression[0], 'max_progression_measures': max_progression[1], 'max_progression_participation': round(max_progression[2]*100)})
+            # The planning is created by a worker process, the result page polls until it is done
+            job = PlanningJob.objects.create(date=input_date, parameters=json.dumps({'date': input_date, 'min_values': min_values, 'max_values': max_values}))
+            run_in_request(job)
+            return redirect('planning_job', pk=job.id)
+    else:
+        return redirect('planning_create')
+
+# Planning of several days at once
+def planning_horizon_create(request):
+    form = HorizonForm()
+    return render(request, 'planning/planning/planning_horizon_create.html', {'form': form})
+
+def planning_horizon_result(request):
+    if request.method == 'POST':
+        form = HorizonForm(request.POST)
+        if form.is_valid():
+            data = request.POST.copy()
+            start_date = data.get('date')
+            end_date = data.get('end_date')
+
+            # Get the minimum and maximum output per skill per day and the optional targets per week
+            min_values = {}
+            max_values = {}
+            weekly_min = {}
+            weekly_max = {}
+            for setting in request.POST.dict():
+                if setting.startswith('min_') == True:
+                    min_values[setting[4:]] = float(data.get(setting))
+                elif setting.startswith('max_') == True:
+                    max_values[setting[4:]] = float(data.get(setting))
+                elif setting.startswith('weekly_min_') == True and data.get(setting) != '':
+                    weekly_min[setting[11:]] = float(data.get(setting))
+                elif setting.startswith('weekly_max_') == True and data.get(setting) != '':
+                    weekly_max[setting[11:]] = float(data.get(setting))
+
+            job = PlanningJob.objects.create(date=start_date, end_date=end_date, parameters=json.dumps({'date': start_date, 'end_date': end_date, 'min_values': min_values, 'max_values': max_values, 'weekly_min': weekly_min, 'weekly_max': weekly_max}))
+            run_in_request(job)
+            return redirect('planning_job', pk=job.id)
+        return render(request, 'planning/planning/planning_horizon_create.html', {'form': form})
     else:
-        return redirect('planning_create')
\ No newline at end of file
+        return redirect('planning_horizon_create')
+
+# Result of a planning job
+def planning_job(request, pk):
+    job = get_object_or_404(PlanningJob, pk=pk)
+    # A Pareto front is shown on the result page of its planning
+    pareto_of = json.loads(job.parameters).get('pareto_of')
+    if pareto_of is not None:
+        return redirect('planning_job', pk=pareto_of)
+    if job.status == PlanningJob.DONE and job.end_date is not None:
+        return render(request, 'planning/planning/planning_horizon_result.html', json.loads(job.result))
+    if job.status == PlanningJob.DONE:
+        context = json.loads(job.result)
+        repair_form = RepairForm(workers=context.get('workers', []), shifts=context.get('shifts', []), skills=context['skills'])
+        return render(request, 'planning/planning/planning_result.html', dict(context, job=job, debug=settings.DEBUG, repair_form=repair_form))
+    return render(request, 'planning/planning/planning_job.html', {'job': job})
+
+# Status of a planning job, polled by the result page
+def planning_job_status(request, pk):
+    job = get_object_or_404(PlanningJob, pk=pk)
+    return JsonResponse({'status': job.get_status_display(), 'done': job.status in (PlanningJob.DONE, PlanningJob.FAILED)})
+
+# Progress of a planning job as server-sent events: the phases, the incumbents of the solver and the result of every objective
+def planning_job_events(request, pk):
+    job = get_object_or_404(PlanningJob, pk=pk)
+
+    def done():
+        job.refresh_from_db(fields=['status'])
+        return job.status in (PlanningJob.DONE, PlanningJob.FAILED)
+
+    # A reconnecting browser sends the id of the last event it received
+    try:
+        since = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        since = 0
+    response = StreamingHttpResponse(stream(Progress(job.id), done, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # No buffering by a proxy such as nginx
+    return response
+
+# Pareto front of two or more measures of a planning job, which is a planning job of its own as it takes up to PARETO_MAX_SOLVES solves
+def planning_pareto(request, pk):
+    job = get_object_or_404(PlanningJob, pk=pk, status=PlanningJob.DONE, end_date__isnull=True)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Post the measures and the number of points'}, status=405)
+    parameters = json.loads(job.parameters)
+    measures = request.POST.get('measures', 'output,preference').split(',')
+    try:
+        points = min(max(int(request.POST.get('points', 5)), 2), 10)
+        check_pareto(measures, points)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    front = PlanningJob.objects.create(date=job.date, parameters=json.dumps({'date': parameters['date'], 'min_values': parameters['min_values'], 'max_values': parameters['max_values'], 'pareto_of': job.id, 'measures': measures, 'points': points}))
+    run_in_request(front)
+    return JsonResponse({'url': reverse('planning_pareto_front', kwargs={'pk': job.id, 'front': front.id})}, status=202)
+
+# The Pareto front as JSON for the chart of the result page, which polls it until the front is done
+def planning_pareto_front(request, pk, front):
+    front = get_object_or_404(PlanningJob, pk=front, end_date__isnull=True)
+    if json.loads(front.parameters).get('pareto_of') != pk:
+        return JsonResponse({'error': 'No Pareto front of this planning'}, status=404)
+    if front.status == PlanningJob.FAILED:
+        # The last line of the traceback holds the message, e.g. of a SolverError
+        return JsonResponse({'done': True, 'error': front.error.strip().splitlines()[-1].split(': ', 1)[-1]})
+    if front.status != PlanningJob.DONE:
+        return JsonResponse({'done': False, 'status': front.get_status_display()})
+
+    # The timetables are only sent when asked for, the chart needs the values
+    result = json.loads(front.result)
+    points = result['points']
+    if request.GET.get('timetables') != '1':
+        points = [{'values': point['values']} for point in points]
+    return JsonResponse({'done': True, 'date': str(front.date), 'measures': result['measures'], 'points': points})
+
+# Re-planning of a planning job after a change, e.g. a worker that called in sick
+def planning_repair(request, pk):
+    job = get_object_or_404(PlanningJob, pk=pk, status=PlanningJob.DONE, end_date__isnull=True)
+    if request.method != 'POST':
+        return redirect('planning_job', pk=job.id)
+    context = json.loads(job.result)
+    form = RepairForm(request.POST, workers=context.get('workers', []), shifts=context.get('shifts', []), skills=context['skills'])
+    if not form.is_valid():
+        for error in form.non_field_errors() + [error for field in form for error in field.errors]:
+            messages.error(request, error)
+        return redirect('planning_job', pk=job.id)
+
+    # The repair is a planning job of its own, which starts from the timetables of this job
+    parameters = json.loads(job.parameters)
+    parameters.update({'repair_of': job.id, 'delta': form.delta(), 'penalty': form.cleaned_data['penalty']})
+    repair = PlanningJob.objects.create(date=job.date, parameters=json.dumps(parameters))
+    run_in_request(repair)
+    return redirect('planning_job', pk=repair.id)